@@ -0,0 +1,109 @@
+"""
+Recall@k and latency of the vector search strategies against exact search.
+
+    python benchmark_vector_search.py <store_dir> [<queries.txt>] [--k 10]
+
+Queries are the lines of ``queries.txt`` embedded with the search model, or,
+without a query file, a random sample of stored chunk vectors. Every strategy
+is compared against the exact full scan on the same queries.
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from vector_index import VectorIndex
+
+
+def measure(index: VectorIndex, queries: np.ndarray, k: int, truth: List[set],
+            strategy: Optional[str] = None, nprobe: Optional[int] = None) -> Dict[str, float]:
+    """Mean recall@k against ``truth`` and mean latency for one configuration."""
+    hits = 0
+    start = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        rows, _ = index.top_k(query, k, nprobe=nprobe, strategy=strategy)
+        hits += len(expected.intersection(rows.tolist()))
+    elapsed = time.perf_counter() - start
+    return {
+        "recall": hits / max(1, sum(len(t) for t in truth)),
+        "ms_per_query": 1000 * elapsed / max(1, len(queries)),
+    }
+
+
+def exact_truth(index: VectorIndex, queries: np.ndarray, k: int) -> List[set]:
+    """Exact top-k row sets for each query."""
+    return [set(index.top_k(q, k, strategy="exact")[0].tolist()) for q in queries]
+
+
+def run_benchmark(store_dir: str, queries: np.ndarray, k: int = 10) -> List[Dict[str, object]]:
+    """Benchmark every strategy on ``queries``; returns one result row per configuration.
+
+    Returns no rows (after saying why) if the store is too small to compare
+    against: fewer rows than ``k`` or than the IVF lists it would be split into.
+    """
+    rows = _live_rows(store_dir)
+    nlist = max(1, int(np.sqrt(rows)))  # IVFIndex's default list count
+    if rows == 0 or rows < k or rows < nlist or len(queries) == 0:
+        print(f"nothing to benchmark: store {store_dir} has {rows} rows and there are {len(queries)} queries; "
+              f"need at least {max(k, nlist, 1)} rows (k={k}, {nlist} IVF lists) and one query")
+        return []
+
+    plain = VectorIndex(store_dir, ann_min_rows=0)
+    plain.load()
+    truth = exact_truth(plain, queries, k)
+    nlist = len(plain.ann.centroids) if plain.ann is not None else 1
+
+    results = [{"config": "exact", **measure(plain, queries, k, truth, strategy="exact")}]
+    for nprobe in sorted({1, 4, 8, 16, 32, nlist}):
+        if nprobe <= nlist:
+            results.append({"config": f"ivf nprobe={nprobe}",
+                            **measure(plain, queries, k, truth, strategy="auto", nprobe=nprobe)})
+
+    for kind in ("int8", "float16"):
+        quantized = VectorIndex(store_dir, ann_min_rows=len(plain) + 1, quantization=kind)
+        quantized.load()
+        results.append({"config": f"{kind} + rescore", **measure(quantized, queries, k, truth)})
+
+    for candidates in (100, 300, 1000):
+        binary = VectorIndex(store_dir, binary_candidates=candidates)
+        binary.load()
+        results.append({"config": f"binary candidates={candidates}",
+                        **measure(binary, queries, k, truth, strategy="binary")})
+    return results
+
+
+def _live_rows(store_dir: str) -> int:
+    """Rows a search can return, without building any index."""
+    index = VectorIndex(store_dir, ann_min_rows=np.iinfo(np.int64).max)
+    index.load()
+    return len(index)
+
+
+def _sample_queries(store_dir: str, count: int, seed: int = 0) -> np.ndarray:
+    index = VectorIndex(store_dir, ann_min_rows=np.iinfo(np.int64).max)
+    index.load()
+    rows = np.random.default_rng(seed).choice(len(index), min(count, len(index)), replace=False)
+    return np.asarray(index.embeddings[np.sort(rows)])
+
+
+def _embed_queries(path: str) -> np.ndarray:
+    from vector_search import load_search_model, model_path
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return load_search_model(model_path).encode(lines, convert_to_numpy=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("store_dir")
+    parser.add_argument("queries", nargs="?", help="text file with one query per line")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=200, help="sampled queries without a query file")
+    args = parser.parse_args()
+
+    queries = _embed_queries(args.queries) if args.queries else _sample_queries(args.store_dir, args.samples)
+    print(f"{len(queries)} queries, recall@{args.k} vs exact")
+    for row in run_benchmark(args.store_dir, queries, args.k):
+        print(f"  {row['config']:<28} recall={row['recall']:.3f}  {row['ms_per_query']:.2f} ms/query")
@@ -0,0 +1,169 @@
+"""
+Shared in-memory cache of the bill text files in one directory.
+
+Keyword indexing, snippets and the bill repository all read the same bill
+texts. BillCorpus reads each file once and serves it from memory until the
+file changes. A read checks the file's mtime and size (one stat) against
+those of the cached copy, and scan() checks the whole directory in a single
+os.scandir pass, dropping cached texts of files that changed or vanished.
+
+Cached texts are held within ``memory_budget`` bytes. When a new text
+doesn't fit, texts are evicted from the least recently used end: of the
+EVICTION_SAMPLE least recently used, the largest goes first, so one big bill
+frees room that would otherwise cost several small, equally cold ones. A
+text larger than the whole budget is returned but never cached.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from logging_config import logger
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Least recently used entries considered for each eviction
+EVICTION_SAMPLE = 8
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """The parts of a file's stat that tell whether it changed."""
+    mtime_ns: int
+    size: int
+
+    @classmethod
+    def of(cls, stat: os.stat_result) -> "FileStat":
+        return cls(stat.st_mtime_ns, stat.st_size)
+
+
+class BillCorpus:
+    """Bill texts of one directory, read through an mtime/size-checked LRU cache."""
+
+    def __init__(self, directory: Union[str, Path], memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        """Initialize an empty cache; nothing is read until asked for.
+
+        Args:
+            directory: Directory of bill text files
+            memory_budget: Bytes of cached text kept at most
+        """
+        self.directory = Path(directory)
+        self.memory_budget = memory_budget
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._files: Optional[Dict[str, FileStat]] = None  # listing from the last scan
+        self._texts: "OrderedDict[str, tuple]" = OrderedDict()  # name -> (FileStat, text, cost)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Number of cached texts."""
+        return len(self._texts)
+
+    def scan(self) -> Dict[str, FileStat]:
+        """List the directory's files (one scandir) and drop cached texts that are stale.
+
+        Returns:
+            The mtime and size of every file, by name
+        """
+        files = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        files[entry.name] = FileStat.of(entry.stat())
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._files = files
+            for name in [name for name, (stat, _, _) in self._texts.items() if files.get(name) != stat]:
+                self._drop(name)
+        return dict(files)
+
+    def names(self) -> List[str]:
+        """Sorted names of the files seen by the last scan (scanning if there was none)."""
+        files = self._files if self._files is not None else self.scan()
+        return sorted(files)
+
+    def read(self, name: str) -> Optional[str]:
+        """Current text of file ``name``, from memory if unchanged; None if it doesn't exist."""
+        path = self.directory / name
+        try:
+            stat = FileStat.of(os.stat(path))
+        except (FileNotFoundError, NotADirectoryError):
+            self.discard(name)
+            return None
+        with self._lock:
+            cached = self._texts.get(name)
+            if cached is not None and cached[0] == stat:
+                self._texts.move_to_end(name)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except FileNotFoundError:
+            self.discard(name)
+            return None
+        self._store(name, stat, text)
+        return text
+
+    def put(self, name: str, text: str) -> None:
+        """Cache ``text`` as the contents just written to file ``name``."""
+        try:
+            stat = FileStat.of(os.stat(self.directory / name))
+        except FileNotFoundError:
+            self.discard(name)
+            return
+        self._store(name, stat, text)
+
+    def discard(self, name: str) -> None:
+        """Forget the cached text of ``name``."""
+        with self._lock:
+            self._drop(name)
+            if self._files is not None:
+                self._files.pop(name, None)
+
+    def warm(self) -> int:
+        """Scan and read every file, so later reads are served from memory.
+
+        Returns:
+            Number of texts cached afterwards
+        """
+        for name in self.names():
+            self.read(name)
+        logger.info(f"Bill corpus cache holds {len(self._texts)} texts ({self._bytes} bytes) from {self.directory}")
+        return len(self._texts)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters, for logging."""
+        with self._lock:
+            return {"texts": len(self._texts), "bytes": self._bytes, "memory_budget": self.memory_budget,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _store(self, name: str, stat: FileStat, text: str) -> None:
+        cost = sys.getsizeof(text)
+        with self._lock:
+            self._drop(name)
+            if self._files is not None:
+                self._files[name] = stat
+            if cost > self.memory_budget:
+                return
+            while self._bytes + cost > self.memory_budget:
+                coldest = islice(self._texts, EVICTION_SAMPLE)
+                self._drop(max(coldest, key=lambda cold: self._texts[cold][2]))
+                self.evictions += 1
+            self._texts[name] = (stat, text, cost)
+            self._bytes += cost
+
+    def _drop(self, name: str) -> None:
+        cached = self._texts.pop(name, None)
+        if cached is not None:
+            self._bytes -= cached[2]
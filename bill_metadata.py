@@ -0,0 +1,246 @@
+"""
+Structured bill fields on vector store rows, and filters over them.
+
+Every chunk row written by embed_txt_file carries the fields of its bill in
+its metadata: ``bill_type`` (a models.BillType value), ``reference_number``,
+``sponsor`` and ``introduced`` (ISO date). extract_bill_fields reads them
+from the bill's header text and filename when the caller doesn't supply them.
+
+MetadataColumns turns those fields into typed columns when the index loads:
+a packed bitmap per bill type and per sponsor, plus integer and date
+columns. A SearchFilters instance resolves to a row mask against them, which
+the index applies before top-k selection.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from models import BillType
+
+FIELD_NAMES = ("bill_type", "reference_number", "sponsor", "introduced")
+
+# Only the start of a bill holds its header
+_HEADER_CHARS = 3000
+
+# Longest spellings first so "H.RES." is not read as "H.R."
+_TYPE_PATTERN = re.compile(
+    r"(?<![\w.])(h\.?\s?con\.?\s?res|s\.?\s?con\.?\s?res|h\.?\s?j\.?\s?res|s\.?\s?j\.?\s?res"
+    r"|h\.?\s?res|s\.?\s?res|h\.?\s?r|s)\.?\s*(\d+)\b",
+    re.IGNORECASE,
+)
+_FILENAME_PATTERN = re.compile(r"^(hconres|sconres|hjres|sjres|hres|sres|hr|s)[-_ ]?(\d+)\b", re.IGNORECASE)
+_SPONSOR_PATTERN = re.compile(
+    r"(?:sponsored by|sponsor\s*:|author\s*:|authored by|introduced by)\s*([^\n,;()]+)", re.IGNORECASE
+)
+_DATE_PATTERN = re.compile(
+    r"(?:introduced|date)[^\n\d]{0,20}?"
+    r"(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4}|[A-Z][a-z]+\.? \d{1,2},? \d{4}|\d{1,2} [A-Z][a-z]+ \d{4})",
+    re.IGNORECASE,
+)
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%B %d, %Y", "%B %d %Y", "%b %d, %Y", "%b. %d, %Y", "%d %B %Y")
+
+
+def _parse_date(text: str) -> Optional[date]:
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def extract_bill_fields(text: str, filename: str = "") -> Dict[str, Any]:
+    """Best-effort bill fields from a bill's header text and filename.
+
+    Returns:
+        Dict with whichever of FIELD_NAMES could be found
+    """
+    header = text[:_HEADER_CHARS]
+    fields: Dict[str, Any] = {}
+
+    match = _FILENAME_PATTERN.match(filename) or _TYPE_PATTERN.search(header)
+    if match:
+        code = re.sub(r"[\s.]", "", match.group(1)).lower()
+        try:
+            fields["bill_type"] = BillType.from_string(code).value
+            fields["reference_number"] = int(match.group(2))
+        except ValueError:
+            pass
+
+    match = _SPONSOR_PATTERN.search(header)
+    if match and match.group(1).strip():
+        fields["sponsor"] = match.group(1).strip()[:80]
+
+    match = _DATE_PATTERN.search(header)
+    if match:
+        introduced = _parse_date(match.group(1))
+        if introduced is not None:
+            fields["introduced"] = introduced.isoformat()
+    return fields
+
+
+def _normalize_sponsor(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+@dataclass
+class SearchFilters:
+    """Structured constraints applied before top-k selection.
+
+    Every set field must match; rows missing a constrained field are excluded.
+    """
+    bill_types: List[BillType] = field(default_factory=list)
+    sponsor: Optional[str] = None  # case-insensitive substring of the sponsor
+    reference_min: Optional[int] = None
+    reference_max: Optional[int] = None
+    introduced_after: Optional[date] = None  # inclusive
+    introduced_before: Optional[date] = None  # inclusive
+
+    @classmethod
+    def from_arguments(cls, bill_type: Optional[Any] = None, sponsor: Optional[str] = None,
+                       reference_number: Optional[int] = None,
+                       introduced_after: Optional[str] = None,
+                       introduced_before: Optional[str] = None) -> Optional["SearchFilters"]:
+        """Build filters from tool-call arguments; None when nothing is set.
+
+        ``bill_type`` may be one value or a list. Dates are ISO strings.
+
+        Raises:
+            ValueError: For an unknown bill type or malformed date
+        """
+        bill_types = [bill_type] if isinstance(bill_type, str) else list(bill_type or [])
+
+        def parse(value: Optional[str]) -> Optional[date]:
+            return date.fromisoformat(value) if value else None
+
+        filters = cls(
+            bill_types=[BillType.from_string(value) for value in bill_types if value],
+            sponsor=sponsor or None,
+            reference_min=reference_number,
+            reference_max=reference_number,
+            introduced_after=parse(introduced_after),
+            introduced_before=parse(introduced_before),
+        )
+        return None if filters.is_empty() else filters
+
+    def is_empty(self) -> bool:
+        return not self.bill_types and self.sponsor is None and self.reference_min is None \
+            and self.reference_max is None and self.introduced_after is None and self.introduced_before is None
+
+    def cache_key(self) -> tuple:
+        """Hashable form, for result caches."""
+        return (
+            tuple(sorted(t.value for t in self.bill_types)),
+            _normalize_sponsor(self.sponsor) if self.sponsor else None,
+            self.reference_min, self.reference_max,
+            self.introduced_after, self.introduced_before,
+        )
+
+    def mask(self, columns: "MetadataColumns") -> np.ndarray:
+        """Rows of ``columns`` that satisfy every constraint."""
+        selected = np.ones(len(columns), dtype=bool)
+        if self.bill_types:
+            selected &= columns.any_of(columns.bill_types, [t.value for t in self.bill_types])
+        if self.sponsor is not None:
+            wanted = _normalize_sponsor(self.sponsor)
+            selected &= columns.any_of(columns.sponsors, [s for s in columns.sponsors if wanted in s])
+        if self.reference_min is not None:
+            selected &= columns.reference_number >= self.reference_min
+        if self.reference_max is not None:
+            selected &= (columns.reference_number <= self.reference_max) & (columns.reference_number >= 0)
+        if self.introduced_after is not None:
+            selected &= columns.introduced >= np.datetime64(self.introduced_after, "D")
+        if self.introduced_before is not None:
+            selected &= columns.introduced <= np.datetime64(self.introduced_before, "D")
+        return selected
+
+
+class MetadataColumns:
+    """Typed columns over the rows' bill fields.
+
+    Bill types and sponsors are packed bitmaps (one bit per row) per distinct
+    value; reference numbers are int64 (-1 when unknown) and introduced dates
+    datetime64[D] (NaT when unknown).
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.bill_types: Dict[str, np.ndarray] = {}
+        self.sponsors: Dict[str, np.ndarray] = {}  # keyed by normalized sponsor name
+        self.reference_number = np.empty(0, dtype=np.int64)
+        self.introduced = np.empty(0, dtype="datetime64[D]")
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def build(cls, metadata: Sequence[Dict[str, Any]]) -> "MetadataColumns":
+        """Columns for every row of ``metadata``."""
+        return cls().extended(metadata)
+
+    def extended(self, metadata: Sequence[Dict[str, Any]]) -> "MetadataColumns":
+        """New columns with ``metadata`` appended as the next rows; this object is untouched."""
+        start, count = self.size, len(metadata)
+        columns = MetadataColumns()
+        columns.size = start + count
+        columns.bill_types = dict(self.bill_types)
+        columns.sponsors = dict(self.sponsors)
+
+        references = np.full(count, -1, dtype=np.int64)
+        introduced = np.full(count, np.datetime64("NaT"), dtype="datetime64[D]")
+        new_types: Dict[str, List[int]] = {}
+        new_sponsors: Dict[str, List[int]] = {}
+        for offset, meta in enumerate(metadata):
+            fields = _row_fields(meta)
+            if fields.get("bill_type"):
+                new_types.setdefault(str(fields["bill_type"]).lower(), []).append(start + offset)
+            if fields.get("sponsor"):
+                new_sponsors.setdefault(_normalize_sponsor(str(fields["sponsor"])), []).append(start + offset)
+            try:
+                references[offset] = int(fields.get("reference_number", -1))
+            except (TypeError, ValueError):
+                pass
+            if fields.get("introduced"):
+                try:
+                    introduced[offset] = np.datetime64(str(fields["introduced"])[:10], "D")
+                except ValueError:
+                    pass
+
+        _set_bits(columns.bill_types, new_types, columns.size)
+        _set_bits(columns.sponsors, new_sponsors, columns.size)
+        columns.reference_number = np.concatenate([self.reference_number, references])
+        columns.introduced = np.concatenate([self.introduced, introduced])
+        return columns
+
+    def any_of(self, bitmaps: Dict[str, np.ndarray], values: Iterable[str]) -> np.ndarray:
+        """Boolean row mask of rows carrying any of ``values``."""
+        combined = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for value in values:
+            bits = bitmaps.get(value)
+            if bits is not None:
+                combined[:len(bits)] |= bits
+        return np.unpackbits(combined).astype(bool)[:self.size]
+
+
+def _row_fields(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Bill fields of a row: top level (embed_txt_file) or nested (VectorRepository)."""
+    nested = meta.get("metadata")
+    if "bill_type" not in meta and isinstance(nested, dict):
+        return nested
+    return meta
+
+
+def _set_bits(bitmaps: Dict[str, np.ndarray], rows: Dict[str, List[int]], size: int) -> None:
+    """Replace the bitmaps of the values in ``rows`` with copies that also set those rows."""
+    for value, new_rows in rows.items():
+        mask = np.zeros(size, dtype=bool)
+        if value in bitmaps:
+            # Not unpackbits(count=size): bits it pads past the input are left uninitialized
+            old = np.unpackbits(bitmaps[value]).astype(bool)[:size]
+            mask[:len(old)] = old
+        mask[new_rows] = True
+        bitmaps[value] = np.packbits(mask)
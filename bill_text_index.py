@@ -0,0 +1,652 @@
+"""
+Persistent positional index over the bill text corpus, for keyword search.
+
+Maps every case-folded word token to the bills containing it and, per bill,
+to the token positions where it occurs. Title words (from the filename) are
+indexed too, without positions. A keyword query then resolves through the
+postings instead of a scan of every file. The index lives in its own
+directory:
+
+    bill_text_index/
+        postings.jsonl    {"format_version": 3}                     (header)
+                          {"add": name, "id": n, "mtime_ns": ..., "size": ...,
+                           "terms": {term: [position, ...], ...}}
+                          {"remove": name}
+
+The log is append-only, so indexing one new bill writes one line. Loading
+replays it; a later ``add`` of the same name replaces the earlier one. Once
+superseded lines outnumber the live bills the log is rewritten (atomically,
+via a temporary file) with just the current entries. A log in an older
+format is discarded and rebuilt from the bill files.
+
+sync() keeps the index in step with the bills directory. It compares each
+file's mtime and size with what was indexed (one scandir, no reads) and
+re-indexes only what changed. BillService.add_bill indexes a new bill
+directly as it writes it. Bill files are read through a bill_corpus.BillCorpus,
+which may be shared with other readers of the same directory.
+
+find() supports three match modes:
+
+* "words": a boolean query. Words and quoted phrases can be combined with
+  AND, OR, NOT and parentheses; adjacent terms are ANDed, so a plain list
+  of words means "all of them". Operators must be upper case. Phrases are
+  matched through the positions, a word sequence matching at consecutive
+  positions. Bills rank by hit count, that is matched word and phrase
+  occurrences (NOT terms don't count).
+* "substring": a query fragment can match inside words. Each run of word
+  characters in the query must occur inside one indexed word. A trigram
+  index over the vocabulary narrows each run to the words that contain it,
+  and their bills are intersected. Multi-word fragments are then confirmed
+  against the candidate files.
+* "fuzzy": typo-tolerant. Each query word matches the indexed words whose
+  trigram similarity (shared / combined padded trigrams, as in pg_trgm)
+  reaches ``fuzzy_threshold``. A bill must match every query word and is
+  ranked by the mean of the best similarities.
+
+The vocabulary trigram index is built on the first substring or fuzzy
+search and then kept up to date with the postings; it is not persisted.
+Snippets around the hits are cut from the bill files of the returned bills
+only. A broad query can match most of the corpus, so callers that show only
+some of the matches rank with ``max_snippets=0`` and ask snippets_for() for
+the ones they display.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from bill_corpus import BillCorpus
+from logging_config import logger
+
+INDEX_FORMAT_VERSION = 3  # 2: title words are indexed too; 3: positions
+LOG_NAME = "postings.jsonl"
+
+MATCH_MODES = ("words", "substring", "fuzzy")
+
+# pg_trgm's default similarity threshold
+DEFAULT_FUZZY_THRESHOLD = 0.3
+
+# Characters of context shown on each side of a hit
+SNIPPET_CONTEXT = 60
+
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+_QUERY_PATTERN = re.compile(r'"([^"]*)"?|([()])|([^\s()"]+)')
+_OPERATORS = ("AND", "OR", "NOT")
+
+# doc id -> (token position, number of tokens) of each hit
+Hits = Dict[int, List[Tuple[int, int]]]
+
+
+def word_tokens(text: str) -> List[str]:
+    """Case-folded word and number tokens of ``text``, in order."""
+    return _WORD_PATTERN.findall(text.casefold())
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of ``word`` padded with two leading blanks and one trailing blank.
+
+    The padding makes short words and word starts count, and every interior
+    trigram of the bare word is among them.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class IndexedBill:
+    """A bill file as it was when indexed."""
+    doc_id: int
+    name: str
+    mtime_ns: int
+    size: int
+
+
+@dataclass
+class KeywordMatch:
+    """One bill matching a keyword query."""
+    name: str
+    hits: int  # occurrences of the query's words/phrases/fragment in the text
+    score: float = 1.0  # mean trigram similarity in "fuzzy" mode
+    snippets: List[str] = field(default_factory=list)  # hits marked **like this**
+    # Where the hits are, so snippets can be cut later (see BillTextIndex.snippets_for)
+    spans: List[Tuple[int, int]] = field(default_factory=list, repr=False, compare=False)  # (token position, length)
+    pattern: Optional[re.Pattern] = field(default=None, repr=False, compare=False)  # "substring" mode
+
+
+class BillTextIndex:
+    """Positional inverted index over the files of one bills directory."""
+
+    def __init__(self, index_dir: Union[str, Path], bills_dir: Union[str, Path],
+                 fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD, corpus: Optional[BillCorpus] = None):
+        """Initialize an empty index; call load() to read the persisted one.
+
+        Args:
+            index_dir: Directory holding the postings log
+            bills_dir: Directory of bill text files being indexed
+            fuzzy_threshold: Minimum trigram similarity for a fuzzy word match
+            corpus: Cache of the texts in ``bills_dir`` (default: a private one)
+        """
+        self.index_dir = Path(index_dir)
+        self.bills_dir = Path(bills_dir)
+        self.corpus = corpus if corpus is not None else BillCorpus(self.bills_dir)
+        self.fuzzy_threshold = fuzzy_threshold
+        self._bills: Dict[str, IndexedBill] = {}
+        self._names: Dict[int, str] = {}
+        self._positions: Dict[int, Dict[str, List[int]]] = {}  # doc -> term -> positions
+        self._postings: Dict[str, Set[int]] = {}  # term -> docs
+        self._trigram_words: Optional[Dict[str, Set[str]]] = None  # trigram -> indexed words, built on demand
+        self._next_id = 0
+        self._log_lines = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._bills)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._bills
+
+    @property
+    def log_path(self) -> Path:
+        return self.index_dir / LOG_NAME
+
+    def load(self) -> None:
+        """Replay the postings log. A log in an older format is discarded and rebuilt by sync()."""
+        with self._lock:
+            self._reset()
+            try:
+                with open(self.log_path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                return
+            if not lines or _parse(lines[0]).get("format_version") != INDEX_FORMAT_VERSION:
+                logger.info(f"Bill text index {self.index_dir} is in an old format; rebuilding")
+                self.log_path.unlink(missing_ok=True)
+                return
+
+            for line in lines[1:]:
+                entry = _parse(line)
+                if "add" in entry:
+                    self._apply_add(IndexedBill(entry["id"], entry["add"], entry["mtime_ns"], entry["size"]),
+                                    entry["terms"])
+                elif "remove" in entry:
+                    self._apply_remove(entry["remove"])
+                # Anything else is a torn final line from an interrupted write; skip it
+            self._log_lines = len(lines) - 1
+            logger.info(f"Loaded bill text index with {len(self._bills)} bills from {self.index_dir}")
+
+    def sync(self) -> int:
+        """Index new and changed bill files and drop deleted ones.
+
+        Returns:
+            Number of bills added, updated or removed
+        """
+        with self._lock:
+            files = self.corpus.scan()
+            changed = 0
+            for name, stat in files.items():
+                indexed = self._bills.get(name)
+                if indexed is not None and (indexed.mtime_ns, indexed.size) == (stat.mtime_ns, stat.size):
+                    continue
+                text = self.corpus.read(name)
+                if text is not None:
+                    self.add_document(name, text)
+                    changed += 1
+            for name in [name for name in self._bills if name not in files]:
+                self.remove_document(name)
+                changed += 1
+            return changed
+
+    def add_document(self, name: str, text: str) -> None:
+        """Index (or re-index) the bill file ``name`` with contents ``text``."""
+        try:
+            stat = (self.bills_dir / name).stat()
+            mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            mtime_ns, size = 0, -1  # not on disk (yet); the next sync reads it
+        terms: Dict[str, List[int]] = {}
+        for position, token in enumerate(word_tokens(text)):
+            terms.setdefault(token, []).append(position)
+        for token in word_tokens(Path(name).stem):
+            terms.setdefault(token, [])
+        self.corpus.put(name, text)
+
+        with self._lock:
+            if name in self._bills:
+                self._apply_remove(name)
+            bill = IndexedBill(self._next_id, name, mtime_ns, size)
+            self._apply_add(bill, terms)
+            self._append({"add": name, "id": bill.doc_id, "mtime_ns": mtime_ns, "size": size, "terms": terms})
+
+    def remove_document(self, name: str) -> bool:
+        """Drop ``name`` from the index; False if it wasn't indexed."""
+        with self._lock:
+            if name not in self._bills:
+                return False
+            self._apply_remove(name)
+            self._append({"remove": name})
+            return True
+
+    def search(self, query: str, mode: str = "words") -> List[str]:
+        """Filenames of the bills matching ``query``, best first (see find)."""
+        return [match.name for match in self.find(query, mode, max_snippets=0)]
+
+    def find(self, query: str, mode: str = "words", limit: Optional[int] = None,
+             max_snippets: int = 3) -> List[KeywordMatch]:
+        """Bills matching ``query`` (case-insensitive), best first.
+
+        Args:
+            query: Boolean query in "words" mode, a text fragment in
+                "substring" mode, misspelled words in "fuzzy" mode
+            mode: One of MATCH_MODES (see the module docstring)
+            limit: Return at most this many bills
+            max_snippets: Snippets per returned bill; bill files are only
+                read if > 0 (see snippets_for to add them afterwards)
+
+        Returns:
+            KeywordMatch per bill, by similarity (fuzzy), then hit count, then name
+
+        Raises:
+            ValueError: For an unknown mode or a malformed boolean query
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"unknown match mode {mode!r}, expected one of {MATCH_MODES}")
+        if mode == "substring":
+            return self._find_substring(query, limit, max_snippets)
+
+        with self._lock:
+            if mode == "fuzzy":
+                scored = self._fuzzy_hits(query)
+            else:
+                node = _QueryParser(query).parse()
+                scored = {doc_id: (1.0, spans) for doc_id, spans in self._evaluate(node).items()} if node else {}
+            ranked = sorted(
+                ((self._names[doc_id], score, sorted(set(spans))) for doc_id, (score, spans) in scored.items()),
+                key=lambda item: (-item[1], -len(item[2]), item[0]),
+            )
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        matches = [KeywordMatch(name, len(spans), score, spans=spans) for name, score, spans in ranked]
+        for match in matches:
+            match.snippets = self.snippets_for(match, max_snippets)
+        return matches
+
+    def snippets_for(self, match: KeywordMatch, max_snippets: int = 3) -> List[str]:
+        """Up to ``max_snippets`` highlighted excerpts around ``match``'s hits.
+
+        Reads only this match's bill file, so the cost follows the number of
+        matches shown rather than the number that matched.
+        """
+        if max_snippets <= 0:
+            return []
+        if match.pattern is not None:
+            text = self._read(match.name)
+            return _snippets(text, [m.span() for m in match.pattern.finditer(text)], max_snippets)
+        if not match.spans:
+            return []
+
+        text = self._read(match.name)
+        last = max(start + length for start, length in match.spans)
+        offsets = []
+        for token in _WORD_PATTERN.finditer(text):
+            offsets.append(token.span())
+            if len(offsets) >= last:
+                break  # no hit lies further in
+        char_spans = [
+            (offsets[start][0], offsets[start + length - 1][1])
+            for start, length in match.spans if start + length <= len(offsets)
+        ]
+        return _snippets(text, char_spans, max_snippets)
+
+    def _evaluate(self, node: tuple) -> Hits:
+        """Bills matching a parsed boolean query, with the hit spans of its positive terms."""
+        kind = node[0]
+        if kind == "phrase":
+            return self._phrase_hits(node[1])
+        if kind == "not":
+            excluded = self._evaluate(node[1])
+            return {doc_id: [] for doc_id in self._names if doc_id not in excluded}
+
+        left_node, right_node = node[1], node[2]
+        if kind == "and":
+            # Apply a negated side as a filter rather than materializing its complement
+            if right_node[0] == "not" and left_node[0] != "not":
+                left, excluded = self._evaluate(left_node), self._evaluate(right_node[1])
+                return {doc_id: spans for doc_id, spans in left.items() if doc_id not in excluded}
+            if left_node[0] == "not" and right_node[0] != "not":
+                right, excluded = self._evaluate(right_node), self._evaluate(left_node[1])
+                return {doc_id: spans for doc_id, spans in right.items() if doc_id not in excluded}
+            left = self._evaluate(left_node)
+            if not left:
+                return {}
+            right = self._evaluate(right_node)
+            return {doc_id: left[doc_id] + right[doc_id] for doc_id in left if doc_id in right}
+
+        merged = dict(self._evaluate(left_node))
+        for doc_id, spans in self._evaluate(right_node).items():
+            merged[doc_id] = merged.get(doc_id, []) + spans
+        return merged
+
+    def _phrase_hits(self, words: List[str]) -> Hits:
+        """Bills containing ``words`` at consecutive positions (or in the title)."""
+        candidates = self._intersect([self._postings.get(word, set()) for word in words])
+        hits: Hits = {}
+        for doc_id in candidates:
+            positions = self._positions[doc_id]
+            rest = [set(positions[word]) for word in words[1:]]
+            spans = [
+                (start, len(words)) for start in positions[words[0]]
+                if all(start + offset in following for offset, following in enumerate(rest, 1))
+            ]
+            if spans or _contains_sequence(word_tokens(Path(self._names[doc_id]).stem), words):
+                hits[doc_id] = spans
+        return hits
+
+    def _fuzzy_hits(self, query: str) -> Dict[int, Tuple[float, List[Tuple[int, int]]]]:
+        """Bills with a similar word for every query word: (mean best similarity, hit spans)."""
+        words = list(dict.fromkeys(word_tokens(query)))
+        if not words:
+            return {}
+        totals: Optional[Dict[int, Tuple[float, List[Tuple[int, int]]]]] = None
+        for word in words:
+            best: Dict[int, float] = {}
+            spans: Dict[int, List[Tuple[int, int]]] = {}
+            for similar, similarity in self._similar_words(word):
+                for doc_id in self._postings[similar]:
+                    best[doc_id] = max(best.get(doc_id, 0.0), similarity)
+                    spans.setdefault(doc_id, []).extend((p, 1) for p in self._positions[doc_id][similar])
+            if totals is None:
+                totals = {doc_id: (score, spans[doc_id]) for doc_id, score in best.items()}
+            else:
+                totals = {
+                    doc_id: (score + best[doc_id], hit_spans + spans[doc_id])
+                    for doc_id, (score, hit_spans) in totals.items() if doc_id in best
+                }
+            if not totals:
+                return {}
+        return {doc_id: (score / len(words), spans) for doc_id, (score, spans) in totals.items()}
+
+    def _find_substring(self, query: str, limit: Optional[int], max_snippets: int) -> List[KeywordMatch]:
+        """Bills whose title or text contains ``query`` (case-insensitive, any whitespace)."""
+        needle = " ".join(query.casefold().split())
+        runs = _WORD_PATTERN.findall(needle)
+        if not runs:
+            return []
+        with self._lock:
+            # Each run lies inside one indexed word, so only bills with such words qualify
+            containing = {run: self._words_containing(run) for run in set(runs)}
+            candidates = self._intersect([
+                set().union(*(self._postings[word] for word in words)) for words in containing.values()
+            ])
+            counted = None
+            if len(runs) == 1 and runs[0] == needle:
+                # A single fragment is confirmed by the word match itself, and its
+                # hits are the occurrences of the words containing it
+                words = containing[needle]
+                counted = {
+                    self._names[doc_id]: sum(len(self._positions[doc_id].get(word, ())) for word in words)
+                    for doc_id in candidates
+                }
+            names = [self._names[doc_id] for doc_id in candidates]
+
+        pattern = re.compile(r"\s+".join(re.escape(part) for part in needle.split()), re.IGNORECASE)
+        if counted is not None:
+            ranked = sorted(counted.items(), key=lambda item: (-item[1], item[0]))
+            if limit is not None:
+                ranked = ranked[:limit]
+            matches = [KeywordMatch(name, hits, 1.0, pattern=pattern) for name, hits in ranked]
+            for match in matches:
+                if match.hits:
+                    match.snippets = self.snippets_for(match, max_snippets)
+            return matches
+
+        matches = []
+        for name in names:
+            text = self._read(name)
+            spans = [m.span() for m in pattern.finditer(text)]
+            if spans or needle in " ".join(Path(name).stem.casefold().split()):
+                matches.append(KeywordMatch(name, len(spans), 1.0, _snippets(text, spans, max_snippets), pattern=pattern))
+        matches.sort(key=lambda match: (-match.hits, match.name))
+        return matches if limit is None else matches[:limit]
+
+    @staticmethod
+    def _intersect(postings: List[Set[int]]) -> Set[int]:
+        """Intersection of posting sets, smallest first."""
+        postings = sorted(postings, key=len)
+        matched = set(postings[0]) if postings else set()
+        for posting in postings[1:]:
+            if not matched:
+                break
+            matched &= posting
+        return matched
+
+    def _ensure_trigrams(self) -> Dict[str, Set[str]]:
+        if self._trigram_words is None:
+            self._trigram_words = {}
+            for word in self._postings:
+                self._add_trigrams(word)
+        return self._trigram_words
+
+    def _add_trigrams(self, word: str) -> None:
+        for trigram in trigrams(word):
+            self._trigram_words.setdefault(trigram, set()).add(word)
+
+    def _words_containing(self, run: str) -> List[str]:
+        """Indexed words that contain ``run``."""
+        if len(run) < 3:
+            return [word for word in self._postings if run in word]
+        index = self._ensure_trigrams()
+        inner = {run[i:i + 3] for i in range(len(run) - 2)}
+        candidates = self._intersect([index.get(trigram, set()) for trigram in inner])
+        return [word for word in candidates if run in word]
+
+    def _similar_words(self, word: str) -> List[Tuple[str, float]]:
+        """Indexed words at least ``fuzzy_threshold`` similar to ``word``."""
+        index = self._ensure_trigrams()
+        query_trigrams = trigrams(word)
+        shared = Counter(similar for trigram in query_trigrams for similar in index.get(trigram, ()))
+        similar = []
+        for candidate, count in shared.items():
+            # |trigrams(candidate)| is len(candidate) + 1 with this padding
+            similarity = count / (len(query_trigrams) + len(candidate) + 1 - count)
+            if similarity >= self.fuzzy_threshold:
+                similar.append((candidate, similarity))
+        return similar
+
+    def _read(self, name: str) -> str:
+        """Current text of a bill file ("" if it is gone)."""
+        text = self.corpus.read(name)
+        return text if text is not None else ""
+
+    def _reset(self) -> None:
+        self._bills.clear()
+        self._names.clear()
+        self._positions.clear()
+        self._postings.clear()
+        self._trigram_words = None
+        self._next_id = 0
+        self._log_lines = 0
+
+    def _apply_add(self, bill: IndexedBill, terms: Dict[str, List[int]]) -> None:
+        if bill.name in self._bills:
+            self._apply_remove(bill.name)
+        self._bills[bill.name] = bill
+        self._names[bill.doc_id] = bill.name
+        self._positions[bill.doc_id] = terms
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = set()
+                if self._trigram_words is not None:
+                    self._add_trigrams(term)
+            posting.add(bill.doc_id)
+        self._next_id = max(self._next_id, bill.doc_id + 1)
+
+    def _apply_remove(self, name: str) -> None:
+        bill = self._bills.pop(name, None)
+        if bill is None:
+            return
+        del self._names[bill.doc_id]
+        for term in self._positions.pop(bill.doc_id):
+            posting = self._postings[term]
+            posting.discard(bill.doc_id)
+            if not posting:
+                del self._postings[term]
+                if self._trigram_words is not None:
+                    for trigram in trigrams(term):
+                        self._trigram_words[trigram].discard(term)
+
+    def _append(self, entry: Dict) -> None:
+        """Append one entry to the log, rewriting it first if mostly superseded."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if not self.log_path.exists() or self._log_lines >= 2 * max(len(self._bills), 16):
+            self._rewrite()  # already includes the change being logged
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._log_lines += 1
+
+    def _rewrite(self) -> None:
+        """Atomically replace the log with one ``add`` line per indexed bill."""
+        tmp_path = self.log_path.with_name(LOG_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"format_version": INDEX_FORMAT_VERSION}) + "\n")
+            for bill in self._bills.values():
+                f.write(json.dumps({
+                    "add": bill.name, "id": bill.doc_id, "mtime_ns": bill.mtime_ns, "size": bill.size,
+                    "terms": self._positions[bill.doc_id],
+                }, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        self._log_lines = len(self._bills)
+
+
+class _QueryParser:
+    """Recursive-descent parser for boolean keyword queries.
+
+    Grammar (operators upper case; adjacent terms are ANDed):
+        or   := and ("OR" and)*
+        and  := not (["AND"] not)*
+        not  := "NOT" not | atom
+        atom := "(" or ")" | '"phrase"' | word
+
+    A bare atom with several word tokens ("H.R.", "404(b)") is a phrase.
+    Nodes are ("phrase", [words]), ("not", node), ("and" | "or", left, right).
+    """
+
+    def __init__(self, query: str):
+        self.tokens: List[Tuple[str, Optional[List[str]]]] = []
+        for match in _QUERY_PATTERN.finditer(query):
+            quoted, paren, bare = match.groups()
+            if paren:
+                self.tokens.append((paren, None))
+            elif bare in _OPERATORS:
+                self.tokens.append((bare, None))
+            else:
+                words = word_tokens(quoted if quoted is not None else bare)
+                if words:
+                    self.tokens.append(("TERM", words))
+        self.position = 0
+
+    def parse(self) -> Optional[tuple]:
+        """The query's syntax tree, or None for a query without terms."""
+        if not self.tokens:
+            return None
+        node = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"unexpected {self._peek()!r} in keyword query")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def _or(self) -> tuple:
+        node = self._and()
+        while self._peek() == "OR":
+            self.position += 1
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self) -> tuple:
+        node = self._not()
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.position += 1
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self) -> tuple:
+        if self._peek() == "NOT":
+            self.position += 1
+            return ("not", self._not())
+        return self._atom()
+
+    def _atom(self) -> tuple:
+        if self._peek() is None:
+            raise ValueError("keyword query ends with an operator")
+        kind, words = self.tokens[self.position]
+        self.position += 1
+        if kind == "TERM":
+            return ("phrase", words)
+        if kind == "(":
+            node = self._or()
+            if self._peek() != ")":
+                raise ValueError("unbalanced parentheses in keyword query")
+            self.position += 1
+            return node
+        raise ValueError(f"unexpected {kind!r} in keyword query")
+
+
+def _contains_sequence(tokens: List[str], words: List[str]) -> bool:
+    """Whether ``words`` occur consecutively in ``tokens``."""
+    n = len(words)
+    return any(tokens[i:i + n] == words for i in range(len(tokens) - n + 1))
+
+
+def _snippets(text: str, spans: List[Tuple[int, int]], max_snippets: int) -> List[str]:
+    """Up to ``max_snippets`` one-line excerpts of ``text``, the (start, end) character spans in bold.
+
+    Hits close enough to share their context are shown in one snippet.
+    """
+    windows: List[List[Tuple[int, int]]] = []
+    for span in sorted(spans):
+        if windows and span[0] < windows[-1][-1][1]:
+            continue  # overlaps the previous hit
+        if windows and span[0] - windows[-1][-1][1] <= SNIPPET_CONTEXT:
+            windows[-1].append(span)
+        elif len(windows) < max_snippets:
+            windows.append([span])
+        else:
+            break
+
+    snippets = []
+    for window in windows:
+        start = max(0, window[0][0] - SNIPPET_CONTEXT)
+        end = min(len(text), window[-1][1] + SNIPPET_CONTEXT)
+        # Widen to whole words at the edges
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+        pieces, cursor = [], start
+        for hit_start, hit_end in window:
+            pieces += [text[cursor:hit_start], "**", text[hit_start:hit_end], "**"]
+            cursor = hit_end
+        pieces.append(text[cursor:end])
+        snippet = " ".join("".join(pieces).split())
+        snippets.append(("…" if start > 0 else "") + snippet + ("…" if end < len(text) else ""))
+    return snippets
+
+
+def _parse(line: str) -> Dict:
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        return {}
+    return entry if isinstance(entry, dict) else {}
@@ -5,18 +5,27 @@ This module encapsulates all runtime state for the bot, eliminating the need
 for global variables scattered throughout the codebase.
 """
 
+import asyncio
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 import discord
 from google import genai
 from google.genai import types
 
-from settings import Settings
+from settings import Settings, VectorSearchSettings
 from services import AIService, BillService, ReferenceService
 from file_manager import FileManager
 from pathlib import Path
 from message_router import MessageRouter, MessageHandler, not_bot_message, contains_google_docs
-from repositories import BillReferenceRepository, QueryLogRepository, BillRepository, VectorRepository
+from repositories import (
+    BillReferenceRepository, QueryLogRepository, BillRepository, SqliteBillRepository, VectorRepository
+)
+from vector_index import VectorIndex
+from bill_text_index import BillTextIndex
+from bill_corpus import BillCorpus
+from vector_store import ensure_store
+import vector_search
+import geminitools
 
 
 @dataclass
@@ -61,9 +70,15 @@ class BotState:
     # Repository instances
     bill_reference_repo: Optional[BillReferenceRepository] = None
     query_log_repo: Optional[QueryLogRepository] = None
-    bill_repo: Optional[BillRepository] = None
+    bill_repo: Optional[Union[BillRepository, SqliteBillRepository]] = None
+    bill_file_repo: Optional[BillRepository] = None  # the txt/json directories, whichever backend is used
     vector_repo: Optional[VectorRepository] = None
     
+    # Resident search indexes and the bill text cache they read through
+    bill_corpus: Optional[BillCorpus] = None
+    vector_index: Optional[VectorIndex] = None
+    bill_text_index: Optional[BillTextIndex] = None
+    
     @classmethod
     def from_settings(cls, client: discord.Client, settings: Settings):
         """Initialize BotState from settings."""
@@ -113,25 +128,96 @@ class BotState:
         """Set the tool functions dictionary."""
         self.tool_functions = tool_functions
     
-    def initialize_services(self, bill_directories: Dict[str, str], vector_pickle_path: str):
+    async def initialize_services(self, bill_directories: Dict[str, str], vector_store_path: str,
+                                  legacy_vector_pickle: Optional[str] = None,
+                                  vector_search_settings: Optional[VectorSearchSettings] = None,
+                                  bill_text_index_path: Optional[str] = None,
+                                  bill_corpus_cache_mb: int = 64,
+                                  bill_repository_backend: str = "files",
+                                  bill_database_path: Optional[str] = None):
         """Initialize service instances.
         
+        Warming the bill cache, converting the legacy pickle and loading the
+        search indexes read the whole corpus, so they run in the default
+        executor instead of blocking the event loop.
+        
         Args:
             bill_directories: Dictionary of bill storage directories
-            vector_pickle_path: Path to vector pickle file
+            vector_store_path: Path to the vector store directory
+            legacy_vector_pickle: Old vectors.pkl to convert if the store doesn't exist yet
+            vector_search_settings: ANN and quantization tuning for the vector index
+            bill_text_index_path: Directory of the keyword search index over the bill texts
+            bill_corpus_cache_mb: Memory budget of the shared bill text cache
+            bill_repository_backend: "files" (txt/json directories) or "sqlite"
+            bill_database_path: Database file of the "sqlite" backend
         """
+        loop = asyncio.get_running_loop()
+        
         # Initialize file manager first
         self.file_manager = FileManager(Path.cwd())
         
+        # One cache of the bill texts for every reader of the bills directory,
+        # filled up front so searches and lookups don't go to disk
+        bills_dir = Path(bill_directories["bills"])
+        self.bill_corpus = BillCorpus(bills_dir, memory_budget=bill_corpus_cache_mb * 1024 * 1024)
+        await loop.run_in_executor(None, self.bill_corpus.warm)
+        
         # Initialize repositories
         self.bill_reference_repo = BillReferenceRepository(Path(self.bill_ref_file))
         self.query_log_repo = QueryLogRepository(Path(self.queries_file))
-        self.bill_repo = BillRepository(
-            text_dir=Path(bill_directories.get("billtexts", "billtexts")),
+        bill_text_dir = Path(bill_directories.get("billtexts", "billtexts"))
+        self.bill_file_repo = BillRepository(
+            text_dir=bill_text_dir,
             pdf_dir=Path(bill_directories.get("billpdfs", "billpdfs")),
-            metadata_dir=Path(bill_directories.get("billmeta", "billmeta"))
+            metadata_dir=Path(bill_directories.get("billmeta", "billmeta")),
+            corpus=self.bill_corpus if bill_text_dir == bills_dir else None
+        )
+        if bill_repository_backend == "sqlite":
+            self.bill_repo = SqliteBillRepository(
+                Path(bill_database_path or "bills.db"),
+                pdf_dir=Path(bill_directories.get("billpdfs", "billpdfs"))
+            )
+        elif bill_repository_backend == "files":
+            self.bill_repo = self.bill_file_repo
+        else:
+            raise ValueError(f"Unknown bill repository backend: {bill_repository_backend!r}")
+        if await loop.run_in_executor(None, ensure_store, vector_store_path, legacy_vector_pickle):
+            print(f"Converted legacy vector pickle {legacy_vector_pickle} into {vector_store_path}")
+        
+        # Load the bill search index once; searches reuse it until the store changes.
+        # The vector repository shares it, so both see the same IVF index.
+        search_options = vector_search_settings or VectorSearchSettings()
+        self.vector_index = VectorIndex(
+            Path(vector_store_path),
+            ann_min_rows=search_options.ann_min_rows,
+            nprobe=search_options.nprobe,
+            nlist=search_options.nlist,
+            quantization=search_options.quantization,
+            rescore_candidates=search_options.rescore_candidates,
+            strategy=search_options.strategy,
+            binary_candidates=search_options.binary_candidates,
+            hybrid_candidates=search_options.hybrid_candidates,
+            rrf_k=search_options.rrf_k
         )
-        self.vector_repo = VectorRepository(Path(vector_pickle_path))
+        await loop.run_in_executor(None, self.vector_index.load)
+        vector_search.set_vector_index(self.vector_index)
+        self.vector_repo = VectorRepository(
+            Path(vector_store_path),
+            index=self.vector_index,
+            max_segments=search_options.max_segments,
+            max_dead_fraction=search_options.max_dead_fraction
+        )
+        
+        # Keyword search index: load the persisted postings, then index whatever
+        # changed in the bills directory while the bot was down
+        self.bill_text_index = BillTextIndex(
+            Path(bill_text_index_path or "bill_text_index"),
+            bills_dir,
+            corpus=self.bill_corpus
+        )
+        await loop.run_in_executor(None, self.bill_text_index.load)
+        await loop.run_in_executor(None, self.bill_text_index.sync)
+        geminitools.set_bill_text_index(self.bill_text_index)
         
         # Initialize services with repositories
         self.ai_service = AIService(
@@ -145,7 +231,9 @@ class BotState:
         self.bill_service = BillService(
             genai_client=self.genai_client,
             bill_directories=bill_directories,
-            file_manager=self.file_manager
+            file_manager=self.file_manager,
+            text_index=self.bill_text_index,
+            vector_repo=self.vector_repo
         )
         
         self.reference_service = ReferenceService(
@@ -154,6 +242,16 @@ class BotState:
             repository=self.bill_reference_repo
         )
     
+    async def prepare_bill_repository(self) -> int:
+        """Fill an empty SQLite bill database from the txt/json directories.
+        
+        Returns:
+            Number of bills imported (0 with the files backend or a populated database)
+        """
+        if not isinstance(self.bill_repo, SqliteBillRepository) or await self.bill_repo.count():
+            return 0
+        return await self.bill_repo.import_from(self.bill_file_repo)
+    
     def initialize_message_router(self):
         """Initialize message router with dynamic channel IDs."""
         from message_router import router, handle_clerk_message, handle_news_message, handle_sign_message
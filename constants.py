@@ -15,6 +15,7 @@ class Limits:
     DISCORD_MAX_EMBED_LENGTH: Final[int] = 4096
     MAX_QUERY_LOG_SIZE: Final[int] = 100000  # Max queries before rotation
     MAX_FILE_SIZE_MB: Final[int] = 25  # Discord file upload limit
+    DISCORD_MAX_ATTACHMENTS: Final[int] = 10  # Files per message
     API_TIMEOUT_SECONDS: Final[int] = 30
     MAX_RETRIES: Final[int] = 3
     RATE_LIMIT_MESSAGES: Final[int] = 10
@@ -0,0 +1,136 @@
+"""
+Micro-batching of query embeddings.
+
+Concurrent bill searches each need one query embedding. Instead of running a
+single-item forward pass per search, EmbeddingBatcher collects the queries
+that arrive within ``max_wait_ms`` of the first one (or until ``max_batch_size``
+are waiting), encodes them in one call off the event loop and resolves every
+caller's future with its own row.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from logging_config import logger
+
+# How many recent batches to keep per-batch metrics for
+_RECENT_BATCHES = 100
+
+
+@dataclass
+class BatchRecord:
+    """Metrics for one encoded batch."""
+    size: int
+    wait_ms: float  # how long the oldest query waited before encoding started
+    encode_ms: float
+
+
+class EmbeddingBatcher:
+    """Collects embedding requests and encodes them in batches."""
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 16, max_wait_ms: float = 10.0):
+        """Initialize the batcher.
+
+        Args:
+            encode: Blocking function mapping a list of texts to an array with
+                one embedding row per text (e.g. SentenceTransformer.encode)
+            max_batch_size: Encode as soon as this many queries are waiting
+            max_wait_ms: Longest time a query waits for others to join its batch
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only holds weak references to tasks; keep in-flight batches alive
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.recent: Deque[BatchRecord] = deque(maxlen=_RECENT_BATCHES)
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embedding for one text, encoded together with concurrent requests."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    async def embed_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """Embeddings for several texts; they may share batches with other callers."""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals plus averages over the recent batches."""
+        recent = list(self.recent)
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "recent_max_batch_size": max((r.size for r in recent), default=0),
+            "recent_mean_wait_ms": sum(r.wait_ms for r in recent) / len(recent) if recent else 0.0,
+            "recent_mean_encode_ms": sum(r.encode_ms for r in recent) / len(recent) if recent else 0.0,
+        }
+
+    def _flush(self) -> None:
+        """Hand everything pending to a batch task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        """Encode one batch in the executor and resolve its futures."""
+        texts = [text for text, _, _ in batch]
+        started = time.perf_counter()
+        wait_ms = (started - min(enqueued for _, _, enqueued in batch)) * 1000
+
+        loop = asyncio.get_running_loop()
+        try:
+            embeddings = await loop.run_in_executor(None, self.encode, texts)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        if len(embeddings) != len(batch):
+            self._fail(batch, RuntimeError(
+                f"encode returned {len(embeddings)} embeddings for a batch of {len(batch)} queries"
+            ))
+            return
+
+        record = BatchRecord(size=len(batch), wait_ms=wait_ms,
+                             encode_ms=(time.perf_counter() - started) * 1000)
+        self.batches += 1
+        self.items += record.size
+        self.recent.append(record)
+        logger.debug(
+            f"Encoded query batch of {record.size} (waited {record.wait_ms:.1f} ms, "
+            f"encode {record.encode_ms:.1f} ms)"
+        )
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(np.asarray(embedding))
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future, float]], error: Exception) -> None:
+        """Fail every caller of ``batch`` still waiting."""
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
@@ -57,4 +57,9 @@ class NetworkError(VCBotError):
 
 class TimeoutError(VCBotError):
     """Operation timeout errors"""
-    pass
\ No newline at end of file
+    pass
+
+
+class VectorStoreError(VCBotError):
+    """Vector store is missing, unreadable or inconsistent"""
+    pass
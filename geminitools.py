@@ -1,12 +1,17 @@
 import os
 import discord
 import asyncio
-from settings import settings, KNOWLEDGE_FILES, BILL_DIRECTORIES
+from settings import settings, KNOWLEDGE_FILES, BILL_DIRECTORIES, BILL_TEXT_INDEX
 from dotenv import load_dotenv
 import traceback
 from collections import defaultdict
-from vector_search import search_vectors_simple, load_search_model, model_path, vector_pkl
-import pandas as pd
+import copy
+from pathlib import Path
+from functools import partial
+from search_cache import TTLCache, normalize_query
+from bill_text_index import BillTextIndex
+from vector_store import read_generation
+from vector_search import search_vectors_simple, load_search_model, embed_query_async, model_path, vector_store_path, chunk_position, fetch_document_chunks
 import requests
 import re
 # Guild ID from settings
@@ -95,7 +100,64 @@ async def call_other_channel_context(channel_name, number_of_messages_called, se
     except Exception as e:
         print(f"cotc failed {e}")
 
-def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool):
+# Chunks on each side of a matched chunk included when reconstructing a bill (0 = matches only)
+RECONSTRUCT_NEIGHBOUR_CHUNKS = 1
+
+# (normalized query, top_k, reconstruct flag, filters, mode, store generation) -> search_bills result.
+# Every write to the vector store (embed_txt_file, VectorRepository save/delete)
+# produces a new generation, so a cached result can never outlive its corpus.
+_RESULT_CACHE = TTLCache(
+    settings.vector_search.result_cache_size,
+    settings.vector_search.result_cache_ttl_seconds
+)
+
+def _result_cache_key(query: str, top_k: int, reconstruct_bills_from_chunks: bool, filters=None, mode=None):
+    return (normalize_query(query), top_k, bool(reconstruct_bills_from_chunks),
+            filters.cache_key() if filters else None, mode, read_generation(vector_store_path))
+
+def _cache_result(cache_key, results):
+    """Cache successful searches (lists); error dicts are never cached."""
+    if isinstance(results, list):
+        _RESULT_CACHE.put(cache_key, copy.deepcopy(results))
+
+def search_result_cache_stats():
+    """Hit/miss counters of the search_bills result cache."""
+    return _RESULT_CACHE.stats()
+
+async def search_bills_async(query: str, top_k: int, reconstruct_bills_from_chunks: bool, filters=None, mode=None):
+    """
+    Async search_bills for the event loop: the query embedding goes through the
+    shared micro-batcher (so concurrent searches share one forward pass) and the
+    search itself runs in the default executor. Same return values as search_bills.
+    """
+    if not query or not query.strip():
+        print("ERROR: Query cannot be empty.")
+        return {"error": "Query cannot be empty."}
+
+    top_k = max(1, min(int(top_k), 10))
+    mode = mode or settings.vector_search.search_mode
+    cache_key = _result_cache_key(query, top_k, reconstruct_bills_from_chunks, filters, mode)
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        # Skip embedding entirely when the result is already cached
+        return copy.deepcopy(cached)
+
+    try:
+        query_embedding = await embed_query_async(query)
+    except (RuntimeError, FileNotFoundError) as e:
+        print(f"ERROR: Model loading failed, cannot proceed. {e}")
+        return {"error": f"Failed to load embedding model: {e}"}
+
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        None,
+        partial(_run_bill_search, query, top_k, reconstruct_bills_from_chunks, query_embedding, filters, mode)
+    )
+    _cache_result(cache_key, results)
+    return results
+
+def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool, query_embedding=None, filters=None,
+                 mode=None):
     """
     Calls a simple RAG system for vector search through the legislative corpus.
 
@@ -120,6 +182,12 @@ def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool):
         Returns an error dictionary {'error': str} if model loading or search fails significantly.
         Returns an empty list [] if search completes but finds no relevant chunks.
         You MUST include ALL args.
+        query_embedding is optional: a precomputed query vector (see search_bills_async).
+        filters is optional: a bill_metadata.SearchFilters (bill type, number, sponsor,
+        introduced dates) that restricts which chunks are ranked at all.
+        mode is optional: "hybrid" (BM25 keyword ranking fused with the vector ranking, so
+        exact act names, section numbers and names are found) or "vector"; defaults to
+        settings.vector_search.search_mode. In hybrid mode 'score' is the fused rank score.
     """
     print(f"\n--- Running Bill Search ---")
     print(f"Query: '{query}'")
@@ -136,6 +204,22 @@ def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool):
     if top_k != original_top_k:
         print(f"INFO: Clamped top_k from {original_top_k} to {top_k} (min 1, max 10).")
 
+    mode = mode or settings.vector_search.search_mode
+
+    # Results only change when the corpus does, so they are cached per store generation
+    cache_key = _result_cache_key(query, top_k, reconstruct_bills_from_chunks, filters, mode)
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        print("INFO: Returning cached search results.")
+        return copy.deepcopy(cached)
+
+    results = _run_bill_search(query, top_k, reconstruct_bills_from_chunks, query_embedding, filters, mode)
+    _cache_result(cache_key, results)
+    return results
+
+def _run_bill_search(query: str, top_k: int, reconstruct_bills_from_chunks: bool, query_embedding=None, filters=None,
+                     mode="vector"):
+    """The uncached body of search_bills; top_k is already validated."""
 
     # 2. Load Model (lazily/globally)
     try:
@@ -153,7 +237,8 @@ def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool):
     # 3. Perform Vector Search
     try:
         # Ensure search_vectors_simple is available in the scope
-        search_results = search_vectors_simple(query, model, vector_pkl, k=top_k)
+        search_results = search_vectors_simple(query, model, vector_store_path, k=top_k,
+                                               query_embedding=query_embedding, filters=filters, mode=mode)
         # search_vectors_simple should return [] if no results, or raise error on failure
         if not isinstance(search_results, list):
              # This case shouldn't happen if search_vectors_simple adheres to its contract
@@ -170,7 +255,7 @@ def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool):
     except FileNotFoundError as e:
          print(f"ERROR: Vector data file not found during search: {e}")
          # File essential for search is missing
-         return {"error": f"Vector data file not found: {vector_pkl}"}
+         return {"error": f"Vector data file not found: {vector_store_path}"}
     except (RuntimeError, Exception) as e: # Catch errors raised by search_vectors_simple or others
         print(f"ERROR: An error occurred during vector search: {e}")
         print(traceback.format_exc())
@@ -213,8 +298,19 @@ def search_bills(query: str, top_k: int, reconstruct_bills_from_chunks: bool):
 
             if not sorted_chunks: continue # Should not happen if bills_data[bill_filename] was non-empty
 
-            # Concatenate text - ensure text exists and is string
-            reconstructed_text = " ".join([str(c.get('text', '')) for c in sorted_chunks])
+            # Concatenate text - ensure text exists and is string. Neighbouring chunks
+            # are pulled from the store so the matched passages read in context.
+            reconstructed_text = None
+            positions = [chunk_position(c['metadata']) for c in sorted_chunks]
+            if RECONSTRUCT_NEIGHBOUR_CHUNKS and None not in positions:
+                try:
+                    context = fetch_document_chunks(bill_filename, positions, RECONSTRUCT_NEIGHBOUR_CHUNKS, vector_store_path)
+                    if context:
+                        reconstructed_text = " ".join(c['text'] for c in context)
+                except Exception as e:
+                    print(f"WARN: Could not fetch neighbouring chunks for '{bill_filename}': {e}")
+            if reconstructed_text is None:
+                reconstructed_text = " ".join([str(c.get('text', '')) for c in sorted_chunks])
 
             # Calculate max score - ensure score exists and is numeric
             try:
@@ -251,14 +347,46 @@ def fetch_public_gdoc_text(gdoc_url):
         raise RuntimeError(f"failed to fetch doc: status {resp.status_code}")
     
     return resp.text
-def bill_keyword_search(keyword: str):
-    bill_data = [
-        {"filename": name, "text": open(os.path.join(BILL_DIRECTORIES["bills"], name), "r").read()}
-        for name in os.listdir(BILL_DIRECTORIES["bills"])
-    ]
-    df = pd.DataFrame(bill_data)
-    mask = df["text"].str.contains(keyword, na=False, case=False)
-    return(df[mask])
+# Keyword index over BILL_DIRECTORIES["bills"] (owned by BotState once it starts)
+_BILL_TEXT_INDEX = None
+
+def set_bill_text_index(index: BillTextIndex) -> None:
+    """Install the resident keyword index used by bill_keyword_search."""
+    global _BILL_TEXT_INDEX
+    _BILL_TEXT_INDEX = index
+
+def get_bill_text_index() -> BillTextIndex:
+    """Returns the resident keyword index, loading it on first use if nobody installed one."""
+    global _BILL_TEXT_INDEX
+    bills_dir = Path(BILL_DIRECTORIES["bills"])
+    if _BILL_TEXT_INDEX is None or _BILL_TEXT_INDEX.bills_dir != bills_dir:
+        index = BillTextIndex(BILL_TEXT_INDEX, bills_dir)
+        index.load()
+        _BILL_TEXT_INDEX = index
+    return _BILL_TEXT_INDEX
+
+def bill_keyword_search(keyword: str, match_mode: str = "words", max_snippets: int = 3,
+                        snippet_limit: int = 10):
+    """Bills matching ``keyword`` (case-insensitive), best first, as KeywordMatch objects.
+
+    match_mode is "words" (a boolean query: words and "quoted phrases" with
+    AND/OR/NOT and parentheses; plain words must all occur), "substring"
+    (the text may occur inside words, e.g. partial names) or "fuzzy"
+    (tolerates typos); see bill_text_index. Each match carries its hit count;
+    only the best ``snippet_limit`` matches (the ones shown first) get up to
+    ``max_snippets`` highlighted snippets, so a broad query doesn't read every
+    matching bill. Only bill files changed since the last search are read;
+    the rest is answered from the persisted index.
+
+    Raises:
+        ValueError: For a malformed boolean query
+    """
+    index = get_bill_text_index()
+    index.sync()
+    matches = index.find(keyword, mode=match_mode, max_snippets=0)
+    for match in matches[:snippet_limit]:
+        match.snippets = index.snippets_for(match, max_snippets)
+    return matches
 
 
     
@@ -0,0 +1,154 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour index in pure NumPy.
+
+Rows are partitioned by a spherical k-means coarse quantizer. A query only
+scores the rows in the ``nprobe`` partitions whose centroids are closest to
+it, so search cost grows with ``nprobe * N / nlist`` instead of ``N``.
+``nprobe`` is the recall/latency knob: ``nprobe == nlist`` is exact search.
+
+The index stores row ids only; vectors stay in the (memory-mapped) embedding
+matrix owned by the caller, which must hold L2-normalized rows.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Rows scored per block when assigning to centroids, to bound temporary memory
+_ASSIGN_BLOCK = 8192
+
+
+class IVFIndex:
+    """IVF index over the rows of an external, normalized embedding matrix."""
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8,
+                 kmeans_iters: int = 10, max_train_rows: int = 50_000, seed: int = 0):
+        """Configure the index; call build() before searching.
+
+        Args:
+            nlist: Number of partitions (default: about sqrt(N) at build time)
+            nprobe: Partitions scanned per query by default
+            kmeans_iters: Lloyd iterations when training the quantizer
+            max_train_rows: Rows sampled to train the quantizer
+            seed: Seed for the training sample and initial centroids
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iters = kmeans_iters
+        self.max_train_rows = max_train_rows
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_rows = 0
+        self._lists: List[np.ndarray] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def build(self, embeddings: np.ndarray) -> None:
+        """Train the quantizer on ``embeddings`` and index all of its rows."""
+        n = len(embeddings)
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+
+        rng = np.random.default_rng(self.seed)
+        if n > self.max_train_rows:
+            sample_rows = np.sort(rng.choice(n, self.max_train_rows, replace=False))
+            sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+        else:
+            sample = np.asarray(embeddings, dtype=np.float32)
+
+        self.centroids = self._train(sample, nlist, rng)
+        self.trained_rows = n
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._size = 0
+        self.add(embeddings, start_row=0)
+
+    def add(self, embeddings: np.ndarray, start_row: int) -> None:
+        """Index rows ``start_row .. start_row + len(embeddings)`` without retraining.
+
+        Args:
+            embeddings: The new rows only
+            start_row: Row id of the first new row in the caller's matrix
+        """
+        if not self.is_trained:
+            raise RuntimeError("IVFIndex.build() must be called before add()")
+        if len(embeddings) == 0:
+            return
+
+        assignment = self._assign(embeddings, self.centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(self.centroids))
+        rows = order.astype(np.int64) + start_row
+        for cluster, members in enumerate(np.split(rows, np.cumsum(counts)[:-1])):
+            if len(members):
+                self._lists[cluster] = np.concatenate([self._lists[cluster], members])
+        self._size += len(embeddings)
+
+    def copy(self) -> "IVFIndex":
+        """Copy sharing the centroids and list arrays; add() on it leaves self untouched."""
+        other = IVFIndex(self.nlist, self.nprobe, self.kmeans_iters, self.max_train_rows, self.seed)
+        other.centroids = self.centroids
+        other.trained_rows = self.trained_rows
+        other._lists = list(self._lists)
+        other._size = self._size
+        return other
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Sorted row ids in the ``nprobe`` partitions closest to ``query``."""
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([self._lists[c] for c in probe])
+        rows.sort()  # sequential access into the memory-mapped matrix
+        return rows
+
+    def search(self, embeddings: np.ndarray, query: np.ndarray, k: int,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top k rows of ``embeddings`` for a unit ``query``.
+
+        Returns:
+            (rows, scores), best first
+        """
+        rows = self.candidates(query, nprobe)
+        if len(rows) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.asarray(embeddings[rows]) @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def _train(self, sample: np.ndarray, nlist: int, rng: np.random.Generator) -> np.ndarray:
+        """Spherical k-means: centroids are renormalized cluster means."""
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+
+            # Re-seed empty clusters from random sample rows
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        return centroids
+
+    @staticmethod
+    def _assign(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid (by dot product) for every row, in blocks."""
+        assignment = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), _ASSIGN_BLOCK):
+            block = np.asarray(embeddings[start:start + _ASSIGN_BLOCK], dtype=np.float32)
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
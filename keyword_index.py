@@ -0,0 +1,188 @@
+"""
+BM25 keyword index over the vector store's chunks.
+
+Embedding search is weak on exact terms (act names, section numbers, people's
+names), so every store part also carries an inverted index of its chunk
+texts, written next to the embeddings by vector_store._write_part:
+
+    bm25.npz
+        terms     str[T]      sorted vocabulary
+        offsets   int64[T+1]  postings of terms[i] are rows/freqs[offsets[i]:offsets[i+1]]
+        rows      int32[P]    part-local row ids, ascending within a term
+        freqs     uint16[P]   term frequency in that row
+        lengths   int32[n]    tokens per row
+
+Postings use the same row ids as the embeddings, so BM25Index (the merged,
+in-memory index over all parts) and the vector index rank the same rows and
+their rankings can be fused without any lookups (reciprocal_rank_fusion).
+Deleted rows still count towards the corpus statistics until a compaction
+rewrites the store; searches mask them out like the vector strategies do.
+"""
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KEYWORD_POSTINGS_FILE = "bm25.npz"
+
+# Reciprocal-rank fusion constant from Cormack et al.; damps the top ranks
+DEFAULT_RRF_K = 60
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Too common in bill text to discriminate; dropping them keeps postings small
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or such that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded word and number tokens of ``text``, without stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(text.casefold()) if token not in STOPWORDS]
+
+
+class KeywordPostings:
+    """Inverted index of one store part (see the module docstring for the layout)."""
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, rows: np.ndarray,
+                 freqs: np.ndarray, lengths: np.ndarray):
+        self.terms = terms
+        self.offsets = offsets
+        self.rows = rows
+        self.freqs = freqs
+        self.lengths = lengths
+
+    def __len__(self) -> int:
+        """Number of rows covered."""
+        return len(self.lengths)
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "KeywordPostings":
+        """Tokenize ``texts`` (row i is texts[i]) and invert them."""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                postings.setdefault(term, []).append((row, freq))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        pairs = np.array([pair for term in terms for pair in postings[term]], dtype=np.int64).reshape(-1, 2)
+        return cls(
+            np.array(terms, dtype=str),
+            offsets,
+            pairs[:, 0].astype(np.int32),
+            np.minimum(pairs[:, 1], np.iinfo(np.uint16).max).astype(np.uint16),
+            np.array(lengths, dtype=np.int32),
+        )
+
+    def postings(self) -> Iterable[Tuple[str, np.ndarray, np.ndarray]]:
+        """(term, rows, freqs) for every term, in term order."""
+        for i, term in enumerate(self.terms.tolist()):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            yield term, self.rows[start:end], self.freqs[start:end]
+
+    def save(self, base: Path) -> None:
+        """Write the postings into a store part directory."""
+        np.savez(base / KEYWORD_POSTINGS_FILE, terms=self.terms, offsets=self.offsets,
+                 rows=self.rows, freqs=self.freqs, lengths=self.lengths)
+
+    @classmethod
+    def load(cls, base: Path) -> Optional["KeywordPostings"]:
+        """Read the postings of a store part, if it has them."""
+        path = base / KEYWORD_POSTINGS_FILE
+        if not path.is_file():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["terms"], data["offsets"], data["rows"], data["freqs"], data["lengths"])
+
+
+class BM25Index:
+    """BM25 (Okapi) ranking over the postings of every store part.
+
+    Instances are never modified once built: extended() returns a new index
+    that shares the untouched postings, since searches on an older snapshot
+    may still be reading this one.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # term -> (rows int64, freqs float32)
+        self.lengths = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        """Number of rows covered."""
+        return len(self.lengths)
+
+    def extended(self, postings: KeywordPostings, start_row: int) -> "BM25Index":
+        """New index that also covers ``postings`` as rows from ``start_row`` on."""
+        if start_row != len(self):
+            raise ValueError(f"postings must start at row {len(self)}, not {start_row}")
+        index = BM25Index(self.k1, self.b)
+        index.terms = dict(self.terms)
+        for term, rows, freqs in postings.postings():
+            rows = rows.astype(np.int64) + start_row
+            freqs = freqs.astype(np.float32)
+            previous = index.terms.get(term)
+            if previous is not None:
+                rows = np.concatenate([previous[0], rows])
+                freqs = np.concatenate([previous[1], freqs])
+            index.terms[term] = (rows, freqs)
+        index.lengths = np.concatenate([self.lengths, postings.lengths.astype(np.float32)])
+        return index
+
+    def scores(self, query: str) -> Optional[np.ndarray]:
+        """BM25 score of every row for ``query``; None if no query term occurs."""
+        matched = [self.terms[term] for term in dict.fromkeys(tokenize(query)) if term in self.terms]
+        if not matched:
+            return None
+        count = len(self.lengths)
+        length_norm = self.k1 * (1.0 - self.b + self.b * self.lengths / max(float(self.lengths.mean()), 1.0))
+        scores = np.zeros(count, dtype=np.float32)
+        for rows, freqs in matched:
+            idf = np.log(1.0 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * freqs * (self.k1 + 1.0) / (freqs + length_norm[rows])
+        return scores
+
+    def top_k(self, query: str, k: int, live: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids and BM25 scores of the k best rows containing a query term, best first.
+
+        Rows outside the ``live`` mask are never returned.
+        """
+        scores = self.scores(query)
+        if scores is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        hits = scores > 0
+        if live is not None:
+            hits &= live
+        rows = np.flatnonzero(hits)
+        k = min(k, len(rows))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores[rows], k - 1)[:k]
+        top = top[np.argsort(-scores[rows][top], kind="stable")]
+        return rows[top], scores[rows][top]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int,
+                           rrf_k: int = DEFAULT_RRF_K) -> Tuple[np.ndarray, np.ndarray]:
+    """Fuse best-first row rankings: each row scores sum(1 / (rrf_k + rank)).
+
+    Returns:
+        (rows, fused scores) of the k best rows, best first; ties keep the
+        order of first appearance
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (rrf_k + rank)
+    best = sorted(fused.items(), key=lambda item: -item[1])[:k]
+    return (np.array([row for row, _ in best], dtype=np.int64),
+            np.array([score for _, score in best], dtype=np.float32))
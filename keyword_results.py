@@ -0,0 +1,193 @@
+"""
+Paged /bill_keyword_search results.
+
+A broad keyword query can match dozens of bills. Instead of one message per
+bill PDF, results are shown a page at a time: one message carrying a page's
+listing (names, hit counts, snippets) and up to DISCORD_MAX_ATTACHMENTS
+PDFs, with Previous/Next buttons. A page's PDFs share one upload budget
+(Limits.MAX_FILE_SIZE_MB per message); bills whose PDF would go over it are
+listed without their file. The match list is kept on the view, so
+turning a page edits that message with the next page's files and never
+re-runs the search. Only the PDFs of pages someone actually views are
+uploaded, and discord.File streams each one from disk. Likewise, given the
+BillTextIndex, the search can skip snippets entirely: each page's snippets
+are cut from its bills when the page is first shown, and kept for revisits.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import discord
+
+from bill_text_index import BillTextIndex, KeywordMatch
+from constants import FilePatterns, Limits
+from response_formatter import ResponseFormatter
+
+# Pages stay navigable this long after the last button press
+PAGE_VIEW_TIMEOUT_SECONDS = 600
+
+
+def bill_pdf_path(name: str, pdf_dir: Union[str, Path]) -> Optional[Path]:
+    """PDF of the bill text file ``name`` (``HR12.txt`` -> ``HR12.pdf``), if one exists."""
+    stem = name[:-len(FilePatterns.TEXT_EXTENSION)] if name.lower().endswith(FilePatterns.TEXT_EXTENSION) else name
+    path = Path(pdf_dir) / f"{stem}{FilePatterns.PDF_EXTENSION}"
+    return path if path.is_file() else None
+
+
+class KeywordResultPages:
+    """Keyword matches split into pages of at most one message's worth of attachments."""
+
+    def __init__(self, matches: Sequence[KeywordMatch], pdf_dir: Union[str, Path], header: str = "",
+                 page_size: int = Limits.DISCORD_MAX_ATTACHMENTS, index: Optional[BillTextIndex] = None,
+                 max_snippets: int = 3):
+        """Split ``matches`` into pages.
+
+        Args:
+            index: Index the matches came from; if given, snippets are cut per
+                page as it is shown instead of using the matches' own
+            max_snippets: Snippets per bill when cutting them from ``index``
+        """
+        self.matches = list(matches)
+        self.pdf_dir = Path(pdf_dir)
+        self.header = header
+        self.page_size = max(1, min(page_size, Limits.DISCORD_MAX_ATTACHMENTS))
+        self.index = index
+        self.max_snippets = max_snippets
+        self._snippets: Dict[int, List[List[str]]] = {}  # page -> snippets of each of its matches
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.matches) // self.page_size))
+
+    def page_matches(self, page: int) -> List[KeywordMatch]:
+        start = page * self.page_size
+        return self.matches[start:start + self.page_size]
+
+    def page_snippets(self, page: int) -> List[List[str]]:
+        """Snippets of each match on ``page``; reads only that page's bills, once."""
+        if self.index is None:
+            return [match.snippets for match in self.page_matches(page)]
+        if page not in self._snippets:
+            self._snippets[page] = [self.index.snippets_for(match, self.max_snippets)
+                                    for match in self.page_matches(page)]
+        return self._snippets[page]
+
+    async def load_page(self, page: int) -> None:
+        """Cut ``page``'s snippets off the event loop, so render() finds them ready."""
+        if self.index is not None and page not in self._snippets:
+            await asyncio.get_running_loop().run_in_executor(None, self.page_snippets, page)
+
+    def render(self, page: int) -> str:
+        """Message text for ``page``: header, then each bill with its hits and snippets.
+
+        Each bill gets an equal share of the message length; snippets that
+        don't fit in it are shortened or left out.
+        """
+        matches = self.page_matches(page)
+        attached = self.attached_pdfs(page)
+        lines = [self.header] if self.header else []
+        if self.page_count > 1:
+            lines.append(f"Page {page + 1}/{self.page_count} ({len(self.matches)} bills)")
+        if not matches:
+            lines.append("No bills matched.")
+            return "\n".join(lines)
+
+        used = sum(len(line) + 1 for line in lines)
+        share = (Limits.DISCORD_MAX_MESSAGE_LENGTH - used) // len(matches)
+        start = page * self.page_size
+        for number, (match, snippets) in enumerate(zip(matches, self.page_snippets(page)), start + 1):
+            title = f"{number}. **{match.name}** ({match.hits} {'hit' if match.hits == 1 else 'hits'})"
+            if match.name not in attached:
+                title += " (no PDF)" if bill_pdf_path(match.name, self.pdf_dir) is None else " (PDF too large to attach)"
+            entry = [title[:share - 1]]
+            budget = share - len(entry[0]) - 1
+            for snippet in snippets:
+                line = f"> {snippet}"
+                if len(line) + 1 > budget:
+                    if budget >= 40:  # worth showing a shortened snippet
+                        entry.append(line[:budget - 2] + "…")
+                    break
+                entry.append(line)
+                budget -= len(line) + 1
+            lines.extend(entry)
+        text, _ = ResponseFormatter.sanitize("\n".join(lines))
+        return text
+
+    def attached_pdfs(self, page: int) -> Dict[str, Path]:
+        """PDFs sent with ``page``, by bill name, in order until the next would exceed the upload limit."""
+        budget = Limits.MAX_FILE_SIZE_MB * 1024 * 1024
+        attached = {}
+        for match in self.page_matches(page):
+            path = bill_pdf_path(match.name, self.pdf_dir)
+            if path is None:
+                continue
+            size = path.stat().st_size
+            if size > budget:
+                break
+            attached[match.name] = path
+            budget -= size
+        return attached
+
+    def files(self, page: int) -> List[discord.File]:
+        """Fresh attachments for the PDFs of ``page`` (a sent discord.File is spent)."""
+        return [discord.File(path, filename=path.name) for path in self.attached_pdfs(page).values()]
+
+
+class KeywordResultView(discord.ui.View):
+    """Previous/Next buttons over a KeywordResultPages; only the searcher can turn pages."""
+
+    def __init__(self, pages: KeywordResultPages, owner_id: int, timeout: float = PAGE_VIEW_TIMEOUT_SECONDS):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.owner_id = owner_id
+        self.page = 0
+        self.message: Optional[discord.Message] = None
+        self._update_buttons()
+
+    async def send(self, channel: discord.abc.Messageable) -> discord.Message:
+        """Post the first page (with buttons only if there is more than one page)."""
+        view = self if self.pages.page_count > 1 else None
+        await self.pages.load_page(0)
+        self.message = await channel.send(self.pages.render(0), files=self.pages.files(0), view=view)
+        if view is None:
+            self.stop()
+        return self.message
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Only the person who ran this search can page through it.",
+                                                    ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass  # message deleted; nothing to disable
+
+    async def _show(self, interaction: discord.Interaction, page: int) -> None:
+        self.page = max(0, min(page, self.pages.page_count - 1))
+        self._update_buttons()
+        # Acknowledge within Discord's 3 s deadline; cutting snippets and uploading PDFs can take longer
+        await interaction.response.defer()
+        await self.pages.load_page(self.page)
+        await interaction.edit_original_response(
+            content=self.pages.render(self.page), attachments=self.pages.files(self.page), view=self
+        )
+
+    def _update_buttons(self) -> None:
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages.page_count - 1
@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 from typing import Literal
 from pathlib import Path
 from botcore import intents, client, tree
-from settings import settings, KNOWLEDGE_FILES, BILL_DIRECTORIES, MODEL_PATH, VECTOR_PKL, ALLOWED_ROLES_FOR_ROLES
+from settings import settings, KNOWLEDGE_FILES, BILL_DIRECTORIES, MODEL_PATH, VECTOR_PKL, VECTOR_STORE, BILL_TEXT_INDEX, BILL_CORPUS_CACHE_MB, BILL_REPOSITORY_BACKEND, BILL_DATABASE, ALLOWED_ROLES_FOR_ROLES
 import geminitools
 from functools import wraps
 from makeembeddings import embed_txt_file
@@ -18,6 +18,7 @@ from command_utils import (
     send_ai_response, handle_command_error
 )
 from response_formatter import ResponseFormatter
+from keyword_results import KeywordResultPages, KeywordResultView
 from error_handler import handle_errors, mark_uses_network, mark_uses_ai
 import tools  # Import tools to register them with the registry
 from registry import registry
@@ -325,29 +326,32 @@ async def model_economic_impact(interaction: discord.Interaction, bill_link: str
 @has_any_role(Roles.ADMIN, Roles.AI_ACCESS)
 @limit_to_channels([settings.channels.bot_helper_channel])
 @handle_errors("Failed to search bills")
-async def bill_keyword_search(interaction: discord.Interaction, search_query: str):
+async def bill_keyword_search(interaction: discord.Interaction, search_query: str,
+                              match_mode: Literal["words", "substring", "fuzzy"] = "words"):
     """Perform a basic keyword search on the legislative corpus."""
     await interaction.response.defer(ephemeral=False)
     
-    returned_bills = geminitools.bill_keyword_search(search_query)
+    try:
+        matches = await asyncio.get_running_loop().run_in_executor(
+            None, geminitools.bill_keyword_search, search_query, match_mode, 0
+        )
+    except ValueError as e:
+        await interaction.followup.send(
+            f"Invalid search query: {e}. Combine words and \"quoted phrases\" with AND, OR, NOT and parentheses.",
+            ephemeral=True
+        )
+        return
     
     # Send completion message first
-    completion_message = f"Complete. Found {len(returned_bills)} bills matching your query."
+    completion_message = f"Complete. Found {len(matches)} bills matching your query."
     await interaction.followup.send(completion_message, ephemeral=True)
     
-    # Send header
+    # Post the first page of results with its PDFs; the buttons upload later pages on demand,
+    # and each page's snippets are cut from the index when it is first shown
     query_header = f"Query from {interaction.user.mention}: Search bills for '{search_query}'\n\nResults:"
-    safe_header, _ = ResponseFormatter.sanitize(query_header)
-    await interaction.channel.send(safe_header)
-    
-    # Send each bill file
-    for _, row in returned_bills.iterrows():
-        name = row["filename"]
-        content = row["text"]
-        pdf_path = Path(BILL_DIRECTORIES["billpdfs"]) / name
-        await interaction.channel.send(file=discord.File(pdf_path))
-        # Note: This os.remove(name) looks incorrect - it removes 'name' instead of the actual file path
-        # Consider using the FileManager if cleanup is needed
+    pages = KeywordResultPages(matches, BILL_DIRECTORIES["billpdfs"], header=query_header,
+                               index=geminitools.get_bill_text_index())
+    await KeywordResultView(pages, owner_id=interaction.user.id).send(interaction.channel)
 
 
 
@@ -433,7 +437,16 @@ async def on_ready():
     bot_state.initialize_channels()
     
     # Initialize services
-    bot_state.initialize_services(BILL_DIRECTORIES, VECTOR_PKL)
+    await bot_state.initialize_services(
+        BILL_DIRECTORIES, VECTOR_STORE,
+        legacy_vector_pickle=VECTOR_PKL,
+        vector_search_settings=settings.vector_search,
+        bill_text_index_path=BILL_TEXT_INDEX,
+        bill_corpus_cache_mb=BILL_CORPUS_CACHE_MB,
+        bill_repository_backend=BILL_REPOSITORY_BACKEND,
+        bill_database_path=BILL_DATABASE
+    )
+    await bot_state.prepare_bill_repository()
     logger.info("Initialized services")
     
     # Initialize message router
@@ -1,15 +1,19 @@
 import os
-import pickle
 from sentence_transformers import SentenceTransformer
 from transformers import AutoTokenizer
+from bill_metadata import extract_bill_fields
+from vector_store import append_to_store
 
 def embed_txt_file(
     txt_path: str,
     model_path: str,
     chunk_size_tokens: int = 1024,
     overlap_tokens: int = 50,
-    save_to: str = None
+    save_to: str = None,
+    bill_fields: dict = None
 ):
+    # bill_fields: bill_type / reference_number / sponsor / introduced for every
+    # chunk (see bill_metadata); read from the bill's header when omitted
     if not os.path.isfile(txt_path):
         raise FileNotFoundError(f"no txt file found: {txt_path}")
     if not os.path.isdir(model_path):
@@ -22,6 +26,9 @@ def embed_txt_file(
     with open(txt_path, "r", encoding="utf-8") as f:
         raw_text = f.read()
 
+    if bill_fields is None:
+        bill_fields = extract_bill_fields(raw_text, os.path.basename(txt_path))
+
     token_ids = tokenizer.encode(raw_text, add_special_tokens=False)
     print(f"tokenized into {len(token_ids)} tokens")
 
@@ -38,7 +45,8 @@ def embed_txt_file(
                     "chunk_index": len(chunks),
                     "start_token_index": i,
                     "end_token_index": min(i + chunk_size_tokens, len(token_ids)),
-                    "source": os.path.basename(txt_path)
+                    "source": os.path.basename(txt_path),
+                    **bill_fields
                 }
             })
 
@@ -50,7 +58,10 @@ def embed_txt_file(
         raise ValueError("no valid text chunks generated")
 
     print(f"encoding {len(chunks)} chunks")
-    embeddings = model.encode([c["text"] for c in chunks], show_progress_bar=True)
+    # store vectors pre-normalized so search is a single matrix-vector product
+    embeddings = model.encode(
+        [c["text"] for c in chunks], show_progress_bar=True, normalize_embeddings=True
+    )
 
     final_data = [
         {
@@ -63,21 +74,21 @@ def embed_txt_file(
 
     if save_to:
         if os.path.exists(save_to):
-            print(f"existing pickle found at {save_to}, appending...")
-            try:
-                with open(save_to, "rb") as f:
-                    existing_data = pickle.load(f)
-                final_data = existing_data + final_data
-            except Exception as e:
-                print(f"failed to load existing pickle, overwriting instead: {e}")
+            print(f"existing vector store found at {save_to}, appending...")
         else:
-            print(f"no existing pickle, creating new one at {save_to}")
+            print(f"no existing vector store, creating new one at {save_to}")
 
         try:
-            with open(save_to, "wb") as f:
-                pickle.dump(final_data, f)
-            print("done.")
+            total = append_to_store(
+                save_to,
+                embeddings,
+                [c["metadata"] for c in chunks],
+                [c["text"] for c in chunks],
+            )
+            # segments are merged by VectorRepository's background compaction,
+            # not here on the caller's path
+            print(f"done. store now holds {total} vectors.")
         except Exception as e:
-            print(f"epic fail saving pickle file: {e}")
+            print(f"epic fail saving vector store: {e}")
 
-    return final_data
\ No newline at end of file
+    return final_data
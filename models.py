@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List, Union
 from enum import Enum
 
 
@@ -86,14 +86,44 @@ class Query:
         }
 
 
+class LazyText:
+    """Dataclass field holding text, or a zero-argument callable that loads it.
+    
+    The callable runs on first access and its result replaces it, so a
+    record can be built without reading a large body it may never need.
+    """
+    
+    def __set_name__(self, owner, name):
+        self.attribute = f"_{name}"
+    
+    def __get__(self, obj, objtype=None) -> str:
+        if obj is None:
+            raise AttributeError  # no default: the field stays required
+        value = obj.__dict__[self.attribute]
+        if callable(value):
+            value = value()
+            obj.__dict__[self.attribute] = value
+        return value
+    
+    def __set__(self, obj, value: Union[str, Callable[[], str]]) -> None:
+        obj.__dict__[self.attribute] = value
+    
+    def is_loaded(self, obj) -> bool:
+        return not callable(obj.__dict__.get(self.attribute))
+
+
 @dataclass
 class Bill:
-    """Represents a bill with all its metadata."""
+    """Represents a bill with all its metadata.
+    
+    ``text_content`` may be given as a loader (see LazyText); BillRepository
+    does that so the body is only read when something uses it.
+    """
     identifier: str  # e.g., "hr-123"
     title: str
     bill_type: BillType
     reference_number: int
-    text_content: str
+    text_content: str = LazyText()
     pdf_path: Optional[str] = None
     sponsor: Optional[str] = None
     created_at: datetime = field(default_factory=datetime.now)
@@ -105,20 +135,27 @@ class Bill:
         """Get base filename for this bill."""
         return f"{self.bill_type.value}{self.reference_number}"
     
-    def to_dict(self) -> Dict[str, any]:
-        """Convert to dictionary for serialization."""
-        return {
+    @property
+    def text_loaded(self) -> bool:
+        """Whether text_content is in memory (False until a lazy body is first read)."""
+        return type(self).__dict__["text_content"].is_loaded(self)
+    
+    def to_dict(self, include_text: bool = True) -> Dict[str, any]:
+        """Convert to dictionary for serialization (without the body if not ``include_text``)."""
+        data = {
             "identifier": self.identifier,
             "title": self.title,
             "bill_type": self.bill_type.value,
             "reference_number": self.reference_number,
-            "text_content": self.text_content,
             "pdf_path": self.pdf_path,
             "sponsor": self.sponsor,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
             "metadata": self.metadata
         }
+        if include_text:
+            data["text_content"] = self.text_content
+        return data
 
 
 @dataclass
@@ -0,0 +1,190 @@
+"""
+Quantized copies of the embedding matrix for cheap first-pass scoring.
+
+``int8`` stores each value as an unsigned byte with a per-dimension scale and
+offset (x ~= offset + scale * code), a quarter of the float32 size. ``float16``
+halves it. Rankings from either are close to exact, so callers score the
+quantized matrix and rescore a shortlist against the full-precision rows.
+
+BinaryCodes keeps only the sign of each value, packed eight per byte (1/32 of
+float32). Hamming distance between codes is a cheap, coarse proxy for angle,
+good for picking a few hundred candidates to rescore.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+QUANTIZATION_KINDS = ("int8", "float16")
+
+# Sidecar files written next to embeddings.npy in a store generation
+INT8_CODES_FILE = "embeddings.u8.npy"
+INT8_PARAMS_FILE = "quant_params.npy"
+BINARY_CODES_FILE = "embeddings.bits.npy"
+
+# Set bits in every 16-bit value, for Hamming distance over packed codes.
+# Looking up two bytes at a time halves the gathers of a per-byte table.
+_POPCOUNT16 = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+
+# Rows converted to float32 per block while scoring, to bound temporary memory
+_SCORE_BLOCK = 16384
+
+
+class QuantizedMatrix:
+    """Quantized embedding rows plus what is needed to score against them."""
+
+    def __init__(self, kind: str, codes: np.ndarray,
+                 scale: Optional[np.ndarray] = None, offset: Optional[np.ndarray] = None):
+        if kind not in QUANTIZATION_KINDS:
+            raise ValueError(f"unknown quantization {kind!r}, expected one of {QUANTIZATION_KINDS}")
+        self.kind = kind
+        self.codes = codes
+        self.scale = scale
+        self.offset = offset
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        extra = 0 if self.scale is None else self.scale.nbytes + self.offset.nbytes
+        return int(self.codes.nbytes) + extra
+
+    @classmethod
+    def from_float(cls, matrix: np.ndarray, kind: str, scale: Optional[np.ndarray] = None,
+                   offset: Optional[np.ndarray] = None) -> "QuantizedMatrix":
+        """Quantize a float matrix (read block by block if memory-mapped).
+
+        For int8, ``scale`` and ``offset`` reuse existing per-dimension
+        parameters (e.g. a store base's, so appended rows share its codes);
+        values outside that range are clipped.
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if kind == "float16":
+            return cls(kind, matrix.astype(np.float16))
+        if kind not in QUANTIZATION_KINDS:
+            raise ValueError(f"unknown quantization {kind!r}, expected one of {QUANTIZATION_KINDS}")
+
+        if len(matrix) == 0:
+            dim = matrix.shape[1] if matrix.ndim == 2 else 0
+            return cls(kind, np.empty((0, dim), dtype=np.uint8),
+                       np.ones(dim, dtype=np.float32), np.zeros(dim, dtype=np.float32))
+        if scale is None or offset is None:
+            offset = matrix.min(axis=0)
+            scale = (matrix.max(axis=0) - offset) / 255.0
+            scale[scale == 0] = 1.0
+        scale = np.asarray(scale, dtype=np.float32)
+        offset = np.asarray(offset, dtype=np.float32)
+        codes = np.rint((matrix - offset) / scale).clip(0, 255).astype(np.uint8)
+        return cls(kind, codes, scale, offset)
+
+    def extend(self, other: "QuantizedMatrix") -> "QuantizedMatrix":
+        """New matrix with ``other``'s rows after these (same kind and parameters)."""
+        if other.kind != self.kind:
+            raise ValueError(f"cannot extend {self.kind} codes with {other.kind} codes")
+        return QuantizedMatrix(self.kind, np.concatenate([self.codes, other.codes]), self.scale, self.offset)
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate dot products of ``query`` with all rows, or just ``rows``."""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.kind == "int8":
+            # q . (offset + scale * code) = q . offset + (q * scale) . code
+            weights = (query * self.scale).astype(np.float32)
+            bias = float(query @ self.offset)
+        else:
+            weights, bias = query.astype(np.float32), 0.0
+
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _SCORE_BLOCK):
+            block = codes[start:start + _SCORE_BLOCK].astype(np.float32)
+            out[start:start + len(block)] = block @ weights
+        return out + bias
+
+    def save(self, base: Path) -> None:
+        """Write the int8 sidecar files into a store generation directory."""
+        if self.kind != "int8":
+            raise ValueError("only int8 quantization is persisted")
+        np.save(base / INT8_CODES_FILE, self.codes)
+        np.save(base / INT8_PARAMS_FILE, np.stack([self.scale, self.offset]))
+
+    @classmethod
+    def load(cls, base: Path) -> Optional["QuantizedMatrix"]:
+        """Read the int8 sidecar from a generation directory, if it has one."""
+        codes_path = base / INT8_CODES_FILE
+        if not codes_path.is_file():
+            return None
+        params = np.load(base / INT8_PARAMS_FILE)
+        return cls("int8", np.load(codes_path), params[0], params[1])
+
+
+class BinaryCodes:
+    """Sign bits of the embedding rows, packed into uint8 rows.
+
+    Rows are zero-padded to an even number of bytes so they can be read as
+    uint16 words; the padding is identical in every code and never counts.
+    """
+
+    def __init__(self, bits: np.ndarray):
+        self.bits = bits
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    @staticmethod
+    def pack(matrix: np.ndarray) -> np.ndarray:
+        """Pack the sign bits (value > 0) of each row."""
+        bits = np.packbits(np.asarray(matrix) > 0, axis=-1)
+        if bits.shape[-1] % 2:
+            pad = [(0, 0)] * (bits.ndim - 1) + [(0, 1)]
+            bits = np.pad(bits, pad)
+        return np.ascontiguousarray(bits)
+
+    @classmethod
+    def from_float(cls, matrix: np.ndarray) -> "BinaryCodes":
+        return cls(cls.pack(matrix))
+
+    def hamming(self, query: np.ndarray) -> np.ndarray:
+        """Hamming distance from the query's sign bits to every row."""
+        query_words = self.pack(query).view(np.uint16)
+        words = self.bits.view(np.uint16)
+        out = np.empty(len(words), dtype=np.uint16)
+        for start in range(0, len(words), _SCORE_BLOCK):
+            block = words[start:start + _SCORE_BLOCK]
+            out[start:start + len(block)] = np.take(_POPCOUNT16, block ^ query_words).sum(axis=1, dtype=np.uint16)
+        return out
+
+    def candidates(self, query: np.ndarray, n: int, live: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sorted row ids of the ``n`` rows closest to ``query`` in Hamming distance.
+
+        Rows outside the ``live`` mask (deleted rows) are never returned.
+        """
+        distances = self.hamming(query)
+        rows = None
+        if live is not None:
+            rows = np.flatnonzero(live)
+            distances = distances[rows]
+        n = min(n, len(distances))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        chosen = np.argpartition(distances, n - 1)[:n].astype(np.int64)
+        if rows is not None:
+            chosen = rows[chosen]
+        chosen.sort()
+        return chosen
+
+    def extend(self, other: "BinaryCodes") -> "BinaryCodes":
+        """New code set with ``other``'s rows after these."""
+        return BinaryCodes(np.concatenate([self.bits, other.bits]))
+
+    def save(self, base: Path) -> None:
+        """Write the packed codes into a store generation directory."""
+        np.save(base / BINARY_CODES_FILE, self.bits)
+
+    @classmethod
+    def load(cls, base: Path) -> Optional["BinaryCodes"]:
+        """Read the packed codes from a generation directory, if it has them."""
+        path = base / BINARY_CODES_FILE
+        if not path.is_file():
+            return None
+        return cls(np.load(path))
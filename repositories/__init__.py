@@ -4,6 +4,8 @@ from .base import Repository
 from .bill_reference import BillReferenceRepository
 from .query_log import QueryLogRepository
 from .bill import BillRepository
+from .bill_catalog import BillCatalog, BillCatalogEntry
+from .sqlite_bill import SqliteBillRepository
 from .vector import VectorRepository
 
 __all__ = [
@@ -11,5 +13,8 @@ __all__ = [
     'BillReferenceRepository', 
     'QueryLogRepository',
     'BillRepository',
+    'BillCatalog',
+    'BillCatalogEntry',
+    'SqliteBillRepository',
     'VectorRepository'
 ]
\ No newline at end of file
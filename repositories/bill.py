@@ -1,23 +1,47 @@
-"""Repository for managing bills."""
+"""Repository for managing bills.
+
+Bills are stored as a text file, a metadata JSON pointing at it
+(``text_path``) and optionally a PDF. Listing and lookups go through the
+repository's catalog and its in-memory secondary indexes (see
+bill_catalog), so they only read the metadata of the bills they return,
+and a returned bill's text_content is only read from its text file when
+first used (see models.LazyText).
+
+Metadata files written before the text was split out still embed it. They
+are migrated (text file written if missing, text dropped from the JSON)
+when the catalog is rebuilt, which a catalog older than format 2 triggers,
+or by calling migrate_metadata().
+"""
 
 import json
+import os
 import asyncio
 from pathlib import Path
 from typing import List, Optional, Dict
 from datetime import datetime
 
+from bill_corpus import BillCorpus
+from logging_config import logger
 from models import Bill, BillType
 from .base import FileBasedRepository
+from .bill_catalog import CATALOG_FILE, BillCatalog, BillCatalogEntry
 
 
 class BillRepository(FileBasedRepository[Bill]):
     """Repository for managing bills and their content."""
     
-    def __init__(self, text_dir: Path, pdf_dir: Path, metadata_dir: Path):
-        """Initialize with directories for bill storage."""
+    def __init__(self, text_dir: Path, pdf_dir: Path, metadata_dir: Path,
+                 corpus: Optional[BillCorpus] = None):
+        """Initialize with directories for bill storage.
+
+        Bill texts are read through ``corpus`` (a cache of ``text_dir``, shared
+        with other readers); without one the repository keeps its own.
+        """
         self.text_dir = Path(text_dir)
         self.pdf_dir = Path(pdf_dir)
         self.metadata_dir = Path(metadata_dir)
+        self.corpus = corpus if corpus is not None else BillCorpus(self.text_dir)
+        self.catalog = BillCatalog(self.metadata_dir / CATALOG_FILE)
         
         # Create directories if they don't exist
         self.text_dir.mkdir(parents=True, exist_ok=True)
@@ -29,15 +53,25 @@ class BillRepository(FileBasedRepository[Bill]):
     async def save(self, entity: Bill) -> None:
         """Save a bill with all its components."""
         async with self._lock:
-            # Save text content
-            text_path = self.text_dir / f"{entity.filename_base}.txt"
+            await self._save_unlocked(entity)
+    
+    async def _save_unlocked(self, entity: Bill) -> None:
+        await self._ensure_catalog()
+        
+        # Save text content (a body never loaded is still what's on disk)
+        text_path = self.text_dir / f"{entity.filename_base}.txt"
+        if entity.text_loaded or not text_path.exists():
             await self._save_text(text_path, entity.text_content)
-            
-            # Save metadata
-            metadata_path = self.metadata_dir / f"{entity.filename_base}.json"
-            metadata = entity.to_dict()
-            metadata["text_path"] = str(text_path)
-            await self._save_json(metadata_path, metadata)
+        
+        # Save metadata, which points at the text instead of repeating it
+        metadata_path = self.metadata_dir / f"{entity.filename_base}.json"
+        metadata = entity.to_dict(include_text=False)
+        metadata["text_path"] = str(text_path)
+        await self._save_json(metadata_path, metadata)
+        
+        # The catalog row is written last, once the files it points at exist
+        entry = BillCatalogEntry.from_bill(entity, text_path, metadata_path)
+        await self._run(self.catalog.upsert, entry)
     
     async def save_pdf(self, bill_identifier: str, pdf_content: bytes) -> str:
         """Save PDF content for a bill."""
@@ -50,14 +84,19 @@ class BillRepository(FileBasedRepository[Bill]):
             if bill:
                 bill.pdf_path = str(pdf_path)
                 bill.updated_at = datetime.now()
-                await self.save(bill)
+                await self._save_unlocked(bill)
             
             return str(pdf_path)
     
     async def find_by_id(self, entity_id: str) -> Optional[Bill]:
         """Find a bill by its identifier."""
-        metadata_path = self.metadata_dir / f"{entity_id}.json"
+        await self._ensure_catalog()
+        entry = self.catalog.get(entity_id)
+        if entry is not None:
+            return await self._load_entry(entry)
         
+        # Not catalogued: bill files named after the identifier
+        metadata_path = self.metadata_dir / f"{entity_id}.json"
         if metadata_path.exists():
             metadata = await self._load_json(metadata_path)
             return self._dict_to_bill(metadata)
@@ -65,93 +104,235 @@ class BillRepository(FileBasedRepository[Bill]):
         # Try legacy format (just text file)
         text_path = self.text_dir / f"{entity_id}.txt"
         if text_path.exists():
-            text_content = await self._load_text(text_path)
-            
-            # Parse bill type and number from identifier
-            parts = entity_id.split('-')
-            if len(parts) >= 2:
-                try:
-                    bill_type = BillType.from_string(parts[0])
-                    reference_number = int(parts[1])
-                    
-                    return Bill(
-                        identifier=entity_id,
-                        title=f"Legacy Bill {entity_id}",
-                        bill_type=bill_type,
-                        reference_number=reference_number,
-                        text_content=text_content,
-                        created_at=datetime.now(),
-                        updated_at=datetime.now()
-                    )
-                except (ValueError, IndexError):
-                    pass
+            return self._legacy_bill(entity_id, self._text_loader(text_path))
         
         return None
     
     async def find_all(self) -> List[Bill]:
         """Find all bills."""
+        await self._ensure_catalog()
         bills = []
-        
-        # Load from metadata files
-        for metadata_file in self.metadata_dir.glob("*.json"):
-            metadata = await self._load_json(metadata_file)
-            bills.append(self._dict_to_bill(metadata))
-        
-        # Check for legacy text files without metadata
-        for text_file in self.text_dir.glob("*.txt"):
-            identifier = text_file.stem
-            metadata_path = self.metadata_dir / f"{identifier}.json"
-            
-            if not metadata_path.exists():
-                # Try to load as legacy bill
-                bill = await self.find_by_id(identifier)
-                if bill:
-                    bills.append(bill)
-        
+        for entry in self.catalog.entries():
+            bill = await self._load_entry(entry)
+            if bill:
+                bills.append(bill)
         return bills
     
+    async def list_entries(self) -> List[BillCatalogEntry]:
+        """Catalog rows of every bill, by identifier; no bill files are read."""
+        await self._ensure_catalog()
+        return self.catalog.entries()
+    
     async def find_by_type(self, bill_type: BillType) -> List[Bill]:
         """Find all bills of a specific type."""
-        all_bills = await self.find_all()
-        return [b for b in all_bills if b.bill_type == bill_type]
+        await self._ensure_catalog()
+        return await self._load_entries(self.catalog.by_type(bill_type.value))
     
     async def find_by_title_contains(self, search_term: str) -> List[Bill]:
         """Find bills whose title contains the search term."""
-        all_bills = await self.find_all()
-        search_lower = search_term.lower()
-        return [b for b in all_bills if search_lower in b.title.lower()]
+        await self._ensure_catalog()
+        return await self._load_entries(self.catalog.title_contains(search_term))
+    
+    async def find_by_sponsor(self, sponsor: str) -> List[Bill]:
+        """Find bills whose sponsor contains ``sponsor`` (case-insensitive)."""
+        await self._ensure_catalog()
+        return await self._load_entries(self.catalog.by_sponsor(sponsor))
+    
+    async def find_by_reference_range(self, low: Optional[int] = None, high: Optional[int] = None,
+                                      bill_type: Optional[BillType] = None) -> List[Bill]:
+        """Find bills numbered low..high (inclusive, either bound optional), by number.
+        
+        Args:
+            low: Smallest reference number
+            high: Largest reference number
+            bill_type: Only bills of this type
+        """
+        await self._ensure_catalog()
+        entries = self.catalog.by_reference_range(low, high)
+        if bill_type is not None:
+            entries = [e for e in entries if e.bill_type == bill_type.value]
+        return await self._load_entries(entries)
+    
+    async def load_text(self, bill: Bill) -> str:
+        """A bill's text, reading it in the executor if it isn't loaded yet."""
+        if bill.text_loaded:
+            return bill.text_content
+        return await self._run(lambda: bill.text_content)
+    
+    async def migrate_metadata(self) -> int:
+        """Move text still embedded in metadata files out to the bills' text files.
+        
+        Returns:
+            Number of metadata files rewritten
+        """
+        async with self._lock:
+            return await self._run(self._migrate_all_sync)
+    
+    async def rebuild_catalog(self) -> int:
+        """Re-derive the catalog from the bill files (e.g. after copying bills in by hand).
+        
+        Returns:
+            Number of bills catalogued
+        """
+        async with self._lock:
+            entries = await self._run(self._scan_entries_sync)
+            await self._run(self.catalog.replace_all, entries)
+            return len(entries)
     
     async def delete(self, entity_id: str) -> bool:
         """Delete a bill and all its files."""
         async with self._lock:
+            await self._ensure_catalog()
+            entry = self.catalog.get(entity_id)
             deleted = False
             
-            # Delete text file
-            text_path = self.text_dir / f"{entity_id}.txt"
-            if text_path.exists():
-                text_path.unlink()
-                deleted = True
+            # Delete text, PDF and metadata files, wherever the catalog says they are
+            paths = [
+                self.text_dir / f"{entity_id}.txt",
+                self.pdf_dir / f"{entity_id}.pdf",
+                self.metadata_dir / f"{entity_id}.json",
+            ]
+            if entry is not None:
+                paths += [Path(path) for path in (entry.text_path, entry.pdf_path, entry.metadata_path) if path]
+            for path in paths:
+                if path.exists():
+                    path.unlink()
+                    deleted = True
+                if path.parent == self.text_dir:
+                    self.corpus.discard(path.name)
             
-            # Delete PDF file
-            pdf_path = self.pdf_dir / f"{entity_id}.pdf"
-            if pdf_path.exists():
-                pdf_path.unlink()
+            if await self._run(self.catalog.remove, entity_id):
                 deleted = True
-            
-            # Delete metadata file
-            metadata_path = self.metadata_dir / f"{entity_id}.json"
-            if metadata_path.exists():
-                metadata_path.unlink()
-                deleted = True
-            
             return deleted
     
     async def exists(self, entity_id: str) -> bool:
         """Check if a bill exists."""
+        await self._ensure_catalog()
+        if self.catalog.get(entity_id) is not None:
+            return True
         metadata_path = self.metadata_dir / f"{entity_id}.json"
         text_path = self.text_dir / f"{entity_id}.txt"
         return metadata_path.exists() or text_path.exists()
     
+    async def _ensure_catalog(self) -> None:
+        """Load the catalog on first use, rebuilding it from the bill files if there is none."""
+        if not self.catalog.loaded and not await self._run(self.catalog.load):
+            entries = await self._run(self._scan_entries_sync)
+            await self._run(self.catalog.replace_all, entries)
+    
+    def _scan_entries_sync(self) -> List[BillCatalogEntry]:
+        """Catalog rows for every metadata file, and for text files without one (legacy bills)."""
+        entries = {}
+        described = set()
+        for metadata_path in self.metadata_dir.glob("*.json"):
+            if metadata_path.name == CATALOG_FILE:
+                continue
+            try:
+                data = self._load_json_sync(metadata_path)
+                if "text_content" in data:
+                    data = self._migrate_metadata_sync(metadata_path, data)
+                bill = self._dict_to_bill(data)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable bill metadata {metadata_path}: {e}")
+                continue
+            text_path = Path(data["text_path"]) if data.get("text_path") else None
+            entries[bill.identifier] = BillCatalogEntry.from_bill(bill, text_path, metadata_path)
+            described.add(metadata_path.stem)
+        
+        for name in self.corpus.scan():
+            identifier = name[:-4]
+            if not name.endswith(".txt") or identifier in described or identifier in entries:
+                continue
+            text_path = self.text_dir / name
+            bill = self._legacy_bill(identifier, "")
+            if bill:
+                modified = datetime.fromtimestamp(text_path.stat().st_mtime)
+                bill.created_at = bill.updated_at = modified
+                entries[identifier] = BillCatalogEntry.from_bill(bill, text_path, None)
+        return list(entries.values())
+    
+    def _migrate_all_sync(self) -> int:
+        migrated = 0
+        for metadata_path in self.metadata_dir.glob("*.json"):
+            if metadata_path.name == CATALOG_FILE:
+                continue
+            data = self._load_json_sync(metadata_path)
+            if "text_content" in data:
+                self._migrate_metadata_sync(metadata_path, data)
+                migrated += 1
+        return migrated
+    
+    def _migrate_metadata_sync(self, metadata_path: Path, data: dict) -> dict:
+        """Rewrite an old metadata file that embeds the bill text so it only points at it."""
+        text_path = self._text_path(data)
+        if not text_path.exists():
+            self._save_text_sync(text_path, data["text_content"] or "")
+        migrated = {key: value for key, value in data.items() if key != "text_content"}
+        migrated["text_path"] = str(text_path)
+        tmp_path = metadata_path.with_name(metadata_path.name + ".tmp")
+        self._save_json_sync(tmp_path, migrated)
+        os.replace(tmp_path, metadata_path)
+        logger.info(f"Moved the text of {metadata_path.name} out of its metadata into {text_path}")
+        return migrated
+    
+    def _text_path(self, data: dict) -> Path:
+        """Text file of a bill's metadata: its ``text_path``, else where save() puts it."""
+        if data.get("text_path"):
+            return Path(data["text_path"])
+        return self.text_dir / f"{BillType.from_string(data['bill_type']).value}{data['reference_number']}.txt"
+    
+    def _text_loader(self, path: Path):
+        return lambda: self._load_text_sync(path)
+    
+    async def _load_entries(self, entries: List[BillCatalogEntry]) -> List[Bill]:
+        bills = []
+        for entry in entries:
+            bill = await self._load_entry(entry)
+            if bill:
+                bills.append(bill)
+        return bills
+    
+    async def _load_entry(self, entry: BillCatalogEntry) -> Optional[Bill]:
+        """The full bill behind a catalog row (None if its files are gone)."""
+        try:
+            if entry.metadata_path:
+                return self._dict_to_bill(await self._load_json(Path(entry.metadata_path)))
+            if entry.text_path:
+                bill = self._legacy_bill(entry.identifier, self._text_loader(Path(entry.text_path)))
+                if bill:
+                    bill.created_at, bill.updated_at = entry.created, entry.updated
+                return bill
+        except FileNotFoundError:
+            logger.warning(f"Files of catalogued bill {entry.identifier} are missing")
+        return None
+    
+    def _legacy_bill(self, entity_id: str, text_content) -> Optional[Bill]:
+        """Bill for a text file named like ``hr-123`` that has no metadata."""
+        # Parse bill type and number from identifier
+        parts = entity_id.split('-')
+        if len(parts) >= 2:
+            try:
+                bill_type = BillType.from_string(parts[0])
+                reference_number = int(parts[1])
+                
+                return Bill(
+                    identifier=entity_id,
+                    title=f"Legacy Bill {entity_id}",
+                    bill_type=bill_type,
+                    reference_number=reference_number,
+                    text_content=text_content,
+                    created_at=datetime.now(),
+                    updated_at=datetime.now()
+                )
+            except (ValueError, IndexError):
+                pass
+        return None
+    
+    async def _run(self, func, *args):
+        """Run blocking file work in the executor."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, func, *args)
+    
     async def _save_text(self, path: Path, content: str) -> None:
         """Save text content to file."""
         loop = asyncio.get_event_loop()
@@ -161,6 +342,8 @@ class BillRepository(FileBasedRepository[Bill]):
         """Synchronously save text to file."""
         with open(path, 'w', encoding='utf-8') as f:
             f.write(content)
+        if path.parent == self.text_dir:
+            self.corpus.put(path.name, content)
     
     async def _load_text(self, path: Path) -> str:
         """Load text content from file."""
@@ -168,7 +351,12 @@ class BillRepository(FileBasedRepository[Bill]):
         return await loop.run_in_executor(None, self._load_text_sync, path)
     
     def _load_text_sync(self, path: Path) -> str:
-        """Synchronously load text from file."""
+        """Synchronously load text from file (bill texts via the corpus cache)."""
+        if path.parent == self.text_dir:
+            text = self.corpus.read(path.name)
+            if text is None:
+                raise FileNotFoundError(path)
+            return text
         with open(path, 'r', encoding='utf-8') as f:
             return f.read()
     
@@ -209,7 +397,7 @@ class BillRepository(FileBasedRepository[Bill]):
             title=data["title"],
             bill_type=BillType.from_string(data["bill_type"]),
             reference_number=data["reference_number"],
-            text_content=data["text_content"],
+            text_content=data["text_content"] if "text_content" in data else self._text_loader(self._text_path(data)),
             pdf_path=data.get("pdf_path"),
             sponsor=data.get("sponsor"),
             created_at=datetime.fromisoformat(data["created_at"]),
@@ -0,0 +1,294 @@
+"""
+Compact catalog of the bills stored by BillRepository.
+
+Listing bills by reading their metadata JSON opens a file per bill (and
+files from before format 2 also carry the full text). The catalog keeps one
+small row per bill instead (identifier, title, type, number, sponsor, file
+paths, timestamps) in a single file next to the metadata:
+
+    billmeta/catalog.json    {"format_version": 2, "bills": [row, ...]}
+
+The rows are held in memory. Every change is written by replacing the file
+atomically (temporary file + os.replace), and the in-memory rows are only
+updated once that write has succeeded, so a failed write leaves both as they
+were. A missing, unreadable or older-format catalog is rebuilt once from the
+metadata files and legacy text files.
+
+Alongside the rows the catalog keeps secondary indexes, maintained with
+every change: bill type -> identifiers, normalized sponsor -> identifiers,
+(reference number, identifier) pairs in sorted order, and title word ->
+identifiers with the title words sorted forwards and reversed. A title
+fragment is looked up through its words: inner ones are whole title words,
+the first must end one (a bisect over the reversed words) and the last must
+start one (a bisect over the sorted words). The bills of the rarest of
+those words are then checked against the fragment. Only a fragment inside
+a single word falls back to a scan of the title vocabulary, never of the
+bills.
+"""
+
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from logging_config import logger
+from models import Bill, BillType
+
+CATALOG_FILE = "catalog.json"
+CATALOG_FORMAT_VERSION = 2  # 2: metadata files no longer embed the bill text
+
+_TITLE_WORD = re.compile(r"[^\W_]+")
+
+
+def title_words(title: str) -> List[str]:
+    """Lower-cased word tokens of a title, in order."""
+    return _TITLE_WORD.findall(title.lower())
+
+
+def normalize_sponsor(sponsor: str) -> str:
+    return " ".join(sponsor.split()).casefold()
+
+
+@dataclass(frozen=True)
+class BillCatalogEntry:
+    """Everything about a bill except its text."""
+    identifier: str
+    title: str
+    bill_type: str  # BillType value
+    reference_number: int
+    sponsor: Optional[str]
+    text_path: Optional[str]
+    pdf_path: Optional[str]
+    metadata_path: Optional[str]  # None for legacy bills stored as a text file only
+    created_at: str  # ISO timestamps, as in the metadata files
+    updated_at: str
+
+    @classmethod
+    def from_bill(cls, bill: Bill, text_path: Optional[Path], metadata_path: Optional[Path]) -> "BillCatalogEntry":
+        return cls(
+            identifier=bill.identifier,
+            title=bill.title,
+            bill_type=bill.bill_type.value,
+            reference_number=bill.reference_number,
+            sponsor=bill.sponsor,
+            text_path=str(text_path) if text_path else None,
+            pdf_path=bill.pdf_path,
+            metadata_path=str(metadata_path) if metadata_path else None,
+            created_at=bill.created_at.isoformat(),
+            updated_at=bill.updated_at.isoformat(),
+        )
+
+    @property
+    def type(self) -> BillType:
+        return BillType.from_string(self.bill_type)
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromisoformat(self.created_at)
+
+    @property
+    def updated(self) -> datetime:
+        return datetime.fromisoformat(self.updated_at)
+
+
+class BillCatalog:
+    """The in-memory rows of catalog.json, changed only together with the file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, BillCatalogEntry]] = None
+        self._lock = threading.RLock()
+        self._by_type: Dict[str, Set[str]] = {}
+        self._by_sponsor: Dict[str, Set[str]] = {}
+        self._by_reference: List[Tuple[int, str]] = []  # sorted
+        self._by_title_word: Dict[str, Set[str]] = {}
+        self._title_words: List[str] = []  # sorted
+        self._reversed_title_words: List[str] = []  # each word reversed, sorted
+
+    @property
+    def loaded(self) -> bool:
+        return self._entries is not None
+
+    def load(self) -> bool:
+        """Read the catalog file; False if it is missing or unreadable (rebuild it then)."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format_version") != CATALOG_FORMAT_VERSION:
+                raise ValueError(f"unsupported catalog format {data.get('format_version')!r}")
+            entries = {row["identifier"]: BillCatalogEntry(**row) for row in data["bills"]}
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Rebuilding bill catalog {self.path}: {e}")
+            return False
+        with self._lock:
+            self._set_entries(entries)
+        return True
+
+    def replace_all(self, entries: Iterable[BillCatalogEntry]) -> None:
+        """Write a catalog holding exactly ``entries``."""
+        new = {entry.identifier: entry for entry in entries}
+        with self._lock:
+            self._write(new)
+            self._set_entries(new)
+
+    def upsert(self, entry: BillCatalogEntry) -> None:
+        """Add or replace the row of ``entry.identifier``."""
+        with self._lock:
+            new = dict(self._require())
+            previous = new.get(entry.identifier)
+            new[entry.identifier] = entry
+            self._write(new)
+            self._entries = new
+            if previous is not None:
+                self._unindex(previous)
+            self._index(entry)
+
+    def remove(self, identifier: str) -> bool:
+        """Drop the row of ``identifier``; False if there was none."""
+        with self._lock:
+            if identifier not in self._require():
+                return False
+            new = dict(self._entries)
+            removed = new.pop(identifier)
+            self._write(new)
+            self._entries = new
+            self._unindex(removed)
+            return True
+
+    def get(self, identifier: str) -> Optional[BillCatalogEntry]:
+        return self._require().get(identifier)
+
+    def entries(self) -> List[BillCatalogEntry]:
+        """All rows, by identifier."""
+        entries = self._require()
+        return [entries[identifier] for identifier in sorted(entries)]
+
+    def by_type(self, bill_type: str) -> List[BillCatalogEntry]:
+        """Rows of one bill type (a BillType value), by identifier."""
+        with self._lock:
+            return self._rows(self._by_type.get(bill_type, ()))
+
+    def by_sponsor(self, sponsor: str) -> List[BillCatalogEntry]:
+        """Rows whose sponsor contains ``sponsor`` (case- and spacing-insensitive), by identifier."""
+        wanted = normalize_sponsor(sponsor)
+        with self._lock:
+            ids = self._by_sponsor.get(wanted)
+            if ids is None:
+                # Partial names: scan the distinct sponsors, not the bills
+                ids = set().union(*(ids for name, ids in self._by_sponsor.items() if wanted in name))
+            return self._rows(ids)
+
+    def by_reference_range(self, low: Optional[int] = None, high: Optional[int] = None) -> List[BillCatalogEntry]:
+        """Rows with low <= reference_number <= high (either bound optional), by number."""
+        with self._lock:
+            self._require()
+            start = 0 if low is None else bisect_left(self._by_reference, (low, ""))
+            end = len(self._by_reference) if high is None else bisect_left(self._by_reference, (high + 1, ""))
+            return [self._entries[identifier] for _, identifier in self._by_reference[start:end]]
+
+    def title_contains(self, fragment: str) -> List[BillCatalogEntry]:
+        """Rows whose title contains ``fragment`` (case-insensitive), by identifier."""
+        needle = fragment.lower()
+        words = title_words(needle)
+        with self._lock:
+            if not words:
+                ids = set(self._require())
+            else:
+                # A word of the fragment is a whole title word where the fragment
+                # bounds it, otherwise a prefix, a suffix or any part of one. The
+                # title words each could be are cheap to find; only the rarest
+                # word's bills are collected, and the title check does the rest.
+                choices = []
+                for i, word in enumerate(words):
+                    starts = i > 0 or not needle.startswith(word)
+                    ends = i < len(words) - 1 or not needle.endswith(word)
+                    if starts and ends:
+                        choices.append([word] if word in self._by_title_word else [])
+                    elif starts:
+                        choices.append(_with_prefix(self._title_words, word))
+                    elif ends:
+                        choices.append([w[::-1] for w in _with_prefix(self._reversed_title_words, word[::-1])])
+                    else:
+                        choices.append([title_word for title_word in self._title_words if word in title_word])
+                rarest = min(choices, key=lambda matched: sum(len(self._by_title_word[w]) for w in matched))
+                ids = set().union(*(self._by_title_word[w] for w in rarest))
+            return [entry for entry in self._rows(ids) if needle in entry.title.lower()]
+
+    def _rows(self, ids: Iterable[str]) -> List[BillCatalogEntry]:
+        entries = self._require()
+        return [entries[identifier] for identifier in sorted(ids)]
+
+    def _set_entries(self, entries: Dict[str, BillCatalogEntry]) -> None:
+        self._entries = entries
+        self._by_type, self._by_sponsor, self._by_title_word = {}, {}, {}
+        self._by_reference, self._title_words, self._reversed_title_words = [], [], []
+        for entry in entries.values():
+            self._index(entry)
+
+    def _index(self, entry: BillCatalogEntry) -> None:
+        self._by_type.setdefault(entry.bill_type, set()).add(entry.identifier)
+        if entry.sponsor:
+            self._by_sponsor.setdefault(normalize_sponsor(entry.sponsor), set()).add(entry.identifier)
+        insort(self._by_reference, (entry.reference_number, entry.identifier))
+        for word in set(title_words(entry.title)):
+            if word not in self._by_title_word:
+                self._by_title_word[word] = set()
+                insort(self._title_words, word)
+                insort(self._reversed_title_words, word[::-1])
+            self._by_title_word[word].add(entry.identifier)
+
+    def _unindex(self, entry: BillCatalogEntry) -> None:
+        _discard(self._by_type, entry.bill_type, entry.identifier)
+        if entry.sponsor:
+            _discard(self._by_sponsor, normalize_sponsor(entry.sponsor), entry.identifier)
+        del self._by_reference[bisect_left(self._by_reference, (entry.reference_number, entry.identifier))]
+        for word in set(title_words(entry.title)):
+            if _discard(self._by_title_word, word, entry.identifier):
+                del self._title_words[bisect_left(self._title_words, word)]
+                del self._reversed_title_words[bisect_left(self._reversed_title_words, word[::-1])]
+
+    def _require(self) -> Dict[str, BillCatalogEntry]:
+        if self._entries is None:
+            raise RuntimeError("bill catalog used before it was loaded")
+        return self._entries
+
+    def _write(self, entries: Dict[str, BillCatalogEntry]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": CATALOG_FORMAT_VERSION,
+                "bills": [asdict(entries[identifier]) for identifier in sorted(entries)],
+            }, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def _with_prefix(words: List[str], prefix: str) -> List[str]:
+    """The entries of sorted ``words`` that start with ``prefix``."""
+    matched = []
+    for i in range(bisect_left(words, prefix), len(words)):
+        if not words[i].startswith(prefix):
+            break
+        matched.append(words[i])
+    return matched
+
+
+def _discard(index: Dict[str, Set[str]], key: str, identifier: str) -> bool:
+    """Remove ``identifier`` under ``key``; True if that emptied (and dropped) the key."""
+    ids = index.get(key)
+    if ids is None:
+        return False
+    ids.discard(identifier)
+    if ids:
+        return False
+    del index[key]
+    return True
@@ -0,0 +1,305 @@
+"""SQLite-backed repository for bills.
+
+An alternative to the file-per-bill BillRepository with the same interface
+and queries. Everything lives in one database file:
+
+    bills       one row per bill (text included), indexed by type + number,
+                number and sponsor
+    bills_fts   FTS5 index over title and text (porter stemming), kept in
+                step with ``bills`` by triggers
+
+The database runs in WAL mode, so readers never block the writer or each
+other. All writes go through one connection on a single-thread executor,
+each in its own BEGIN IMMEDIATE transaction. Reads borrow a connection from
+a small pool and run in the default executor, like the file repositories'
+I/O.
+
+Bills are returned without their text; text_content is loaded on first
+access (see models.LazyText). import_from() copies the bills of another
+repository (e.g. the existing txt/json directories) in one transaction.
+"""
+
+import asyncio
+import json
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from logging_config import logger
+from models import Bill, BillType
+from .base import Repository
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bills (
+    identifier TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    bill_type TEXT NOT NULL,
+    reference_number INTEGER NOT NULL,
+    sponsor TEXT,
+    pdf_path TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    text_content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bills_type_number ON bills (bill_type, reference_number);
+CREATE INDEX IF NOT EXISTS bills_number ON bills (reference_number);
+CREATE INDEX IF NOT EXISTS bills_sponsor ON bills (sponsor COLLATE NOCASE);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS bills_fts USING fts5 (
+    title, text_content, content='bills', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS bills_ai AFTER INSERT ON bills BEGIN
+    INSERT INTO bills_fts (rowid, title, text_content) VALUES (new.rowid, new.title, new.text_content);
+END;
+CREATE TRIGGER IF NOT EXISTS bills_ad AFTER DELETE ON bills BEGIN
+    INSERT INTO bills_fts (bills_fts, rowid, title, text_content)
+    VALUES ('delete', old.rowid, old.title, old.text_content);
+END;
+CREATE TRIGGER IF NOT EXISTS bills_au AFTER UPDATE ON bills BEGIN
+    INSERT INTO bills_fts (bills_fts, rowid, title, text_content)
+    VALUES ('delete', old.rowid, old.title, old.text_content);
+    INSERT INTO bills_fts (rowid, title, text_content) VALUES (new.rowid, new.title, new.text_content);
+END;
+"""
+
+# Every column but the text
+_COLUMNS = "identifier, title, bill_type, reference_number, sponsor, pdf_path, created_at, updated_at, metadata"
+_SELECT = "SELECT " + ", ".join(f"bills.{column.strip()}" for column in _COLUMNS.split(",")) + " FROM bills"
+
+_UPSERT = f"""
+INSERT INTO bills ({_COLUMNS}, text_content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (identifier) DO UPDATE SET
+    title = excluded.title, bill_type = excluded.bill_type, reference_number = excluded.reference_number,
+    sponsor = excluded.sponsor, pdf_path = excluded.pdf_path, created_at = excluded.created_at,
+    updated_at = excluded.updated_at, metadata = excluded.metadata, text_content = excluded.text_content
+"""
+
+T = TypeVar("T")
+
+
+class SqliteBillRepository(Repository[Bill]):
+    """Repository for bills stored in a SQLite database with full-text search."""
+
+    def __init__(self, db_path: Path, pdf_dir: Path, readers: int = 4):
+        """Open (creating if needed) the database.
+
+        Args:
+            db_path: SQLite database file
+            pdf_dir: Directory PDFs are saved to (they stay files)
+            readers: Size of the read connection pool
+        """
+        self.db_path = Path(db_path)
+        self.pdf_dir = Path(pdf_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pdf_dir.mkdir(parents=True, exist_ok=True)
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = NORMAL")
+        if self._writer.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._writer.executescript(_SCHEMA)
+            self._writer.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bill-db-writer")
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, readers)):
+            reader = self._connect()
+            reader.execute("PRAGMA query_only = ON")
+            self._readers.put(reader)
+        self._reader_count = max(1, readers)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; writes open their own transactions
+        connection = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA busy_timeout = 5000")
+        return connection
+
+    def close(self) -> None:
+        """Close every connection; the repository can't be used afterwards."""
+        self._write_executor.shutdown(wait=True)
+        self._writer.close()
+        for _ in range(self._reader_count):
+            self._readers.get().close()
+
+    async def save(self, entity: Bill) -> None:
+        """Save (insert or replace) a bill."""
+        await self.save_many([entity])
+
+    async def save_many(self, entities: Sequence[Bill]) -> None:
+        """Save several bills in one transaction."""
+        # Lazy bodies are read here, so off the event loop
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, lambda: [self._bill_to_row(entity) for entity in entities])
+        await self._write(lambda connection: connection.executemany(_UPSERT, rows))
+
+    async def save_pdf(self, bill_identifier: str, pdf_content: bytes) -> str:
+        """Save PDF content for a bill and record its path."""
+        pdf_path = self.pdf_dir / f"{bill_identifier}.pdf"
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, pdf_path.write_bytes, pdf_content)
+        await self._write(lambda connection: connection.execute(
+            "UPDATE bills SET pdf_path = ?, updated_at = ? WHERE identifier = ?",
+            (str(pdf_path), datetime.now().isoformat(), bill_identifier),
+        ))
+        return str(pdf_path)
+
+    async def find_by_id(self, entity_id: str) -> Optional[Bill]:
+        """Find a bill by its identifier."""
+        bills = await self._select("WHERE identifier = ?", (entity_id,))
+        return bills[0] if bills else None
+
+    async def find_all(self) -> List[Bill]:
+        """Find all bills."""
+        return await self._select("ORDER BY identifier")
+
+    async def find_by_type(self, bill_type: BillType) -> List[Bill]:
+        """Find all bills of a specific type."""
+        return await self._select("WHERE bill_type = ? ORDER BY reference_number", (bill_type.value,))
+
+    async def find_by_title_contains(self, search_term: str) -> List[Bill]:
+        """Find bills whose title contains the search term (case-insensitive)."""
+        pattern = "%" + search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return await self._select("WHERE title LIKE ? ESCAPE '\\' ORDER BY identifier", (pattern,))
+
+    async def find_by_sponsor(self, sponsor: str) -> List[Bill]:
+        """Find bills whose sponsor contains ``sponsor`` (case-insensitive)."""
+        wanted = " ".join(sponsor.split())
+        return await self._select("WHERE instr(lower(sponsor), lower(?)) > 0 ORDER BY identifier", (wanted,))
+
+    async def find_by_reference_range(self, low: Optional[int] = None, high: Optional[int] = None,
+                                      bill_type: Optional[BillType] = None) -> List[Bill]:
+        """Find bills numbered low..high (inclusive, either bound optional), by number."""
+        conditions, parameters = [], []
+        if low is not None:
+            conditions.append("reference_number >= ?")
+            parameters.append(low)
+        if high is not None:
+            conditions.append("reference_number <= ?")
+            parameters.append(high)
+        if bill_type is not None:
+            conditions.append("bill_type = ?")
+            parameters.append(bill_type.value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return await self._select(f"{where}ORDER BY reference_number, identifier", parameters)
+
+    async def search_text(self, query: str, limit: int = 20) -> List[Bill]:
+        """Bills matching an FTS5 query over title and text, best (BM25) first.
+
+        The query uses FTS5 syntax: words, "quoted phrases", AND/OR/NOT,
+        parentheses and prefix* terms.
+
+        Raises:
+            ValueError: For a malformed query
+        """
+        try:
+            return await self._select(
+                "JOIN bills_fts ON bills_fts.rowid = bills.rowid WHERE bills_fts MATCH ? ORDER BY bills_fts.rank LIMIT ?",
+                (query, limit),
+            )
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"invalid search query {query!r}: {e}") from e
+
+    async def load_text(self, bill: Bill) -> str:
+        """A bill's text, reading it in the executor if it isn't loaded yet."""
+        if bill.text_loaded:
+            return bill.text_content
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, lambda: bill.text_content)
+
+    async def delete(self, entity_id: str) -> bool:
+        """Delete a bill and its PDF."""
+        bill = await self.find_by_id(entity_id)
+        deleted = await self._write(
+            lambda connection: connection.execute("DELETE FROM bills WHERE identifier = ?", (entity_id,)).rowcount
+        )
+        pdf_path = Path(bill.pdf_path) if bill and bill.pdf_path else self.pdf_dir / f"{entity_id}.pdf"
+        if pdf_path.exists():
+            pdf_path.unlink()
+            deleted = True
+        return bool(deleted)
+
+    async def exists(self, entity_id: str) -> bool:
+        """Check if a bill exists."""
+        return await self._read(lambda connection: connection.execute(
+            "SELECT 1 FROM bills WHERE identifier = ?", (entity_id,)
+        ).fetchone() is not None)
+
+    async def count(self) -> int:
+        """Number of bills stored."""
+        return await self._read(lambda connection: connection.execute("SELECT count(*) FROM bills").fetchone()[0])
+
+    async def import_from(self, source: Repository[Bill]) -> int:
+        """Copy every bill of ``source`` (e.g. a BillRepository) in one transaction.
+
+        Returns:
+            Number of bills imported
+        """
+        bills = await source.find_all()
+        await self.save_many(bills)
+        logger.info(f"Imported {len(bills)} bills into {self.db_path}")
+        return len(bills)
+
+    async def _select(self, clause: str, parameters: Sequence = ()) -> List[Bill]:
+        rows = await self._read(
+            lambda connection: connection.execute(f"{_SELECT} {clause}", parameters).fetchall()
+        )
+        return [self._row_to_bill(row) for row in rows]
+
+    async def _read(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._read_sync, work)
+
+    def _read_sync(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        connection = self._readers.get()
+        try:
+            return work(connection)
+        finally:
+            self._readers.put(connection)
+
+    async def _write(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._write_executor, self._write_sync, work)
+
+    def _write_sync(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(self._writer)
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+        self._writer.execute("COMMIT")
+        return result
+
+    def _load_text_sync(self, identifier: str) -> str:
+        row = self._read_sync(lambda connection: connection.execute(
+            "SELECT text_content FROM bills WHERE identifier = ?", (identifier,)
+        ).fetchone())
+        return row[0] if row else ""
+
+    def _bill_to_row(self, bill: Bill) -> tuple:
+        return (
+            bill.identifier, bill.title, bill.bill_type.value, bill.reference_number, bill.sponsor,
+            bill.pdf_path, bill.created_at.isoformat(), bill.updated_at.isoformat(),
+            json.dumps(bill.metadata), bill.text_content,
+        )
+
+    def _row_to_bill(self, row: tuple) -> Bill:
+        identifier, title, bill_type, reference_number, sponsor, pdf_path, created_at, updated_at, metadata = row
+        return Bill(
+            identifier=identifier,
+            title=title,
+            bill_type=BillType.from_string(bill_type),
+            reference_number=reference_number,
+            text_content=lambda: self._load_text_sync(identifier),
+            pdf_path=pdf_path,
+            sponsor=sponsor,
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+            metadata=json.loads(metadata),
+        )
@@ -1,267 +1,230 @@
 """Repository for managing vector embeddings."""
 
-import pickle
-import json
 import asyncio
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
 import numpy as np
 
+from exceptions import VectorStoreError
 from models import VectorEmbedding
+from vector_index import IndexSnapshot, VectorIndex
+from logging_config import logger
+from vector_store import (
+    DEFAULT_MAX_DEAD_FRACTION,
+    DEFAULT_MAX_SEGMENTS,
+    append_to_store,
+    compact_store_if_needed,
+    delete_rows,
+)
 from .base import FileBasedRepository
 
+# Row keys owned by the repository; anything else in a row is entity metadata
+_ROW_KEYS = ("source", "created_at", "metadata")
+
+# Times a delete re-reads its rows when the store's generation moved under it
+_DELETE_ATTEMPTS = 3
+
 
 class VectorRepository(FileBasedRepository[VectorEmbedding]):
-    """Repository for managing vector embeddings."""
-    
-    def __init__(self, pickle_path: Path, metadata_path: Optional[Path] = None):
-        """Initialize with paths for vector storage."""
-        self.pickle_path = Path(pickle_path)
-        self.metadata_path = metadata_path or self.pickle_path.with_suffix('.meta.json')
-        
-        # Ensure parent directories exist
-        self.pickle_path.parent.mkdir(parents=True, exist_ok=True)
-        self.metadata_path.parent.mkdir(parents=True, exist_ok=True)
-        
+    """Repository for managing vector embeddings.
+
+    Backed by a vector store directory (see vector_store), the same format the
+    bill search index reads. Embeddings are stored L2-normalized, so the
+    embeddings handed back by the find methods are unit length.
+
+    Similarity search goes through the resident VectorIndex, which switches
+    to an IVF approximate index once the corpus is large enough. Lookups by
+    source and source prefix use the index's SourceIndex rather than
+    scanning every row.
+
+    Reads take no lock: each one works on the index snapshot current when it
+    started, so searches run in parallel with each other and with a long
+    save or compaction. Writers are serialized and publish their result as a
+    new snapshot before returning.
+
+    Saves append a small segment to the store instead of rewriting it, and
+    deletes only record tombstones. Once more than ``max_segments`` segments
+    have accumulated, or more than ``max_dead_fraction`` of the rows are
+    deleted, a background task compacts the store while searches keep
+    reading the current generation.
+    """
+
+    def __init__(self, store_path: Path, index: Optional[VectorIndex] = None,
+                 max_segments: int = DEFAULT_MAX_SEGMENTS,
+                 max_dead_fraction: float = DEFAULT_MAX_DEAD_FRACTION):
+        """Initialize with the vector store directory.
+
+        Args:
+            store_path: Vector store directory
+            index: Resident index to share (e.g. with bill search); one is
+                created for ``store_path`` if omitted
+            max_segments: Segments allowed before a background compaction
+            max_dead_fraction: Deleted fraction that triggers a background compaction
+        """
+        self.store_path = Path(store_path)
+        self.store_path.mkdir(parents=True, exist_ok=True)
+
         self._lock = asyncio.Lock()
-        self._cache = None  # Cache loaded vectors
-        self._cache_dirty = True
-    
+        self._index = index if index is not None else VectorIndex(self.store_path)
+        self.max_segments = max_segments
+        self.max_dead_fraction = max_dead_fraction
+        self._compaction: Optional[asyncio.Task] = None
+
     async def save(self, entity: VectorEmbedding) -> None:
         """Save a vector embedding."""
-        async with self._lock:
-            # Load existing data
-            vectors, metadata = await self._load_all()
-            
-            # Add new embedding
-            vectors.append(entity.embedding)
-            metadata.append({
-                "text": entity.text,
-                "source": entity.source,
-                "metadata": entity.metadata,
-                "created_at": entity.created_at.isoformat()
-            })
-            
-            # Save updated data
-            await self._save_all(vectors, metadata)
-            self._cache_dirty = True
-    
+        await self.save_batch([entity])
+
     async def save_batch(self, entities: List[VectorEmbedding]) -> None:
         """Save multiple vector embeddings efficiently."""
+        if not entities:
+            return
+
+        embeddings = np.asarray([e.embedding for e in entities], dtype=np.float32)
+        rows = [
+            {
+                "source": e.source,
+                "created_at": e.created_at.isoformat(),
+                "metadata": e.metadata
+            }
+            for e in entities
+        ]
+        texts = [e.text for e in entities]
+
         async with self._lock:
-            # Load existing data
-            vectors, metadata = await self._load_all()
-            
-            # Add new embeddings
-            for entity in entities:
-                vectors.append(entity.embedding)
-                metadata.append({
-                    "text": entity.text,
-                    "source": entity.source,
-                    "metadata": entity.metadata,
-                    "created_at": entity.created_at.isoformat()
-                })
-            
-            # Save updated data
-            await self._save_all(vectors, metadata)
-            self._cache_dirty = True
-    
+            await self._run(append_to_store, self.store_path, embeddings, rows, texts)
+            await self._publish()
+        self.schedule_compaction()
+
+    async def wait_for_compaction(self) -> None:
+        """Wait for a running background compaction, if any."""
+        if self._compaction is not None:
+            await asyncio.shield(self._compaction)
+
     async def find_by_id(self, entity_id: str) -> Optional[VectorEmbedding]:
         """Find a vector by source ID."""
-        _, metadata = await self._load_all()
-        
-        for i, meta in enumerate(metadata):
-            if meta["source"] == entity_id:
-                vectors, _ = await self._load_all()
-                return VectorEmbedding(
-                    text=meta["text"],
-                    embedding=vectors[i],
-                    source=meta["source"],
-                    metadata=meta.get("metadata", {}),
-                    created_at=datetime.fromisoformat(meta["created_at"])
-                )
-        return None
-    
+        snapshot = await self._snapshot()
+
+        rows = snapshot.sources.rows_for(entity_id)
+        return self._row_to_entity(snapshot, rows[0]) if rows else None
+
     async def find_all(self) -> List[VectorEmbedding]:
         """Find all vector embeddings."""
-        vectors, metadata = await self._load_all()
-        
-        result = []
-        for i, meta in enumerate(metadata):
-            result.append(VectorEmbedding(
-                text=meta["text"],
-                embedding=vectors[i],
-                source=meta["source"],
-                metadata=meta.get("metadata", {}),
-                created_at=datetime.fromisoformat(meta["created_at"])
-            ))
-        return result
-    
+        snapshot = await self._snapshot()
+        return [self._row_to_entity(snapshot, row) for row in snapshot.live_rows()]
+
     async def find_by_source_prefix(self, prefix: str) -> List[VectorEmbedding]:
         """Find all embeddings with source starting with prefix."""
-        all_embeddings = await self.find_all()
-        return [e for e in all_embeddings if e.source.startswith(prefix)]
-    
-    async def search_similar(self, query_embedding: List[float], top_k: int = 10) -> List[Tuple[VectorEmbedding, float]]:
-        """Search for similar vectors using cosine similarity."""
-        vectors, metadata = await self._load_all()
-        
-        if not vectors:
+        snapshot = await self._snapshot()
+        return [self._row_to_entity(snapshot, row) for row in snapshot.sources.rows_with_prefix(prefix)]
+
+    async def search_similar(self, query_embedding: List[float], top_k: int = 10,
+                             nprobe: Optional[int] = None, strategy: Optional[str] = None) -> List[Tuple[VectorEmbedding, float]]:
+        """Search for similar vectors using cosine similarity.
+
+        ``nprobe`` trades recall for latency on large corpora; ``strategy``
+        ("auto", "exact" or "binary") overrides the index's default.
+        """
+        snapshot = await self._snapshot()
+
+        if len(snapshot) == 0 or top_k <= 0:
             return []
-        
-        # Convert to numpy arrays for efficient computation
-        query_vec = np.array(query_embedding)
-        doc_vecs = np.array(vectors)
-        
-        # Compute cosine similarities
-        similarities = np.dot(doc_vecs, query_vec) / (
-            np.linalg.norm(doc_vecs, axis=1) * np.linalg.norm(query_vec)
-        )
-        
-        # Get top k indices
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
-        # Build results
-        results = []
-        for idx in top_indices:
-            embedding = VectorEmbedding(
-                text=metadata[idx]["text"],
-                embedding=vectors[idx],
-                source=metadata[idx]["source"],
-                metadata=metadata[idx].get("metadata", {}),
-                created_at=datetime.fromisoformat(metadata[idx]["created_at"])
-            )
-            results.append((embedding, float(similarities[idx])))
-        
-        return results
-    
+
+        rows, scores = await self._run(self._index.top_k, query_embedding, top_k, nprobe, strategy, snapshot)
+        return [(self._row_to_entity(snapshot, row), float(score)) for row, score in zip(rows, scores)]
+
     async def delete(self, entity_id: str) -> bool:
         """Delete a vector by source ID."""
         async with self._lock:
-            vectors, metadata = await self._load_all()
-            
-            # Find and remove the embedding
-            for i, meta in enumerate(metadata):
-                if meta["source"] == entity_id:
-                    vectors.pop(i)
-                    metadata.pop(i)
-                    await self._save_all(vectors, metadata)
-                    self._cache_dirty = True
-                    return True
-        return False
-    
+            deleted = await self._delete_where(lambda snapshot: snapshot.sources.rows_for(entity_id)[:1])
+        if deleted:
+            self.schedule_compaction()
+        return deleted > 0
+
     async def delete_by_source_prefix(self, prefix: str) -> int:
         """Delete all embeddings with source starting with prefix."""
         async with self._lock:
-            vectors, metadata = await self._load_all()
-            
-            # Find indices to delete
-            indices_to_delete = []
-            for i, meta in enumerate(metadata):
-                if meta["source"].startswith(prefix):
-                    indices_to_delete.append(i)
-            
-            # Delete in reverse order to maintain indices
-            for i in reversed(indices_to_delete):
-                vectors.pop(i)
-                metadata.pop(i)
-            
-            if indices_to_delete:
-                await self._save_all(vectors, metadata)
-                self._cache_dirty = True
-            
-            return len(indices_to_delete)
-    
+            deleted = await self._delete_where(lambda snapshot: snapshot.sources.rows_with_prefix(prefix))
+        if deleted:
+            self.schedule_compaction()
+        return deleted
+
     async def exists(self, entity_id: str) -> bool:
         """Check if a vector exists by source ID."""
-        _, metadata = await self._load_all()
-        return any(meta["source"] == entity_id for meta in metadata)
-    
-    async def _load_all(self) -> Tuple[List[List[float]], List[dict]]:
-        """Load all vectors and metadata."""
-        if self._cache is not None and not self._cache_dirty:
-            return self._cache
-        
-        vectors = await self._load_vectors()
-        metadata = await self._load_metadata()
-        
-        # Ensure consistency
-        if len(vectors) != len(metadata):
-            # Handle mismatch - prefer metadata length
-            if len(vectors) > len(metadata):
-                vectors = vectors[:len(metadata)]
-            else:
-                # Pad metadata with empty entries
-                while len(metadata) < len(vectors):
-                    metadata.append({
-                        "text": "",
-                        "source": f"unknown-{len(metadata)}",
-                        "metadata": {},
-                        "created_at": datetime.now().isoformat()
-                    })
-        
-        self._cache = (vectors, metadata)
-        self._cache_dirty = False
-        return vectors, metadata
-    
-    async def _save_all(self, vectors: List[List[float]], metadata: List[dict]) -> None:
-        """Save all vectors and metadata."""
-        await self._save_vectors(vectors)
-        await self._save_metadata(metadata)
-    
-    async def _load_vectors(self) -> List[List[float]]:
-        """Load vectors from pickle file."""
-        if self.pickle_path.exists():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, self._load_vectors_sync)
-        return []
-    
-    def _load_vectors_sync(self) -> List[List[float]]:
-        """Synchronously load vectors from pickle."""
-        with open(self.pickle_path, 'rb') as f:
-            data = pickle.load(f)
-            
-            # Handle different formats
-            if isinstance(data, dict):
-                # Assume it's a dict with 'embeddings' key
-                if 'embeddings' in data:
-                    return data['embeddings']
-                # Or it might be indexed by integers
-                return [data[i] for i in sorted(data.keys()) if isinstance(i, int)]
-            elif isinstance(data, list):
-                return data
-            else:
-                return []
-    
-    async def _save_vectors(self, vectors: List[List[float]]) -> None:
-        """Save vectors to pickle file."""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._save_vectors_sync, vectors)
-    
-    def _save_vectors_sync(self, vectors: List[List[float]]) -> None:
-        """Synchronously save vectors to pickle."""
-        with open(self.pickle_path, 'wb') as f:
-            pickle.dump(vectors, f)
-    
-    async def _load_metadata(self) -> List[dict]:
-        """Load metadata from JSON file."""
-        if self.metadata_path.exists():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, self._load_metadata_sync)
-        return []
-    
-    def _load_metadata_sync(self) -> List[dict]:
-        """Synchronously load metadata from JSON."""
-        with open(self.metadata_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    async def _save_metadata(self, metadata: List[dict]) -> None:
-        """Save metadata to JSON file."""
+        snapshot = await self._snapshot()
+        return entity_id in snapshot.sources
+
+    async def _snapshot(self, blocking: bool = False) -> IndexSnapshot:
+        """Index snapshot for one operation, refreshed from the store first.
+
+        Readers don't wait for a reload already running in another thread;
+        they use the snapshot that is current until it is published.
+        """
+        await self._run(self._index.refresh, blocking)
+        return self._index.snapshot()
+
+    async def _delete_where(self, select: Callable[[IndexSnapshot], List[int]]) -> int:
+        """Tombstone the rows ``select`` picks from a fresh snapshot; caller holds the lock.
+
+        Row ids belong to the snapshot's generation, so delete_rows refuses
+        them if another writer (e.g. embed_txt_file) moved the store on in
+        between; the rows are then picked again from the new generation.
+        """
+        for attempt in range(_DELETE_ATTEMPTS):
+            snapshot = await self._snapshot(blocking=True)
+            rows = select(snapshot)
+            if not rows:
+                return 0
+            try:
+                await self._run(delete_rows, self.store_path, rows, snapshot.generation)
+            except VectorStoreError:
+                if attempt == _DELETE_ATTEMPTS - 1:
+                    raise
+                continue
+            await self._publish()
+            return len(rows)
+        return 0
+
+    async def _publish(self) -> None:
+        """Load the generation just written so later reads see it."""
+        await self._run(self._index.refresh)
+
+    def schedule_compaction(self) -> None:
+        """Start a background compaction unless one is already running.
+
+        Also for writers that append to the store directly (embed_txt_file),
+        so compaction always runs under this repository's lock.
+        """
+        if self._compaction is not None and not self._compaction.done():
+            return
+        self._compaction = asyncio.get_running_loop().create_task(self._compact())
+
+    async def _compact(self) -> None:
+        """Merge segments off the event loop; writers wait, readers do not."""
+        try:
+            async with self._lock:
+                if await self._run(compact_store_if_needed, self.store_path,
+                                   self.max_segments, self.max_dead_fraction):
+                    await self._publish()
+                    logger.info(f"Compacted vector store {self.store_path}")
+        except Exception as e:
+            logger.error(f"Vector store compaction failed for {self.store_path}: {e}")
+
+    async def _run(self, func, *args):
+        """Run blocking store I/O off the event loop."""
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._save_metadata_sync, metadata)
-    
-    def _save_metadata_sync(self, metadata: List[dict]) -> None:
-        """Synchronously save metadata to JSON."""
-        with open(self.metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
\ No newline at end of file
+        return await loop.run_in_executor(None, func, *args)
+
+    @staticmethod
+    def _row_to_entity(snapshot: IndexSnapshot, row: int) -> VectorEmbedding:
+        """Build a VectorEmbedding from a store row."""
+        meta = snapshot.metadata[row]
+        created_at = meta.get("created_at")
+        return VectorEmbedding(
+            text=snapshot.texts[row],
+            embedding=np.asarray(snapshot.embeddings[row]).tolist(),
+            source=meta.get("source", f"unknown-{row}"),
+            # Rows written by embed_txt_file keep their metadata at the top level
+            metadata=meta.get("metadata", {k: v for k, v in meta.items() if k not in _ROW_KEYS}),
+            created_at=datetime.fromisoformat(created_at) if created_at else datetime.now()
+        )
@@ -0,0 +1,100 @@
+"""
+Small in-process caches for bill search.
+
+The Gemini model often repeats a search with the same (or trivially
+reworded) query on follow-up turns, so query text is normalized before it is
+used as a key. Caches are thread-safe because searches run in the executor.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so near-identical queries share a key."""
+    return " ".join(query.split()).casefold()
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for ``key`` (marking it recently used), or None."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or refresh ``key``, evicting the oldest entries over maxsize."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TTLCache(LRUCache):
+    """LRUCache whose entries also expire ``ttl_seconds`` after insertion."""
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(maxsize)
+        self.ttl_seconds = ttl_seconds
+        self.expired = 0
+        self._clock = clock
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = super().get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if self._clock() < expires_at:
+            return value
+        with self._lock:
+            # Count the lookup as a miss, not the hit LRUCache recorded
+            self._data.pop(key, None)
+            self.hits -= 1
+            self.misses += 1
+            self.expired += 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        super().put(key, (self._clock() + self.ttl_seconds, value))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "expired": self.expired, "ttl_seconds": self.ttl_seconds}
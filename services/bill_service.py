@@ -2,6 +2,7 @@
 Bill service for handling legislative document operations.
 """
 
+import asyncio
 import os
 import re
 import json
@@ -47,17 +48,22 @@ class ReferenceUpdate:
 class BillService:
     """Service for handling bill-related operations."""
     
-    def __init__(self, genai_client, bill_directories: Dict[str, str], file_manager=None):
+    def __init__(self, genai_client, bill_directories: Dict[str, str], file_manager=None,
+                 text_index=None, vector_repo=None):
         """Initialize bill service.
         
         Args:
             genai_client: Google Generative AI client
             bill_directories: Dictionary of bill storage directories
             file_manager: FileManager instance for file operations
+            text_index: BillTextIndex to update with each added bill
+            vector_repo: VectorRepository that compacts the store after embedding
         """
         self.genai_client = genai_client
         self.bill_directories = bill_directories
         self.file_manager = file_manager
+        self.text_index = text_index
+        self.vector_repo = vector_repo
     
     async def add_bill(self, bill_link: str, database_type: Literal["bills"]) -> BillResult:
         """Add a bill to the database.
@@ -117,13 +123,23 @@ class BillService:
                 with open(bill_location, "w", encoding="utf-8") as f:
                     f.write(bill_text)
             
+            # Make the new text searchable by keyword right away (tokenizing and
+            # logging a whole bill is blocking work, so keep it off the event loop)
+            if self.text_index is not None:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.text_index.add_document, Path(bill_location).name, bill_text
+                )
+            
             # Try to download PDF version
             pdf_path = await self._download_bill_pdf(bill_link, bill_name)
             
-            # Embed the text file
+            # Embed the text file into the shared vector store
             from makeembeddings import embed_txt_file
-            embed_txt_file(bill_location)
+            from settings import MODEL_PATH, VECTOR_STORE
+            embed_txt_file(bill_location, MODEL_PATH, save_to=VECTOR_STORE)
             logger.info(f"Added bill '{bill_name}' to embeddings")
+            if self.vector_repo is not None:
+                self.vector_repo.schedule_compaction()
             
             return BillResult(
                 success=True,
@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator
 try:
     from pydantic_settings import BaseSettings
@@ -126,9 +126,15 @@ class FileStorage(BaseModel):
     news_file: Path
     queries_file: Path
     model_path: Path
-    vector_pkl: Path
+    vector_pkl: Path  # legacy pickle, converted into vector_store on first start
+    vector_store: Path
+    bill_text_index: Path  # keyword search index over the bill texts
+    bill_corpus_cache_mb: int = 64  # memory budget of the in-memory bill text cache
+    bill_repository_backend: Literal["files", "sqlite"] = "files"  # where BillRepository keeps bills
+    bill_database: Path  # SQLite database of the "sqlite" bill repository backend
 
-    @field_validator('*', mode='before')
+    @field_validator('bill_ref_file', 'news_file', 'queries_file', 'model_path', 'vector_pkl',
+                     'vector_store', 'bill_text_index', 'bill_database', mode='before')
     def resolve_path(cls, v):
         """Convert string paths to Path objects and resolve them."""
         if isinstance(v, str):
@@ -139,6 +145,27 @@ class FileStorage(BaseModel):
         return v
 
 
+class VectorSearchSettings(BaseModel):
+    """Tuning knobs for bill vector search."""
+    ann_min_rows: int = 4096  # below this the index always does an exact scan
+    nprobe: int = 8  # IVF lists scanned per query; higher = better recall, slower
+    nlist: Optional[int] = None  # IVF list count; None = about sqrt(corpus size)
+    quantization: Optional[Literal["int8", "float16"]] = None  # quantized first-pass scoring
+    rescore_candidates: int = 100  # shortlist rescored at full precision when quantized
+    strategy: Literal["auto", "exact", "binary"] = "auto"  # default search strategy
+    binary_candidates: int = 300  # Hamming shortlist rescored by the "binary" strategy
+    search_mode: Literal["vector", "hybrid"] = "vector"  # default search_bills ranking
+    hybrid_candidates: int = 50  # rows from each of the vector and BM25 rankings fused in hybrid mode
+    rrf_k: int = 60  # reciprocal-rank fusion constant
+    max_segments: int = 8  # append segments allowed before a background compaction
+    max_dead_fraction: float = 0.2  # deleted-row fraction that triggers a background compaction
+    batch_max_size: int = 16  # query embeddings encoded together at most
+    batch_max_wait_ms: float = 10.0  # how long a query waits for others to batch with
+    embedding_cache_size: int = 1024  # cached query embeddings (LRU); 0 disables
+    result_cache_size: int = 256  # cached search_bills results; 0 disables
+    result_cache_ttl_seconds: float = 600.0  # max age of a cached search result
+
+
 class Settings(BaseSettings):
     """Main settings class that combines all configuration."""
     
@@ -156,6 +183,9 @@ class Settings(BaseSettings):
     bill_directories: BillDirectories
     file_storage: FileStorage
     
+    # Vector search tuning
+    vector_search: VectorSearchSettings = Field(default_factory=VectorSearchSettings)
+    
     # Role permissions
     role_permissions: RolePermissions = Field(default_factory=RolePermissions)
     
@@ -195,7 +225,33 @@ class Settings(BaseSettings):
             news_file=os.getenv("NEWS_FILE", "news.txt"),
             queries_file=os.getenv("QUERIES_FILE", "queries.csv"),
             model_path="final_model",
-            vector_pkl="vectors.pkl"
+            vector_pkl="vectors.pkl",
+            vector_store=os.getenv("VECTOR_STORE", "vector_store"),
+            bill_text_index=os.getenv("BILL_TEXT_INDEX", "bill_text_index"),
+            bill_corpus_cache_mb=int(os.getenv("BILL_CORPUS_CACHE_MB", "64")),
+            bill_repository_backend=os.getenv("BILL_REPOSITORY_BACKEND", "files"),
+            bill_database=os.getenv("BILL_DATABASE", "bills.db")
+        )
+        
+        # Initialize vector search tuning
+        vector_search = VectorSearchSettings(
+            ann_min_rows=int(os.getenv("VECTOR_ANN_MIN_ROWS", "4096")),
+            nprobe=int(os.getenv("VECTOR_NPROBE", "8")),
+            nlist=int(os.getenv("VECTOR_NLIST")) if os.getenv("VECTOR_NLIST") else None,
+            quantization=os.getenv("VECTOR_QUANTIZATION") or None,
+            rescore_candidates=int(os.getenv("VECTOR_RESCORE_CANDIDATES", "100")),
+            strategy=os.getenv("VECTOR_SEARCH_STRATEGY", "auto"),
+            binary_candidates=int(os.getenv("VECTOR_BINARY_CANDIDATES", "300")),
+            search_mode=os.getenv("VECTOR_SEARCH_MODE", "vector"),
+            hybrid_candidates=int(os.getenv("VECTOR_HYBRID_CANDIDATES", "50")),
+            rrf_k=int(os.getenv("VECTOR_RRF_K", "60")),
+            max_segments=int(os.getenv("VECTOR_MAX_SEGMENTS", "8")),
+            max_dead_fraction=float(os.getenv("VECTOR_MAX_DEAD_FRACTION", "0.2")),
+            batch_max_size=int(os.getenv("EMBED_BATCH_MAX_SIZE", "16")),
+            batch_max_wait_ms=float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "10")),
+            embedding_cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")),
+            result_cache_size=int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "256")),
+            result_cache_ttl_seconds=float(os.getenv("SEARCH_RESULT_CACHE_TTL", "600"))
         )
         
         # Ensure environment variables are loaded for core settings
@@ -212,7 +268,8 @@ class Settings(BaseSettings):
             "channels": channels,
             "knowledge_files": knowledge_files,
             "bill_directories": bill_directories,
-            "file_storage": file_storage
+            "file_storage": file_storage,
+            "vector_search": vector_search
         })
         
         super().__init__(**values)
@@ -245,4 +302,9 @@ KNOWLEDGE_FILES = settings.knowledge_files_dict
 BILL_DIRECTORIES = settings.bill_directories_dict
 MODEL_PATH = str(settings.file_storage.model_path)
 VECTOR_PKL = str(settings.file_storage.vector_pkl)
+VECTOR_STORE = str(settings.file_storage.vector_store)
+BILL_TEXT_INDEX = str(settings.file_storage.bill_text_index)
+BILL_CORPUS_CACHE_MB = settings.file_storage.bill_corpus_cache_mb
+BILL_REPOSITORY_BACKEND = settings.file_storage.bill_repository_backend
+BILL_DATABASE = str(settings.file_storage.bill_database)
 ALLOWED_ROLES_FOR_ROLES = settings.role_permissions.allowed_roles_for_roles
\ No newline at end of file
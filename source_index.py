@@ -0,0 +1,145 @@
+"""
+Secondary index from a vector store row's ``source`` to its row ids.
+
+Sources look like ``bill:hr-123`` or ``knowledge:rules``; re-indexing a bill
+deletes every row under a prefix and appends new ones. A dict gives the rows
+of one source directly, and a sorted array of the distinct sources turns a
+prefix lookup into a bisect range instead of a scan of every row. Updates
+touch only the sources they change (see SourceIndex), not the whole index.
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence
+
+# Changed sources an index carries on top of its shared base before folding them in
+_MAX_DELTA = 1024
+
+
+class SourceIndex:
+    """Maps each source to the (ascending) store rows that carry it.
+
+    An index is a base dict and sorted source list, shared and never
+    modified, plus a small overlay of the sources changed since the base was
+    built. A write copies only the overlay (and the rows of the sources it
+    touches); once the overlay outgrows ``_MAX_DELTA`` sources it is folded
+    into a new base.
+    """
+
+    def __init__(self, rows: Optional[Dict[str, List[int]]] = None,
+                 sources: Optional[List[str]] = None, size: int = 0):
+        self._base: Dict[str, List[int]] = rows if rows is not None else {}
+        self._base_sources: List[str] = sources if sources is not None else sorted(self._base)
+        self._delta: Dict[str, List[int]] = {}  # source -> rows; [] once all its rows are gone
+        self._added: List[str] = []  # sorted sources with rows in the overlay but not in the base
+        self._size = size  # store rows covered, including rows without a source
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, source: str) -> bool:
+        return bool(self.rows_for(source))
+
+    @property
+    def sources(self) -> List[str]:
+        """Every distinct source, in sorted order."""
+        return self.sources_with_prefix("")
+
+    @classmethod
+    def build(cls, metadata: Iterable[Dict[str, Any]], deleted: Collection[int] = ()) -> "SourceIndex":
+        """Index every row of ``metadata`` except the ``deleted`` ones."""
+        rows, size = cls()._collect(metadata, 0, deleted)
+        return cls(rows, None, size)
+
+    def extended(self, metadata: Iterable[Dict[str, Any]], start_row: int,
+                 deleted: Collection[int] = ()) -> "SourceIndex":
+        """New index that also covers ``metadata`` as rows from ``start_row`` on.
+
+        This index is left untouched, since searches may still be reading it.
+        """
+        changes, size = self._collect(metadata, start_row, deleted)
+        return self._with(changes, max(self._size, size))
+
+    def without(self, rows: Sequence[int], metadata: Sequence[Dict[str, Any]]) -> "SourceIndex":
+        """New index with ``rows`` (looked up in the full ``metadata``) removed."""
+        removed: Dict[str, set] = {}
+        for row in rows:
+            source = metadata[row].get("source")
+            if source is not None:
+                removed.setdefault(source, set()).add(int(row))
+        if not removed:
+            return self
+
+        changes = {
+            source: [row for row in self.rows_for(source) if row not in dead]
+            for source, dead in removed.items()
+        }
+        return self._with(changes, self._size)
+
+    def rows_for(self, source: str) -> List[int]:
+        """Rows whose source is exactly ``source``."""
+        rows = self._delta.get(source)
+        return rows if rows is not None else self._base.get(source, [])
+
+    def sources_with_prefix(self, prefix: str) -> List[str]:
+        """Distinct sources starting with ``prefix``, in sorted order."""
+        matched = [source for source in _prefix_range(self._base_sources, prefix) if self._delta.get(source, True)]
+        added = _prefix_range(self._added, prefix)
+        return list(heapq.merge(matched, added)) if added else matched
+
+    def rows_with_prefix(self, prefix: str) -> List[int]:
+        """Ascending rows whose source starts with ``prefix``."""
+        matched = [row for source in self.sources_with_prefix(prefix) for row in self.rows_for(source)]
+        matched.sort()
+        return matched
+
+    def _collect(self, metadata: Iterable[Dict[str, Any]], start_row: int,
+                 deleted: Collection[int]):
+        """Rows per source after adding ``metadata`` from ``start_row``, for the sources it touches."""
+        deleted = set(int(row) for row in deleted)
+        changes: Dict[str, List[int]] = {}
+        row = start_row - 1
+        for row, meta in enumerate(metadata, start_row):
+            source = meta.get("source")
+            if source is None or row in deleted:
+                continue
+            if source not in changes:
+                changes[source] = list(self.rows_for(source))
+            changes[source].append(row)
+        return changes, row + 1
+
+    def _with(self, changes: Dict[str, List[int]], size: int) -> "SourceIndex":
+        """New index with ``changes`` (source -> all of its rows) applied."""
+        delta = {**self._delta, **changes}
+        if len(delta) > _MAX_DELTA:
+            rows = dict(self._base)
+            for source, source_rows in delta.items():
+                if source_rows:
+                    rows[source] = source_rows
+                else:
+                    rows.pop(source, None)
+            return SourceIndex(rows, None, size)
+
+        added = list(self._added)
+        for source, source_rows in changes.items():
+            if source in self._base:
+                continue
+            position = bisect_left(added, source)
+            present = position < len(added) and added[position] == source
+            if source_rows and not present:
+                added.insert(position, source)
+            elif not source_rows and present:
+                del added[position]
+
+        index = SourceIndex(self._base, self._base_sources, size)
+        index._delta, index._added = delta, added
+        return index
+
+
+def _prefix_range(sources: List[str], prefix: str) -> List[str]:
+    """The run of sorted ``sources`` starting with ``prefix``."""
+    start = bisect_left(sources, prefix)
+    end = start
+    while end < len(sources) and sources[end].startswith(prefix):
+        end += 1
+    return sources[start:end]
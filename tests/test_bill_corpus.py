@@ -0,0 +1,91 @@
+"""Tests for the shared bill text cache."""
+
+import os
+
+import pytest
+
+from bill_corpus import BillCorpus
+from bill_text_index import BillTextIndex
+
+
+@pytest.fixture
+def bills_dir(temp_dir):
+    bills = temp_dir / "bills"
+    bills.mkdir()
+    (bills / "A.txt").write_text("Clean water.", encoding="utf-8")
+    (bills / "B.txt").write_text("Farm subsidies.", encoding="utf-8")
+    return bills
+
+
+def _touch(path, text):
+    """Rewrite ``path`` and move its mtime forward so the change is visible."""
+    stat = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_reads_once_until_the_file_changes(bills_dir):
+    """Test unchanged files are served from memory and changed ones re-read."""
+    corpus = BillCorpus(bills_dir)
+
+    assert corpus.read("A.txt") == "Clean water."
+    assert corpus.read("A.txt") == "Clean water."
+    assert (corpus.stats()["hits"], corpus.stats()["misses"]) == (1, 1)
+
+    _touch(bills_dir / "A.txt", "Clean air.")
+    assert corpus.read("A.txt") == "Clean air."
+    assert corpus.read("missing.txt") is None
+
+
+def test_scan_drops_stale_and_deleted_texts(bills_dir):
+    """Test one directory scan invalidates changed and removed files."""
+    corpus = BillCorpus(bills_dir)
+    assert corpus.warm() == 2
+
+    _touch(bills_dir / "A.txt", "Clean air.")
+    (bills_dir / "B.txt").unlink()
+    (bills_dir / "C.txt").write_text("New bill.", encoding="utf-8")
+
+    assert sorted(corpus.scan()) == ["A.txt", "C.txt"]
+    assert len(corpus) == 0
+    assert corpus.names() == ["A.txt", "C.txt"]
+
+
+def test_memory_budget_evicts_largest_cold_texts(bills_dir):
+    """Test the budget holds, evicting the largest of the least recently used first."""
+    (bills_dir / "big.txt").write_text("x" * 4000, encoding="utf-8")
+    (bills_dir / "huge.txt").write_text("x" * 20000, encoding="utf-8")
+    corpus = BillCorpus(bills_dir, memory_budget=5000)
+
+    corpus.read("big.txt")
+    corpus.read("A.txt")
+    corpus.read("B.txt")
+    corpus.read("A.txt")
+
+    assert corpus.read("huge.txt") == "x" * 20000  # larger than the budget: returned, not cached
+    assert len(corpus) == 3
+
+    (bills_dir / "mid.txt").write_text("y" * 1500, encoding="utf-8")
+    corpus.read("mid.txt")
+
+    stats = corpus.stats()
+    assert stats["bytes"] <= 5000 and stats["evictions"] == 1
+    corpus.read("A.txt")
+    assert corpus.stats()["hits"] == 2  # the small texts survived, big.txt was evicted
+
+
+def test_index_reads_through_a_shared_corpus(bills_dir, temp_dir):
+    """Test the keyword index fills the shared cache and snippets come from it."""
+    corpus = BillCorpus(bills_dir)
+    index = BillTextIndex(temp_dir / "index", bills_dir, corpus=corpus)
+    index.sync()
+
+    assert len(corpus) == 2
+    misses = corpus.stats()["misses"]
+    assert index.find("water")[0].snippets == ["Clean **water**."]
+    assert corpus.stats()["misses"] == misses
+
+    (bills_dir / "C.txt").write_text("Water rights.", encoding="utf-8")
+    index.add_document("C.txt", "Water rights.")
+    assert corpus.read("C.txt") == "Water rights."
+    assert corpus.stats()["misses"] == misses
@@ -0,0 +1,128 @@
+"""Tests for structured bill fields and search filters."""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from bill_metadata import MetadataColumns, SearchFilters, extract_bill_fields
+from models import BillType
+from vector_index import VectorIndex
+from vector_store import append_to_store, normalize_rows, write_store
+
+
+def test_extract_fields_from_header():
+    """Test type, number, sponsor and date are read from a bill header."""
+    text = "H.RES. 42\nA resolution honoring volunteers.\nSponsored by Rep. Jane Doe, (D-CA)\nIntroduced March 3, 2025\n..."
+
+    assert extract_bill_fields(text) == {
+        "bill_type": "hres",
+        "reference_number": 42,
+        "sponsor": "Rep. Jane Doe",
+        "introduced": "2025-03-03",
+    }
+
+
+def test_extract_fields_prefers_filename_and_skips_unknowns():
+    """Test the filename identifies the bill and missing fields are left out."""
+    assert extract_bill_fields("Under U.S. 5 of the code...", "sjres12.txt") == {
+        "bill_type": "sjres", "reference_number": 12,
+    }
+    assert extract_bill_fields("No header here, citing U.S. 5.") == {}
+
+
+class TestMetadataColumns:
+    """Test cases for MetadataColumns and SearchFilters.mask."""
+
+    @pytest.fixture
+    def metadata(self):
+        return [
+            {"source": "a", "bill_type": "hr", "reference_number": 1, "sponsor": "Jane Doe", "introduced": "2025-03-01"},
+            {"source": "b", "bill_type": "hres", "reference_number": 7, "sponsor": "John Roe", "introduced": "2025-04-10"},
+            {"source": "c"},
+            {"source": "d", "metadata": {"bill_type": "hres", "reference_number": 9, "sponsor": "jane  DOE"}},
+        ]
+
+    def test_filters(self, metadata):
+        """Test each filter kind selects the expected rows."""
+        columns = MetadataColumns.build(metadata)
+
+        def rows(**kwargs):
+            return np.flatnonzero(SearchFilters(**kwargs).mask(columns)).tolist()
+
+        assert rows(bill_types=[BillType.HRES]) == [1, 3]
+        assert rows(bill_types=[BillType.HR, BillType.HRES]) == [0, 1, 3]
+        assert rows(sponsor="jane doe") == [0, 3]
+        assert rows(reference_min=5, reference_max=8) == [1]
+        assert rows(introduced_after=date(2025, 3, 15)) == [1]
+        assert rows(introduced_before=date(2025, 3, 15), sponsor="Jane") == [0]
+
+    def test_extended_matches_build(self, metadata):
+        """Test appending rows gives the same columns as building from scratch."""
+        built = MetadataColumns.build(metadata)
+        grown = MetadataColumns.build(metadata[:2]).extended(metadata[2:])
+
+        filters = SearchFilters(bill_types=[BillType.HRES], sponsor="doe")
+        assert grown.size == built.size
+        np.testing.assert_array_equal(filters.mask(grown), filters.mask(built))
+
+    def test_from_arguments(self):
+        """Test tool arguments become filters, and no arguments mean no filter."""
+        filters = SearchFilters.from_arguments(bill_type="HRES", introduced_after="2025-03-01")
+
+        assert filters.bill_types == [BillType.HRES]
+        assert filters.introduced_after == date(2025, 3, 1)
+        assert SearchFilters.from_arguments() is None
+        with pytest.raises(ValueError):
+            SearchFilters.from_arguments(bill_type="bogus")
+
+
+class TestFilteredSearch:
+    """Test VectorIndex applies filters before top-k selection."""
+
+    def _store(self, path, n, seed=0):
+        rng = np.random.default_rng(seed)
+        vectors = normalize_rows(rng.normal(size=(n, 8)))
+        metadata = [
+            {"source": f"{i}.txt", "bill_type": "hres" if i % 10 == 0 else "hr", "reference_number": i}
+            for i in range(n)
+        ]
+        write_store(path, vectors, metadata, [str(i) for i in range(n)])
+        return vectors
+
+    @pytest.mark.parametrize("strategy", ["auto", "exact", "binary"])
+    def test_filtered_results_only_match(self, temp_dir, strategy):
+        """Test every result matches and equals the exact filtered top k."""
+        vectors = self._store(temp_dir / "store", 600)
+        index = VectorIndex(temp_dir / "store", ann_min_rows=100, quantization="int8")
+        index.load()
+        filters = SearchFilters(bill_types=[BillType.HRES])
+        query = vectors[5]
+
+        rows, _ = index.top_k(query, 5, strategy=strategy, filters=filters)
+
+        allowed = np.arange(0, 600, 10)
+        expected = allowed[np.argsort(-(vectors[allowed] @ query))[:5]]
+        assert rows.tolist() == expected.tolist()
+
+    def test_filter_with_no_matches(self, temp_dir):
+        """Test an unsatisfiable filter returns nothing."""
+        vectors = self._store(temp_dir / "store", 50)
+        index = VectorIndex(temp_dir / "store")
+        index.load()
+
+        assert index.search(vectors[0], k=5, filters=SearchFilters(sponsor="nobody")) == []
+
+    def test_columns_follow_appends(self, temp_dir):
+        """Test appended rows are filterable without a rebuild."""
+        self._store(temp_dir / "store", 50)
+        index = VectorIndex(temp_dir / "store")
+        index.load()
+        columns = index.columns
+
+        append_to_store(temp_dir / "store", np.ones((1, 8)), [{"source": "x", "bill_type": "sres"}], ["x"])
+        index.refresh()
+
+        assert len(index.columns) == 51 and len(columns) == 50
+        result = index.search(np.ones(8), k=3, filters=SearchFilters(bill_types=[BillType.SRES]))
+        assert [r["metadata"]["source"] for r in result] == ["x"]
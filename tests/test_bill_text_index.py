@@ -0,0 +1,219 @@
+"""Tests for the persistent bill keyword index."""
+
+import json
+
+import pytest
+
+from bill_text_index import LOG_NAME, BillTextIndex, _QueryParser
+
+
+@pytest.fixture
+def bills_dir(temp_dir):
+    bills = temp_dir / "bills"
+    bills.mkdir()
+    (bills / "A.txt").write_text("This bill mentions FOOBAR and the Clean Water Act.", encoding="utf-8")
+    (bills / "B.txt").write_text("Nothing here about water.", encoding="utf-8")
+    return bills
+
+
+@pytest.fixture
+def index(temp_dir, bills_dir):
+    index = BillTextIndex(temp_dir / "index", bills_dir)
+    index.load()
+    index.sync()
+    return index
+
+
+def test_search_is_case_insensitive_and_all_words(index):
+    """Test every query word must occur, in any case."""
+    assert index.search("foobar") == ["A.txt"]
+    assert index.search("WATER") == ["A.txt", "B.txt"]
+    assert index.search("clean water") == ["A.txt"]
+    assert index.search("clean nothing") == []
+    assert index.search("  ") == []
+
+
+def test_reload_reads_only_changed_files(index, temp_dir, bills_dir):
+    """Test a reloaded index answers from the log and re-reads only changed files."""
+    reloaded = BillTextIndex(temp_dir / "index", bills_dir)
+    reloaded.load()
+
+    assert reloaded.search("foobar") == ["A.txt"]
+    assert reloaded.sync() == 0
+
+    (bills_dir / "B.txt").write_text("Now B mentions foobar too.", encoding="utf-8")
+    (bills_dir / "A.txt").unlink()
+    assert reloaded.sync() == 2
+    assert reloaded.search("foobar") == ["B.txt"]
+
+
+def test_add_document_is_persisted(index, temp_dir, bills_dir):
+    """Test add_document is searchable at once and survives a reload."""
+    (bills_dir / "C.txt").write_text("Appropriations for fiscal year 2026.", encoding="utf-8")
+    index.add_document("C.txt", "Appropriations for fiscal year 2026.")
+
+    reloaded = BillTextIndex(temp_dir / "index", bills_dir)
+    reloaded.load()
+
+    assert index.search("fiscal") == ["C.txt"]
+    assert reloaded.search("fiscal 2026") == ["C.txt"]
+    assert reloaded.sync() == 0  # mtime and size were recorded when it was added
+
+
+def test_log_is_compacted(index, temp_dir, bills_dir):
+    """Test repeated re-indexing rewrites the log instead of growing it forever."""
+    for i in range(100):
+        index.add_document("B.txt", f"revision {i}")
+
+    with open(temp_dir / "index" / LOG_NAME, encoding="utf-8") as f:
+        lines = f.readlines()
+    assert len(lines) < 40
+    assert index.search("revision 99") == ["B.txt"]
+    assert index.search("revision 98") == []
+
+
+def test_torn_line_and_old_format(index, temp_dir, bills_dir):
+    """Test a partially written last line is skipped and an old-format log is rebuilt."""
+    log = temp_dir / "index" / LOG_NAME
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"add": "Z.txt", "id": 9')
+
+    reloaded = BillTextIndex(temp_dir / "index", bills_dir)
+    reloaded.load()
+    assert reloaded.search("water") == ["A.txt", "B.txt"]
+
+    log.write_text(json.dumps({"format_version": 0}) + "\n", encoding="utf-8")
+    reloaded.load()
+    assert len(reloaded) == 0 and not log.exists()
+    reloaded.sync()
+    assert reloaded.search("foobar") == ["A.txt"]
+
+
+class TestSubstringAndFuzzy:
+    """Test the trigram-backed match modes."""
+
+    @pytest.fixture
+    def index(self, temp_dir):
+        bills = temp_dir / "bills"
+        bills.mkdir()
+        (bills / "Clean Water Act.txt").write_text("Sponsored by Rep. Alexandria Washington.\nWater  quality.", encoding="utf-8")
+        (bills / "Energy Bill.txt").write_text("Department of Energy appropriations.", encoding="utf-8")
+        (bills / "Tax Act.txt").write_text("Amends the water credit; quality not covered.", encoding="utf-8")
+        index = BillTextIndex(temp_dir / "index", bills)
+        index.sync()
+        return index
+
+    def test_substring_matches_inside_words(self, index):
+        """Test fragments match inside words and titles."""
+        assert index.search("ashingt", mode="substring") == ["Clean Water Act.txt"]
+        assert index.search("ENERG", mode="substring") == ["Energy Bill.txt"]
+        assert index.search("ean wat", mode="substring") == ["Clean Water Act.txt"]  # title only
+        assert index.search("at", mode="substring") == ["Clean Water Act.txt", "Energy Bill.txt", "Tax Act.txt"]
+
+    def test_substring_is_verified_against_the_text(self, index):
+        """Test candidates sharing the words but not the exact fragment are dropped."""
+        assert index.search("water quality", mode="substring") == ["Clean Water Act.txt"]
+        assert index.search("quality water", mode="substring") == []
+
+    def test_fuzzy_tolerates_typos(self, index):
+        """Test misspelled names still match, ranked by similarity."""
+        results = index.find("alexandra washingtn", mode="fuzzy")
+
+        assert [match.name for match in results] == ["Clean Water Act.txt"]
+        assert 0.3 <= results[0].score < 1.0
+        assert results[0].snippets == ["Sponsored by Rep. **Alexandria** **Washington**. Water quality."]
+        assert index.search("water", mode="fuzzy") == ["Clean Water Act.txt", "Tax Act.txt"]
+        assert index.search("zzyzx", mode="fuzzy") == []
+
+    def test_trigrams_follow_updates(self, index):
+        """Test words added or removed after the trigram index is built are seen."""
+        index.search("energ", mode="substring")
+        index.add_document("Energy Bill.txt", "Renewable hydropower.")
+
+        assert index.search("hydropow", mode="substring") == ["Energy Bill.txt"]
+        assert index.search("appropriat", mode="substring") == []
+
+    def test_unknown_mode(self, index):
+        """Test an unknown match mode is rejected."""
+        with pytest.raises(ValueError):
+            index.search("water", mode="regex")
+
+
+class TestBooleanQueries:
+    """Test phrase and boolean queries in "words" mode."""
+
+    @pytest.fixture
+    def index(self, temp_dir):
+        bills = temp_dir / "bills"
+        bills.mkdir()
+        (bills / "Clean Water Act.txt").write_text(
+            "Clean water standards. The clean water fund pays for water testing.", encoding="utf-8")
+        (bills / "Farm Bill.txt").write_text("Water for farms, and clean air.", encoding="utf-8")
+        (bills / "Tax Act.txt").write_text("Taxes on bottled water.", encoding="utf-8")
+        index = BillTextIndex(temp_dir / "index", bills)
+        index.sync()
+        return index
+
+    def test_phrases_match_consecutive_words(self, index):
+        """Test a quoted phrase needs its words in order and adjacent."""
+        assert index.search('"clean water"') == ["Clean Water Act.txt"]
+        assert index.search('"water clean"') == []
+        assert index.search("clean water") == ["Clean Water Act.txt", "Farm Bill.txt"]
+        assert index.search('"bottled water"') == ["Tax Act.txt"]
+
+    def test_boolean_operators(self, index):
+        """Test AND, OR, NOT and parentheses."""
+        assert index.search("taxes OR farms") == ["Farm Bill.txt", "Tax Act.txt"]
+        assert index.search("water NOT clean") == ["Tax Act.txt"]
+        assert index.search("water AND NOT (taxes OR farms)") == ["Clean Water Act.txt"]
+        assert index.search("NOT water") == []
+        assert index.search('"clean air" OR bottled') == ["Farm Bill.txt", "Tax Act.txt"]
+
+    def test_ranked_by_hits_with_snippets(self, index):
+        """Test bills with more occurrences rank first and hits are highlighted."""
+        matches = index.find("water")
+
+        assert [(match.name, match.hits) for match in matches] == [
+            ("Clean Water Act.txt", 3), ("Farm Bill.txt", 1), ("Tax Act.txt", 1)]
+        assert matches[2].snippets == ["Taxes on bottled **water**."]
+
+        phrase = index.find('"clean water"')[0]
+        assert phrase.hits == 2
+        assert phrase.snippets == ["**Clean water** standards. The **clean water** fund pays for water testing."]
+        assert index.find("water", limit=1, max_snippets=0)[0].snippets == []
+
+    def test_snippets_only_for_displayed_matches(self, temp_dir, monkeypatch):
+        """Test ranking reads no bill file and snippets cost one read per shown match."""
+        bills = temp_dir / "many"
+        bills.mkdir()
+        for i in range(30):
+            (bills / f"HR{i:02d}.txt").write_text("the water bill " * (i + 1), encoding="utf-8")
+        index = BillTextIndex(temp_dir / "many_index", bills)
+        index.sync()
+        reads = []
+        original_read = index._read
+        monkeypatch.setattr(index, "_read", lambda name: reads.append(name) or original_read(name))
+
+        matches = index.find("water OR bill", max_snippets=0)
+
+        assert len(matches) == 30 and reads == []
+        shown = [index.snippets_for(match) for match in matches[:5]]
+        assert reads == [match.name for match in matches[:5]]
+        assert shown[0][0].startswith("the **water** **bill**")
+        assert index.find("water", mode="substring", max_snippets=0)[0].pattern is not None
+        assert index.snippets_for(index.find("wat", mode="substring", max_snippets=0)[0], 1)[0].startswith("the **wat")
+
+    def test_positions_survive_reload(self, index, temp_dir):
+        """Test phrase queries work from the replayed log."""
+        reloaded = BillTextIndex(temp_dir / "index", index.bills_dir)
+        reloaded.load()
+
+        assert reloaded.search('"fund water"') == []
+        assert reloaded.search('"water testing"') == ["Clean Water Act.txt"]
+
+    def test_malformed_queries(self, index):
+        """Test dangling operators and unbalanced parentheses are rejected."""
+        for query in ("water AND", "(water OR farms", "water)", "OR water"):
+            with pytest.raises(ValueError):
+                index.search(query)
+        assert _QueryParser("H.R. 12").parse() == ("and", ("phrase", ["h", "r"]), ("phrase", ["12"]))
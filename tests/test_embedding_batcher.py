@@ -0,0 +1,116 @@
+"""Tests for the query embedding micro-batcher."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from embedding_batcher import EmbeddingBatcher
+
+
+class FakeEncoder:
+    """Records each encode call and embeds a text as [len(text), 1]."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts])
+
+
+class TestEmbeddingBatcher:
+    """Test cases for EmbeddingBatcher."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_encode(self):
+        """Test queries arriving together are encoded in one call."""
+        encoder = FakeEncoder()
+        batcher = EmbeddingBatcher(encoder, max_batch_size=16, max_wait_ms=20)
+
+        results = await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 6)))
+
+        assert encoder.calls == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+        assert [r[0] for r in results] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_flushes_early(self):
+        """Test a full batch is encoded without waiting for the window."""
+        encoder = FakeEncoder()
+        batcher = EmbeddingBatcher(encoder, max_batch_size=2, max_wait_ms=10_000)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(t) for t in ["a", "bb", "ccc", "dddd"])), timeout=2
+        )
+
+        assert encoder.calls == [["a", "bb"], ["ccc", "dddd"]]
+        assert [r[0] for r in results] == [1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_separate_windows_make_separate_batches(self):
+        """Test queries far apart in time are not held back for each other."""
+        encoder = FakeEncoder()
+        batcher = EmbeddingBatcher(encoder, max_batch_size=16, max_wait_ms=1)
+
+        await batcher.embed("first")
+        await batcher.embed("second")
+
+        assert encoder.calls == [["first"], ["second"]]
+
+    @pytest.mark.asyncio
+    async def test_encode_error_reaches_every_caller(self):
+        """Test a failed encode fails all futures in the batch."""
+        def broken(texts):
+            raise RuntimeError("model exploded")
+
+        batcher = EmbeddingBatcher(broken, max_wait_ms=1)
+
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_short_encode_fails_every_caller(self):
+        """Test an encode returning too few rows fails the batch instead of hanging it."""
+        batcher = EmbeddingBatcher(lambda texts: np.ones((1, 2)), max_wait_ms=1)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True), timeout=2
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_metrics(self):
+        """Test per-batch size and wait metrics are recorded."""
+        batcher = EmbeddingBatcher(FakeEncoder(), max_batch_size=3, max_wait_ms=5)
+
+        await batcher.embed_many(["a", "b", "c", "d"])
+
+        stats = batcher.stats()
+        assert stats["batches"] == 2
+        assert stats["items"] == 4
+        assert stats["mean_batch_size"] == 2.0
+        assert stats["recent_max_batch_size"] == 3
+        assert [r.size for r in batcher.recent] == [3, 1]
+        assert batcher.recent[1].wait_ms >= 4
+
+    @pytest.mark.asyncio
+    async def test_in_flight_batches_are_referenced(self):
+        """Test a running batch task is held until it finishes."""
+        release = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def slow(texts):
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+            return np.array([[1.0, 1.0] for _ in texts])
+
+        batcher = EmbeddingBatcher(slow, max_batch_size=1)
+        pending = asyncio.ensure_future(batcher.embed("a"))
+        await asyncio.sleep(0.01)
+
+        assert len(batcher._tasks) == 1
+        release.set()
+        await asyncio.wait_for(pending, timeout=2)
+        await asyncio.sleep(0)
+        assert not batcher._tasks
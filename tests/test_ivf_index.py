@@ -0,0 +1,156 @@
+"""Tests for the IVF approximate nearest-neighbour index."""
+
+import numpy as np
+import pytest
+
+from ivf_index import IVFIndex
+from vector_index import VectorIndex
+from vector_store import append_to_store, normalize_rows, write_store
+
+
+def _clustered(n, dim=16, clusters=20, seed=0):
+    """Unit vectors scattered around a few random directions."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    return normalize_rows(points)
+
+
+def _exact_top(embeddings, query, k):
+    scores = embeddings @ query
+    return set(np.argsort(-scores)[:k].tolist())
+
+
+class TestIVFIndex:
+    """Test cases for IVFIndex."""
+
+    @pytest.fixture
+    def embeddings(self):
+        return _clustered(2000)
+
+    @pytest.fixture
+    def queries(self):
+        return _clustered(20, seed=1)
+
+    def test_build_indexes_every_row_once(self, embeddings):
+        """Test every row lands in exactly one list."""
+        index = IVFIndex(nlist=16)
+        index.build(embeddings)
+
+        rows = np.concatenate(index._lists)
+        assert len(index) == len(embeddings)
+        assert sorted(rows.tolist()) == list(range(len(embeddings)))
+        np.testing.assert_allclose(np.linalg.norm(index.centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_full_probe_is_exact(self, embeddings, queries):
+        """Test scanning every list returns the exact top k."""
+        index = IVFIndex(nlist=16)
+        index.build(embeddings)
+
+        for query in queries:
+            rows, scores = index.search(embeddings, query, 10, nprobe=16)
+            assert set(rows.tolist()) == _exact_top(embeddings, query, 10)
+            assert np.all(np.diff(scores) <= 0)
+
+    def test_recall_improves_with_nprobe(self, embeddings, queries):
+        """Test nprobe trades scanned rows for recall."""
+        index = IVFIndex(nlist=32)
+        index.build(embeddings)
+
+        def recall(nprobe):
+            hits = 0
+            for query in queries:
+                rows, _ = index.search(embeddings, query, 10, nprobe=nprobe)
+                hits += len(set(rows.tolist()) & _exact_top(embeddings, query, 10))
+            return hits / (10 * len(queries))
+
+        assert len(index.candidates(queries[0], nprobe=4)) < len(embeddings)
+        assert recall(8) >= 0.9
+        assert recall(32) == 1.0
+        assert recall(8) >= recall(1)
+
+    def test_add_without_retraining(self, embeddings):
+        """Test incrementally added rows are searchable and keep their row ids."""
+        index = IVFIndex(nlist=16)
+        index.build(embeddings[:1500])
+        centroids = index.centroids
+
+        index.add(embeddings[1500:], start_row=1500)
+
+        assert index.centroids is centroids
+        assert len(index) == 2000
+        rows, _ = index.search(embeddings, embeddings[1800], 1, nprobe=4)
+        assert rows[0] == 1800
+
+    def test_copy_is_independent(self, embeddings):
+        """Test add() on a copy leaves the original untouched."""
+        index = IVFIndex(nlist=8)
+        index.build(embeddings[:1000])
+
+        copy = index.copy()
+        copy.add(embeddings[1000:], start_row=1000)
+
+        assert len(index) == 1000
+        assert np.concatenate(index._lists).max() < 1000
+
+
+class TestVectorIndexANN:
+    """Test VectorIndex switching between exact and IVF search."""
+
+    def _write(self, path, embeddings):
+        write_store(
+            path, embeddings,
+            [{"source": f"{i}.txt"} for i in range(len(embeddings))],
+            [str(i) for i in range(len(embeddings))],
+        )
+
+    def test_small_corpus_stays_exact(self, temp_dir):
+        """Test no IVF index is built below ann_min_rows."""
+        self._write(temp_dir / "store", _clustered(100))
+        index = VectorIndex(temp_dir / "store", ann_min_rows=500)
+        index.load()
+
+        assert index.ann is None
+
+    def test_large_corpus_uses_ivf(self, temp_dir):
+        """Test IVF search finds a stored vector as its own nearest neighbour."""
+        embeddings = _clustered(1000)
+        self._write(temp_dir / "store", embeddings)
+        index = VectorIndex(temp_dir / "store", ann_min_rows=500, nprobe=4)
+        index.load()
+
+        assert index.ann is not None
+        result = index.search(embeddings[123], k=1)
+        assert result[0]["metadata"]["source"] == "123.txt"
+        assert index.search(embeddings[123], k=1, strategy="exact") == result
+
+    def test_append_extends_ivf_incrementally(self, temp_dir):
+        """Test an appended generation is added to the existing IVF lists."""
+        embeddings = _clustered(1200)
+        store = temp_dir / "store"
+        self._write(store, embeddings[:1000])
+        index = VectorIndex(store, ann_min_rows=500, nprobe=4)
+        index.load()
+        centroids = index.ann.centroids
+
+        append_to_store(store, embeddings[1000:], [{"source": f"{i}.txt"} for i in range(1000, 1200)],
+                        [str(i) for i in range(1000, 1200)])
+        assert index.refresh() is True
+
+        assert index.ann.centroids is centroids
+        assert len(index.ann) == 1200
+        assert index.search(embeddings[1100], k=1)[0]["metadata"]["source"] == "1100.txt"
+
+    def test_rewrite_retrains(self, temp_dir):
+        """Test a non-append rewrite rebuilds the IVF index."""
+        store = temp_dir / "store"
+        self._write(store, _clustered(1000))
+        index = VectorIndex(store, ann_min_rows=500)
+        index.load()
+        first = index.ann
+
+        self._write(store, _clustered(800, seed=3))
+        index.refresh()
+
+        assert index.ann is not first
+        assert len(index.ann) == 800
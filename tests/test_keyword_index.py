@@ -0,0 +1,127 @@
+"""Tests for the BM25 keyword index and hybrid search."""
+
+import numpy as np
+import pytest
+
+from keyword_index import KEYWORD_POSTINGS_FILE, BM25Index, KeywordPostings, reciprocal_rank_fusion, tokenize
+from vector_index import VectorIndex
+from vector_store import append_to_store, delete_rows, open_store, write_store
+
+TEXTS = [
+    "The Clean Water Act amends section 404 of the code.",
+    "Appropriations for the Department of Energy.",
+    "A resolution honoring Senator Jane Doe for her service.",
+    "Amends the tax code to expand the water credit.",
+]
+
+
+def test_tokenize():
+    """Test tokens are case-folded words and numbers without stopwords."""
+    assert tokenize("The Clean-Water Act, §404(b)!") == ["clean", "water", "act", "404", "b"]
+
+
+def test_postings_round_trip(temp_dir):
+    """Test postings survive save and load unchanged."""
+    postings = KeywordPostings.from_texts(TEXTS)
+    postings.save(temp_dir)
+    loaded = KeywordPostings.load(temp_dir)
+
+    assert len(loaded) == 4
+    assert {term: rows.tolist() for term, rows, _ in loaded.postings()}["water"] == [0, 3]
+    assert KeywordPostings.load(temp_dir / "missing") is None
+
+
+class TestBM25Index:
+    """Test cases for BM25Index."""
+
+    @pytest.fixture
+    def index(self):
+        return BM25Index().extended(KeywordPostings.from_texts(TEXTS), 0)
+
+    def test_rare_terms_rank_first(self, index):
+        """Test a row matching the rarer terms outranks one matching a common term."""
+        rows, scores = index.top_k("water act section 404", 4)
+
+        assert rows.tolist() == [0, 3]
+        assert scores[0] > scores[1] > 0
+
+    def test_no_match_and_live_mask(self, index):
+        """Test unknown terms return nothing and masked rows are skipped."""
+        live = np.array([False, True, True, True])
+
+        assert len(index.top_k("zebra", 3)[0]) == 0
+        assert index.top_k("water", 3, live)[0].tolist() == [3]
+
+    def test_extended_matches_build(self, index):
+        """Test extending part by part scores like one combined build."""
+        grown = BM25Index().extended(KeywordPostings.from_texts(TEXTS[:2]), 0)
+        grown = grown.extended(KeywordPostings.from_texts(TEXTS[2:]), 2)
+
+        np.testing.assert_allclose(grown.scores("water code doe"), index.scores("water code doe"), rtol=1e-6)
+        with pytest.raises(ValueError):
+            grown.extended(KeywordPostings.from_texts(["x"]), 7)
+
+
+def test_reciprocal_rank_fusion():
+    """Test rows ranked well by both lists win, and ties keep first appearance."""
+    rows, scores = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=3, rrf_k=60)
+
+    assert rows.tolist() == [1, 3, 2]
+    assert scores[0] == pytest.approx(1 / 61 + 1 / 62)
+
+
+class TestHybridSearch:
+    """Test keyword postings in the store and hybrid search in VectorIndex."""
+
+    def _vectors(self, n, seed=0):
+        return np.random.default_rng(seed).normal(size=(n, 8))
+
+    def test_every_part_has_postings(self, temp_dir):
+        """Test the base and appended segments carry their own postings."""
+        write_store(temp_dir / "store", self._vectors(2), [{"source": "a"}] * 2, TEXTS[:2])
+        append_to_store(temp_dir / "store", self._vectors(2, 1), [{"source": "b"}] * 2, TEXTS[2:])
+
+        parts = open_store(temp_dir / "store").parts
+        assert [len(KeywordPostings.load(part)) for part in parts] == [2, 2]
+
+    def test_index_extends_after_append_and_rebuilds_legacy_parts(self, temp_dir):
+        """Test appended rows are searchable, and parts without postings are inverted at load."""
+        store = temp_dir / "store"
+        write_store(store, self._vectors(2), [{"source": "a"}] * 2, TEXTS[:2])
+        (open_store(store).base / KEYWORD_POSTINGS_FILE).unlink()
+        index = VectorIndex(store)
+        index.load()
+        before = index.keywords
+
+        append_to_store(store, self._vectors(2, 1), [{"source": "b"}] * 2, TEXTS[2:])
+        index.refresh()
+
+        assert len(before) == 2 and len(index.keywords) == 4
+        assert index.keyword_top_k("senator doe", 2)[0].tolist() == [2]
+        assert index.keyword_top_k("energy", 2)[0].tolist() == [1]
+
+    def test_hybrid_finds_exact_terms(self, temp_dir):
+        """Test an exact-term match is returned even when its embedding is far off."""
+        vectors = self._vectors(4)
+        query = -vectors[2]  # the chunk naming Senator Doe is the worst cosine match
+        write_store(temp_dir / "store", vectors, [{"source": str(i)} for i in range(4)], TEXTS)
+        index = VectorIndex(temp_dir / "store", hybrid_candidates=2)
+        index.load()
+
+        vector_only = [r["metadata"]["source"] for r in index.search(query, k=2)]
+        hybrid = [r["metadata"]["source"] for r in index.hybrid_search("Senator Jane Doe", query, k=2)]
+
+        assert "2" not in vector_only
+        assert "2" in hybrid
+
+    def test_hybrid_skips_deleted_rows(self, temp_dir):
+        """Test tombstoned rows are excluded from the keyword ranking too."""
+        write_store(temp_dir / "store", self._vectors(4), [{"source": str(i)} for i in range(4)], TEXTS)
+        delete_rows(temp_dir / "store", [2])
+        index = VectorIndex(temp_dir / "store")
+        index.load()
+
+        results = index.hybrid_search("Senator Jane Doe", self._vectors(1)[0], k=4)
+
+        assert "2" not in [r["metadata"]["source"] for r in results]
+        assert len(results) == 3
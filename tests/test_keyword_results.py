@@ -0,0 +1,166 @@
+"""Tests for paged keyword search results."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from bill_text_index import BillTextIndex, KeywordMatch
+from constants import Limits
+from keyword_results import KeywordResultPages, KeywordResultView, bill_pdf_path
+
+
+@pytest.fixture
+def pdf_dir(temp_dir):
+    pdfs = temp_dir / "pdfs"
+    pdfs.mkdir()
+    for i in range(23):
+        (pdfs / f"HR{i}.pdf").write_bytes(b"%PDF-1.4")
+    return pdfs
+
+
+@pytest.fixture
+def matches():
+    return [KeywordMatch(f"HR{i}.txt", hits=30 - i, snippets=["the **water** fund " * 20] * 3) for i in range(25)]
+
+
+def test_bill_pdf_path(pdf_dir):
+    """Test text filenames map to the PDF of the same stem."""
+    assert bill_pdf_path("HR3.txt", pdf_dir) == pdf_dir / "HR3.pdf"
+    assert bill_pdf_path("HR3", pdf_dir) == pdf_dir / "HR3.pdf"
+    assert bill_pdf_path("HR24.txt", pdf_dir) is None
+
+
+def test_pages_hold_at_most_one_message_of_files(matches, pdf_dir):
+    """Test pages are split at the attachment limit and skip missing PDFs."""
+    pages = KeywordResultPages(matches, pdf_dir, header="Results:")
+
+    assert pages.page_count == 3
+    assert [len(pages.files(page)) for page in range(3)] == [Limits.DISCORD_MAX_ATTACHMENTS, 10, 3]
+    assert [match.name for match in pages.page_matches(2)] == ["HR20.txt", "HR21.txt", "HR22.txt", "HR23.txt",
+                                                               "HR24.txt"]
+    assert KeywordResultPages(matches, pdf_dir, page_size=50).page_size == Limits.DISCORD_MAX_ATTACHMENTS
+
+
+def test_render_fits_in_one_message(matches, pdf_dir):
+    """Test long snippets are trimmed to keep a page within Discord's limit."""
+    pages = KeywordResultPages(matches, pdf_dir, header="Results:")
+
+    text = pages.render(2)
+
+    assert len(text) <= Limits.DISCORD_MAX_MESSAGE_LENGTH
+    assert text.startswith("Results:\nPage 3/3 (25 bills)\n21. **HR20.txt** (10 hits)\n> the **water** fund")
+    assert "25. **HR24.txt** (6 hits) (no PDF)" in text
+    assert KeywordResultPages([], pdf_dir).render(0) == "No bills matched."
+
+
+def test_large_pdfs_share_one_upload_budget(matches, pdf_dir):
+    """Test a page stops attaching PDFs once their total would pass the upload limit."""
+    for i in range(4):
+        (pdf_dir / f"HR{i}.pdf").write_bytes(b"%" * 400 * 1024)
+    pages = KeywordResultPages(matches[:4], pdf_dir)
+
+    with patch.object(Limits, "MAX_FILE_SIZE_MB", 1):
+        files = pages.files(0)
+        text = pages.render(0)
+
+    assert [file.filename for file in files] == ["HR0.pdf", "HR1.pdf"]
+    assert "3. **HR2.txt** (28 hits) (PDF too large to attach)" in text
+    assert "4. **HR3.txt** (27 hits) (PDF too large to attach)" in text
+    assert "1. **HR0.txt** (30 hits)\n" in text
+
+
+def test_snippets_cut_per_viewed_page(temp_dir, pdf_dir, monkeypatch):
+    """Test with the index, a page's snippets are read when it is shown and then kept."""
+    bills = temp_dir / "bills"
+    bills.mkdir()
+    for i in range(25):
+        (bills / f"HR{i}.txt").write_text("the water fund " * (30 - i), encoding="utf-8")
+    index = BillTextIndex(temp_dir / "index", bills)
+    index.sync()
+    reads = []
+    original_read = index._read
+    monkeypatch.setattr(index, "_read", lambda name: reads.append(name) or original_read(name))
+
+    matches = index.find("water", max_snippets=0)
+    pages = KeywordResultPages(matches, pdf_dir, index=index, max_snippets=1)
+    assert reads == []
+
+    text = pages.render(1)
+
+    assert reads == [f"HR{i}.txt" for i in range(10, 20)]
+    assert "11. **HR10.txt** (20 hits)\n> the **water** fund" in text
+    pages.render(1)
+    assert len(reads) == 10
+
+
+class TestKeywordResultView:
+    """Test paging through results with the buttons."""
+
+    @pytest.fixture
+    def interaction(self):
+        interaction = Mock()
+        interaction.user.id = 42
+        interaction.response = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+        return interaction
+
+    @pytest.mark.asyncio
+    async def test_send_posts_first_page(self, matches, pdf_dir):
+        """Test the first page goes out as one message with its files and buttons."""
+        view = KeywordResultView(KeywordResultPages(matches, pdf_dir), owner_id=42)
+        channel = AsyncMock()
+
+        await view.send(channel)
+
+        kwargs = channel.send.call_args.kwargs
+        assert len(kwargs["files"]) == 10 and kwargs["view"] is view
+        assert view.previous_page.disabled and not view.next_page.disabled
+
+    @pytest.mark.asyncio
+    async def test_pages_load_snippets_before_sending(self, matches, pdf_dir, interaction):
+        """Test the view cuts each shown page's snippets through the index."""
+        index = Mock()
+        index.snippets_for.side_effect = lambda match, max_snippets: [f"{match.name} snippet"]
+        view = KeywordResultView(KeywordResultPages(matches, pdf_dir, index=index), owner_id=42)
+        channel = AsyncMock()
+
+        await view.send(channel)
+        await view._show(interaction, 1)
+
+        assert index.snippets_for.call_count == 20
+        assert "> HR0.txt snippet" in channel.send.call_args.args[0]
+        assert "> HR10.txt snippet" in interaction.edit_original_response.call_args.kwargs["content"]
+
+    @pytest.mark.asyncio
+    async def test_single_page_has_no_buttons(self, matches, pdf_dir):
+        """Test a short result list is sent without a view."""
+        view = KeywordResultView(KeywordResultPages(matches[:3], pdf_dir), owner_id=42)
+        channel = AsyncMock()
+
+        await view.send(channel)
+
+        assert channel.send.call_args.kwargs["view"] is None
+
+    @pytest.mark.asyncio
+    async def test_buttons_turn_pages(self, matches, pdf_dir, interaction):
+        """Test Next and Previous edit the message with that page's files only."""
+        view = KeywordResultView(KeywordResultPages(matches, pdf_dir), owner_id=42)
+
+        await view._show(interaction, 2)
+
+        kwargs = interaction.edit_original_response.call_args.kwargs
+        assert view.page == 2
+        assert [file.filename for file in kwargs["attachments"]] == ["HR20.pdf", "HR21.pdf", "HR22.pdf"]
+        assert view.next_page.disabled and not view.previous_page.disabled
+        interaction.response.defer.assert_awaited()
+
+        await view._show(interaction, 5)
+        assert view.page == 2
+
+    @pytest.mark.asyncio
+    async def test_only_owner_can_page(self, matches, pdf_dir, interaction):
+        """Test other users get an ephemeral refusal."""
+        view = KeywordResultView(KeywordResultPages(matches, pdf_dir), owner_id=7)
+
+        assert not await view.interaction_check(interaction)
+        assert interaction.response.send_message.call_args.kwargs["ephemeral"]
@@ -0,0 +1,183 @@
+"""Tests for quantized embedding storage and rescoring."""
+
+import numpy as np
+import pytest
+
+from benchmark_vector_search import exact_truth, measure, run_benchmark
+from quantization import INT8_CODES_FILE, BinaryCodes, QuantizedMatrix
+from vector_index import VectorIndex
+from vector_store import append_to_store, compact_store, normalize_rows, open_store, write_store
+
+
+@pytest.fixture
+def embeddings():
+    rng = np.random.default_rng(0)
+    return normalize_rows(rng.normal(size=(500, 32)))
+
+
+class TestQuantizedMatrix:
+    """Test cases for QuantizedMatrix."""
+
+    @pytest.mark.parametrize("kind", ["int8", "float16"])
+    def test_scores_close_to_exact(self, embeddings, kind):
+        """Test quantized dot products stay close to float32 ones."""
+        quantized = QuantizedMatrix.from_float(embeddings, kind)
+        query = embeddings[7]
+
+        np.testing.assert_allclose(quantized.scores(query), embeddings @ query, atol=0.02)
+
+    def test_int8_is_a_quarter_of_float32(self, embeddings):
+        """Test the int8 codes are one byte per value."""
+        quantized = QuantizedMatrix.from_float(embeddings, "int8")
+
+        assert quantized.codes.dtype == np.uint8
+        assert quantized.codes.nbytes * 4 == embeddings.nbytes
+
+    def test_scores_subset_of_rows(self, embeddings):
+        """Test scoring only selected rows."""
+        quantized = QuantizedMatrix.from_float(embeddings, "int8")
+        rows = np.array([3, 10, 400])
+
+        np.testing.assert_allclose(
+            quantized.scores(embeddings[0], rows), quantized.scores(embeddings[0])[rows], rtol=1e-5
+        )
+
+    def test_constant_dimension(self):
+        """Test a dimension with a single value does not divide by zero."""
+        quantized = QuantizedMatrix.from_float(np.array([[1.0, 0.5], [0.0, 0.5]]), "int8")
+
+        np.testing.assert_allclose(quantized.scores(np.array([0.0, 1.0])), [0.5, 0.5], atol=1e-6)
+
+    def test_unknown_kind(self, embeddings):
+        """Test unsupported quantization kinds are rejected."""
+        with pytest.raises(ValueError):
+            QuantizedMatrix.from_float(embeddings, "int4")
+
+
+class TestQuantizedIndex:
+    """Test VectorIndex with quantized first-pass scoring."""
+
+    @pytest.fixture
+    def store_path(self, temp_dir, embeddings):
+        path = temp_dir / "store"
+        write_store(
+            path, embeddings,
+            [{"source": f"{i}.txt"} for i in range(len(embeddings))],
+            [str(i) for i in range(len(embeddings))],
+        )
+        return path
+
+    def test_store_persists_int8_sidecar(self, store_path):
+        """Test each generation carries the int8 codes."""
+        store = open_store(store_path)
+
+        assert (store.base / INT8_CODES_FILE).is_file()
+        assert len(QuantizedMatrix.load(store.base)) == len(store)
+
+    @pytest.mark.parametrize("kind", ["int8", "float16"])
+    def test_rescored_results_match_exact(self, store_path, embeddings, kind):
+        """Test rescoring returns exact scores and the exact top k."""
+        index = VectorIndex(store_path, quantization=kind, rescore_candidates=50)
+        index.load()
+        assert index.quantized.kind == kind
+
+        for query in embeddings[:10]:
+            rows, scores = index.top_k(query, 5)
+            exact_rows, exact_scores = index.top_k(query, 5, strategy="exact")
+            assert rows.tolist() == exact_rows.tolist()
+            np.testing.assert_allclose(scores, exact_scores, rtol=1e-6)
+
+    def test_search_output_format_unchanged(self, store_path, embeddings):
+        """Test search() still returns score/metadata/text dicts."""
+        index = VectorIndex(store_path, quantization="int8")
+        index.load()
+
+        result = index.search(embeddings[42], k=1)[0]
+
+        assert set(result) == {"score", "metadata", "text"}
+        assert result["metadata"]["source"] == "42.txt"
+        assert result["text"] == "42"
+
+    def test_quantization_with_ivf(self, store_path, embeddings):
+        """Test quantized scoring composes with the IVF candidate lists."""
+        index = VectorIndex(store_path, ann_min_rows=100, nprobe=4, quantization="int8")
+        index.load()
+
+        assert index.ann is not None
+        assert index.search(embeddings[99], k=1)[0]["metadata"]["source"] == "99.txt"
+
+    def test_segments_extend_codes_and_compaction_reuses_them(self, store_path, embeddings):
+        """Test appended segments extend the resident codes and compaction keeps them."""
+        index = VectorIndex(store_path, quantization="int8")
+        index.load()
+        base_codes = index.quantized.codes
+        extra = embeddings[:5] + 0.01
+
+        append_to_store(store_path, extra, [{"source": f"x{i}"} for i in range(5)], ["x"] * 5)
+        index.refresh()
+
+        assert len(index.quantized) == len(index.binary) == len(embeddings) + 5
+        np.testing.assert_array_equal(index.quantized.codes[:len(base_codes)], base_codes)
+        assert index.search(extra[3], k=1)[0]["metadata"]["source"] == "x3"
+
+        quantized, binary = index.quantized, index.binary
+        compact_store(store_path)
+        index.refresh()
+
+        assert index.quantized is quantized and index.binary is binary
+        assert index.search(extra[3], k=1)[0]["metadata"]["source"] == "x3"
+
+
+class TestBinaryCodes:
+    """Test cases for the binary sign-bit prefilter."""
+
+    def test_hamming_matches_bit_count(self):
+        """Test the popcount table gives true Hamming distances."""
+        codes = BinaryCodes.from_float(np.array([[1.0] * 8 + [-1.0] * 8, [-1.0] * 16]))
+
+        assert codes.bits.shape == (2, 2)
+        assert BinaryCodes.pack(np.ones((1, 20))).shape == (1, 4)
+        assert codes.hamming(np.array([1.0] * 16)).tolist() == [8, 16]
+
+    def test_candidates_contain_self(self, embeddings):
+        """Test a stored vector is among its own Hamming candidates."""
+        codes = BinaryCodes.from_float(embeddings)
+
+        assert 17 in codes.candidates(embeddings[17], 10)
+
+    def test_binary_strategy_rescores_exactly(self, temp_dir, embeddings):
+        """Test the binary strategy returns exact cosine scores and good recall."""
+        write_store(temp_dir / "store", embeddings, [{"source": str(i)} for i in range(500)],
+                    [""] * 500)
+        index = VectorIndex(temp_dir / "store", binary_candidates=150)
+        index.load()
+        assert len(index.binary) == 500
+
+        queries = embeddings[:20]
+        truth = exact_truth(index, queries, 5)
+        assert measure(index, queries, 5, truth, strategy="binary")["recall"] >= 0.8
+
+        rows, scores = index.top_k(embeddings[3], 5, strategy="binary")
+        np.testing.assert_allclose(scores, embeddings[rows] @ embeddings[3], rtol=1e-5)
+
+    def test_default_strategy_and_validation(self, temp_dir, embeddings):
+        """Test the default strategy is configurable and unknown ones are rejected."""
+        write_store(temp_dir / "store", embeddings, [{"source": str(i)} for i in range(500)],
+                    [""] * 500)
+        index = VectorIndex(temp_dir / "store", strategy="binary", binary_candidates=5)
+        index.load()
+
+        rows, _ = index.top_k(embeddings[0], 5)
+        assert set(rows.tolist()) <= set(index.binary.candidates(embeddings[0], 5).tolist())
+        with pytest.raises(ValueError):
+            index.top_k(embeddings[0], 5, strategy="lsh")
+
+    def test_benchmark_reports_every_strategy(self, temp_dir, embeddings):
+        """Test the benchmark runs all configurations with exact recall 1.0."""
+        write_store(temp_dir / "store", embeddings, [{"source": str(i)} for i in range(500)],
+                    [""] * 500)
+
+        results = run_benchmark(str(temp_dir / "store"), embeddings[:5], k=5)
+
+        assert results[0] == {"config": "exact", "recall": 1.0, "ms_per_query": results[0]["ms_per_query"]}
+        assert {"int8 + rescore", "binary candidates=300"} <= {r["config"] for r in results}
@@ -0,0 +1,218 @@
+"""Tests for BillRepository and its catalog."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from models import Bill, BillType
+from repositories import BillRepository
+from repositories.bill_catalog import CATALOG_FILE, BillCatalog, BillCatalogEntry
+
+
+def _bill(number, title, bill_type=BillType.HR, sponsor=None):
+    return Bill(
+        identifier=f"{bill_type.value}-{number}",
+        title=title,
+        bill_type=bill_type,
+        reference_number=number,
+        text_content=f"Full text of {title}.",
+        sponsor=sponsor,
+    )
+
+
+class TestBillRepository:
+    """Test cases for BillRepository."""
+
+    @pytest.fixture
+    def dirs(self, temp_dir):
+        return {"text_dir": temp_dir / "txts", "pdf_dir": temp_dir / "pdfs", "metadata_dir": temp_dir / "meta"}
+
+    @pytest.fixture
+    def repository(self, dirs):
+        return BillRepository(**dirs)
+
+    @pytest.mark.asyncio
+    async def test_save_and_find(self, repository):
+        """Test a saved bill is found by identifier and listed in the catalog."""
+        await repository.save(_bill(12, "Clean Water Act", sponsor="Rep. Smith"))
+
+        found = await repository.find_by_id("hr-12")
+        entries = await repository.list_entries()
+
+        assert found.title == "Clean Water Act" and found.text_content == "Full text of Clean Water Act."
+        assert [(e.identifier, e.title, e.sponsor) for e in entries] == [("hr-12", "Clean Water Act", "Rep. Smith")]
+        assert entries[0].metadata_path.endswith("hr12.json")
+        assert await repository.exists("hr-12")
+
+    @pytest.mark.asyncio
+    async def test_listing_reads_only_matching_bills(self, repository):
+        """Test type and title queries filter on the catalog before loading bills."""
+        await repository.save(_bill(1, "Clean Water Act"))
+        await repository.save(_bill(2, "Farm Bill"))
+        await repository.save(_bill(3, "Water Rights Act", bill_type=BillType.S))
+
+        with patch.object(repository, "_load_json_sync", wraps=repository._load_json_sync) as load_json:
+            by_title = await repository.find_by_title_contains("water")
+            by_type = await repository.find_by_type(BillType.S)
+
+        assert sorted(b.identifier for b in by_title) == ["hr-1", "s-3"]
+        assert [b.identifier for b in by_type] == ["s-3"]
+        assert load_json.call_count == 3
+        assert len(await repository.find_all()) == 3
+
+    @pytest.mark.asyncio
+    async def test_catalog_persists_and_delete_updates_it(self, repository, dirs):
+        """Test a new repository reads the catalog file, and delete removes the row and files."""
+        await repository.save(_bill(1, "Clean Water Act"))
+        await repository.save(_bill(2, "Farm Bill"))
+
+        assert await repository.delete("hr-1")
+
+        reopened = BillRepository(**dirs)
+        assert [e.identifier for e in await reopened.list_entries()] == ["hr-2"]
+        assert not (dirs["metadata_dir"] / "hr1.json").exists()
+        assert not (dirs["text_dir"] / "hr1.txt").exists()
+        assert not await reopened.delete("hr-1")
+
+    @pytest.mark.asyncio
+    async def test_catalog_is_rebuilt_from_bill_files(self, repository, dirs):
+        """Test a missing or corrupt catalog is rebuilt once, including legacy text-only bills."""
+        await repository.save(_bill(7, "Budget Act"))
+        (dirs["text_dir"] / "s-9.txt").write_text("A legacy senate bill.", encoding="utf-8")
+        (dirs["metadata_dir"] / CATALOG_FILE).write_text("{not json", encoding="utf-8")
+
+        reopened = BillRepository(**dirs)
+        entries = await reopened.list_entries()
+
+        assert [(e.identifier, e.metadata_path is None) for e in entries] == [("hr-7", False), ("s-9", True)]
+        legacy = await reopened.find_by_id("s-9")
+        assert legacy.bill_type == BillType.S and legacy.text_content == "A legacy senate bill."
+        with open(dirs["metadata_dir"] / CATALOG_FILE, encoding="utf-8") as f:
+            assert len(json.load(f)["bills"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_catalog_write_keeps_old_rows(self, repository):
+        """Test the in-memory catalog only changes once its file has been written."""
+        await repository.save(_bill(1, "Clean Water Act"))
+
+        with patch.object(repository.catalog, "_write", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                await repository.save(_bill(2, "Farm Bill"))
+
+        assert [e.identifier for e in await repository.list_entries()] == ["hr-1"]
+
+    @pytest.mark.asyncio
+    async def test_save_pdf_updates_the_bill(self, repository):
+        """Test attaching a PDF records its path on the bill and in the catalog."""
+        await repository.save(_bill(4, "Energy Act"))
+
+        pdf_path = await repository.save_pdf("hr-4", b"%PDF-1.4")
+
+        assert (await repository.find_by_id("hr-4")).pdf_path == pdf_path
+        assert (await repository.list_entries())[0].pdf_path == pdf_path
+
+    @pytest.mark.asyncio
+    async def test_text_is_stored_once_and_loaded_lazily(self, repository, dirs):
+        """Test metadata only points at the text file, which is read on first access."""
+        await repository.save(_bill(5, "Tax Act"))
+        with open(dirs["metadata_dir"] / "hr5.json", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        bill = await repository.find_by_id("hr-5")
+
+        assert "text_content" not in metadata and metadata["text_path"].endswith("hr5.txt")
+        assert not bill.text_loaded
+        assert await repository.load_text(bill) == "Full text of Tax Act."
+        assert bill.text_loaded
+
+    @pytest.mark.asyncio
+    async def test_saving_an_unloaded_bill_keeps_its_text_file(self, repository):
+        """Test re-saving a bill whose body was never read doesn't rewrite the text."""
+        await repository.save(_bill(6, "Energy Act"))
+
+        with patch.object(repository, "_save_text_sync") as save_text:
+            await repository.save_pdf("hr-6", b"%PDF-1.4")
+
+        save_text.assert_not_called()
+        assert (await repository.find_by_id("hr-6")).text_content == "Full text of Energy Act."
+
+    @pytest.mark.asyncio
+    async def test_old_metadata_is_migrated(self, dirs):
+        """Test metadata embedding the text is split up when an old catalog is found."""
+        dirs["metadata_dir"].mkdir(parents=True)
+        old = _bill(8, "Old Act").to_dict()
+        (dirs["metadata_dir"] / "hr8.json").write_text(json.dumps(old), encoding="utf-8")
+        (dirs["metadata_dir"] / CATALOG_FILE).write_text(json.dumps({"format_version": 1, "bills": []}),
+                                                         encoding="utf-8")
+
+        repository = BillRepository(**dirs)
+        bill = await repository.find_by_id("hr-8")
+
+        with open(dirs["metadata_dir"] / "hr8.json", encoding="utf-8") as f:
+            assert "text_content" not in json.load(f)
+        assert (dirs["text_dir"] / "hr8.txt").read_text(encoding="utf-8") == "Full text of Old Act."
+        assert bill.text_content == "Full text of Old Act."
+        assert await repository.migrate_metadata() == 0
+
+    @pytest.mark.asyncio
+    async def test_find_by_sponsor_and_reference_range(self, repository):
+        """Test the new index-backed queries."""
+        await repository.save(_bill(3, "Clean Water Act", sponsor="Rep. Jane  Smith"))
+        await repository.save(_bill(12, "Farm Bill", sponsor="Sen. Lee"))
+        await repository.save(_bill(7, "Water Rights Act", bill_type=BillType.S, sponsor="rep. jane smith"))
+
+        assert [b.identifier for b in await repository.find_by_sponsor("REP. JANE SMITH")] == ["hr-3", "s-7"]
+        assert [b.identifier for b in await repository.find_by_sponsor("lee")] == ["hr-12"]
+        assert [b.identifier for b in await repository.find_by_reference_range(3, 7)] == ["hr-3", "s-7"]
+        assert [b.identifier for b in await repository.find_by_reference_range(low=4, bill_type=BillType.HR)] == [
+            "hr-12"]
+
+
+def _entry(identifier, title, number, bill_type="hr", sponsor=None):
+    return BillCatalogEntry(identifier, title, bill_type, number, sponsor, None, None, None,
+                            "2025-01-01T00:00:00", "2025-01-01T00:00:00")
+
+
+class TestBillCatalogIndexes:
+    """Test the catalog's secondary indexes."""
+
+    @pytest.fixture
+    def catalog(self, temp_dir):
+        catalog = BillCatalog(temp_dir / CATALOG_FILE)
+        catalog.replace_all([
+            _entry("hr-1", "Clean Water Act", 1, sponsor="Rep. Smith"),
+            _entry("hr-2", "Underwater Mining Act", 2),
+            _entry("s-3", "Water Rights (Amendment) Act", 3, bill_type="s", sponsor="Sen. Lee"),
+            _entry("hr-4", "Farm Bill", 4),
+        ])
+        return catalog
+
+    def test_title_fragments(self, catalog):
+        """Test fragments match like a substring search, whatever their word boundaries."""
+        def ids(fragment):
+            return [entry.identifier for entry in catalog.title_contains(fragment)]
+
+        assert ids("water") == ["hr-1", "hr-2", "s-3"]
+        assert ids("ater Act") == ["hr-1"]
+        assert ids(" water") == ["hr-1"]
+        assert ids("water ") == ["hr-1", "hr-2", "s-3"]
+        assert ids("rights (amend") == ["s-3"]
+        assert ids("act farm") == []
+        assert ids("  ") == []
+
+    def test_indexes_follow_changes(self, catalog):
+        """Test upserts and removals update every index."""
+        catalog.upsert(_entry("hr-2", "Mining Safety Act", 20, sponsor="Rep. Smith"))
+        catalog.remove("hr-1")
+
+        assert [e.identifier for e in catalog.title_contains("water")] == ["s-3"]
+        assert [e.identifier for e in catalog.title_contains("mining s")] == ["hr-2"]
+        assert [e.identifier for e in catalog.by_sponsor("rep. smith")] == ["hr-2"]
+        assert [e.identifier for e in catalog.by_type("hr")] == ["hr-2", "hr-4"]
+        assert [e.reference_number for e in catalog.by_reference_range(2)] == [3, 4, 20]
+        assert "clean" not in catalog._title_words
+
+        reloaded = BillCatalog(catalog.path)
+        assert reloaded.load()
+        assert [e.identifier for e in reloaded.by_reference_range(high=4)] == ["s-3", "hr-4"]
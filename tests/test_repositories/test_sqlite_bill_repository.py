@@ -0,0 +1,155 @@
+"""Tests for SqliteBillRepository."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from models import Bill, BillType
+from repositories import BillRepository, SqliteBillRepository
+
+
+def _bill(number, title, bill_type=BillType.HR, sponsor=None, text=None):
+    return Bill(
+        identifier=f"{bill_type.value}-{number}",
+        title=title,
+        bill_type=bill_type,
+        reference_number=number,
+        text_content=text or f"Full text of {title}.",
+        sponsor=sponsor,
+    )
+
+
+class TestSqliteBillRepository:
+    """Test cases for SqliteBillRepository."""
+
+    @pytest.fixture
+    def repository(self, temp_dir):
+        repository = SqliteBillRepository(temp_dir / "bills.db", temp_dir / "pdfs", readers=2)
+        yield repository
+        repository.close()
+
+    @pytest.mark.asyncio
+    async def test_save_find_and_delete(self, repository):
+        """Test the Repository interface round-trips a bill."""
+        bill = _bill(12, "Clean Water Act", sponsor="Rep. Smith")
+        bill.metadata = {"session": 3}
+        await repository.save(bill)
+
+        found = await repository.find_by_id("hr-12")
+
+        assert (found.title, found.sponsor, found.metadata) == ("Clean Water Act", "Rep. Smith", {"session": 3})
+        assert found.created_at == bill.created_at
+        assert await repository.exists("hr-12") and await repository.count() == 1
+        assert await repository.delete("hr-12")
+        assert not await repository.exists("hr-12")
+        assert not await repository.delete("hr-12")
+
+    @pytest.mark.asyncio
+    async def test_text_is_loaded_lazily(self, repository):
+        """Test bills come back without their text until it is used."""
+        await repository.save(_bill(5, "Tax Act"))
+
+        bill = await repository.find_by_id("hr-5")
+
+        assert not bill.text_loaded
+        assert await repository.load_text(bill) == "Full text of Tax Act."
+        assert bill.text_loaded
+
+    @pytest.mark.asyncio
+    async def test_lazy_texts_are_read_off_the_event_loop(self, repository):
+        """Test saving unloaded bills doesn't read their bodies on the loop thread."""
+        loop_thread = threading.get_ident()
+        reader_threads = []
+
+        def load_text():
+            reader_threads.append(threading.get_ident())
+            return "Full text of Tax Act."
+
+        bill = _bill(5, "Tax Act")
+        bill.text_content = load_text
+        await repository.save_many([bill])
+
+        assert reader_threads and loop_thread not in reader_threads
+        assert (await repository.find_by_id("hr-5")).text_content == "Full text of Tax Act."
+
+    @pytest.mark.asyncio
+    async def test_queries(self, repository):
+        """Test type, title, sponsor and reference-number queries."""
+        await repository.save_many([
+            _bill(3, "Clean Water Act", sponsor="Rep. Jane Smith"),
+            _bill(12, "Farm Bill", sponsor="Sen. Lee"),
+            _bill(7, "Water Rights 100% Act", bill_type=BillType.S, sponsor="rep. jane smith"),
+        ])
+
+        def ids(bills):
+            return [b.identifier for b in bills]
+
+        assert ids(await repository.find_by_type(BillType.HR)) == ["hr-3", "hr-12"]
+        assert ids(await repository.find_by_title_contains("WATER")) == ["hr-3", "s-7"]
+        assert ids(await repository.find_by_title_contains("100%")) == ["s-7"]
+        assert ids(await repository.find_by_sponsor("Jane Smith")) == ["hr-3", "s-7"]
+        assert ids(await repository.find_by_reference_range(3, 7)) == ["hr-3", "s-7"]
+        assert ids(await repository.find_by_reference_range(low=4, bill_type=BillType.HR)) == ["hr-12"]
+
+    @pytest.mark.asyncio
+    async def test_full_text_search_follows_changes(self, repository):
+        """Test FTS5 search ranks matches and sees updates and deletions."""
+        await repository.save_many([
+            _bill(1, "Clean Water Act", text="Funds water treatment. Water quality standards."),
+            _bill(2, "Farm Bill", text="Crop subsidies and irrigation water."),
+            _bill(3, "Energy Act", text="Solar grants."),
+        ])
+
+        assert [b.identifier for b in await repository.search_text("water")] == ["hr-1", "hr-2"]
+        assert [b.identifier for b in await repository.search_text('"water quality"')] == ["hr-1"]
+        assert [b.identifier for b in await repository.search_text("subsidy")] == ["hr-2"]  # stemmed
+
+        await repository.save(_bill(3, "Energy Act", text="Hydro power from water."))
+        await repository.delete("hr-2")
+
+        assert sorted(b.identifier for b in await repository.search_text("water")) == ["hr-1", "hr-3"]
+        assert await repository.search_text("solar") == []
+        with pytest.raises(ValueError):
+            await repository.search_text('"unterminated')
+
+    @pytest.mark.asyncio
+    async def test_failed_write_rolls_back(self, repository):
+        """Test a batch that fails part way leaves nothing behind."""
+        broken = _bill(2, "Farm Bill")
+        broken.metadata = {"bad": object()}
+
+        with pytest.raises(TypeError):
+            await repository.save_many([_bill(1, "Clean Water Act"), broken])
+
+        assert await repository.count() == 0
+        await repository.save(_bill(1, "Clean Water Act"))
+        assert await repository.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_save_pdf(self, repository):
+        """Test attaching a PDF records its path."""
+        await repository.save(_bill(4, "Energy Act"))
+
+        pdf_path = await repository.save_pdf("hr-4", b"%PDF-1.4")
+
+        assert (await repository.find_by_id("hr-4")).pdf_path == pdf_path
+
+    @pytest.mark.asyncio
+    async def test_import_from_file_repository(self, repository, temp_dir):
+        """Test bills stored as txt/json files are copied with their text."""
+        files = BillRepository(temp_dir / "txts", temp_dir / "pdfs", temp_dir / "meta")
+        await files.save(_bill(1, "Clean Water Act"))
+        await files.save(_bill(2, "Senate Farm Bill", bill_type=BillType.S))
+
+        assert await repository.import_from(files) == 2
+        assert (await repository.find_by_id("s-2")).text_content == "Full text of Senate Farm Bill."
+        assert [b.identifier for b in await repository.search_text("farm")] == ["s-2"]
+
+    def test_database_uses_wal(self, repository, temp_dir):
+        """Test the database is in WAL mode, so reads don't block the writer."""
+        connection = sqlite3.connect(temp_dir / "bills.db")
+        try:
+            assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            connection.close()
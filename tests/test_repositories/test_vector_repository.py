@@ -0,0 +1,255 @@
+"""Tests for VectorRepository."""
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from models import VectorEmbedding
+from repositories import VectorRepository
+from repositories import vector as vector_module
+from vector_store import append_to_store, compact_store, open_store, read_manifest, write_store
+
+
+class TestVectorRepository:
+    """Test cases for VectorRepository."""
+
+    @pytest.fixture
+    def repository(self, temp_dir):
+        """Create a VectorRepository instance."""
+        return VectorRepository(temp_dir / "vector_store")
+
+    @pytest.fixture
+    def embeddings(self):
+        """A few embeddings pointing in different directions."""
+        return [
+            VectorEmbedding(text="budget act", embedding=[2.0, 0.0, 0.0], source="bill:hr-1"),
+            VectorEmbedding(text="budget amendment", embedding=[1.0, 1.0, 0.0], source="bill:hr-2"),
+            VectorEmbedding(text="senate rules", embedding=[0.0, 0.0, 5.0], source="knowledge:rules"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_save_batch_and_search(self, repository, embeddings):
+        """Test cosine search ranks the closest vectors first."""
+        await repository.save_batch(embeddings)
+
+        results = await repository.search_similar([1.0, 0.2, 0.0], top_k=2)
+
+        assert [e.source for e, _ in results] == ["bill:hr-1", "bill:hr-2"]
+        assert results[0][1] > results[1][1]
+        assert results[0][1] == pytest.approx(1.0 / np.sqrt(1.04), rel=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_vectors_persisted_normalized(self, repository, embeddings):
+        """Test the store is flagged normalized and holds unit-length rows."""
+        await repository.save_batch(embeddings)
+
+        assert read_manifest(repository.store_path)["normalized"] is True
+        store = open_store(repository.store_path)
+        np.testing.assert_allclose(np.linalg.norm(store.embeddings, axis=1), 1.0, rtol=1e-6)
+        assert store.texts == ["budget act", "budget amendment", "senate rules"]
+
+    @pytest.mark.asyncio
+    async def test_reads_rows_written_by_embedder(self, repository):
+        """Test rows written by embed_txt_file (flat metadata) are readable."""
+        write_store(
+            repository.store_path,
+            np.array([[0.0, 1.0, 0.0]]),
+            [{"source": "hr12.txt", "chunk_index": 0}],
+            ["chunk text"],
+        )
+
+        found = await repository.find_by_id("hr12.txt")
+
+        assert found.text == "chunk text"
+        assert found.metadata == {"chunk_index": 0}
+
+    @pytest.mark.asyncio
+    async def test_sees_writes_from_other_writers(self, repository, embeddings):
+        """Test the repository picks up a new store generation."""
+        await repository.save_batch(embeddings[:1])
+        assert len(await repository.find_all()) == 1
+
+        write_store(repository.store_path, np.array([[0.0, 0.0, 1.0]]), [{"source": "other"}], ["x"])
+
+        assert [e.source for e in await repository.find_all()] == ["other"]
+
+    @pytest.mark.asyncio
+    async def test_find_and_delete(self, repository, embeddings):
+        """Test lookups and deletes by source."""
+        await repository.save_batch(embeddings)
+
+        assert await repository.exists("bill:hr-2")
+        found = await repository.find_by_id("bill:hr-2")
+        assert found.text == "budget amendment"
+
+        assert await repository.delete_by_source_prefix("bill:") == 2
+        assert not await repository.exists("bill:hr-1")
+        remaining = await repository.find_all()
+        assert [e.source for e in remaining] == ["knowledge:rules"]
+
+    @pytest.mark.asyncio
+    async def test_prefix_lookup_respects_boundaries(self, repository):
+        """Test prefix lookups and deletes only touch matching sources."""
+        sources = ["bill:hr-12", "bill:hr-1", "bill:hr-123", "bill:s-1", "bill:hr-1"]
+        await repository.save_batch([
+            VectorEmbedding(text=str(i), embedding=[1.0, float(i), 0.0], source=source)
+            for i, source in enumerate(sources)
+        ])
+
+        found = await repository.find_by_source_prefix("bill:hr-12")
+        assert [e.text for e in found] == ["0", "2"]
+
+        assert await repository.delete("bill:hr-1") is True
+        assert [e.text for e in await repository.find_by_source_prefix("bill:hr-1")] == ["0", "2", "4"]
+        assert await repository.delete_by_source_prefix("bill:hr-1") == 3
+        assert [e.source for e in await repository.find_all()] == ["bill:s-1"]
+        assert await repository.delete("bill:hr-1") is False
+
+    @pytest.mark.asyncio
+    async def test_reindex_bill(self, repository, embeddings):
+        """Test deleting a bill's rows and saving new ones, then deleting everything."""
+        await repository.save_batch(embeddings)
+
+        assert await repository.delete_by_source_prefix("bill:hr-1") == 1
+        await repository.save(VectorEmbedding(text="budget act v2", embedding=[2.0, 0.0, 0.0], source="bill:hr-1"))
+
+        assert (await repository.find_by_id("bill:hr-1")).text == "budget act v2"
+        assert await repository.delete_by_source_prefix("") == 3
+        assert await repository.find_all() == []
+
+    @pytest.mark.asyncio
+    async def test_writes_bump_generation(self, repository, embeddings):
+        """Test save, save_batch and delete each produce a new store generation."""
+        await repository.save_batch(embeddings[:2])
+        after_batch = read_manifest(repository.store_path)["generation"]
+        await repository.save(embeddings[2])
+        after_save = read_manifest(repository.store_path)["generation"]
+        await repository.delete("bill:hr-1")
+        after_delete = read_manifest(repository.store_path)["generation"]
+
+        assert after_batch < after_save < after_delete
+
+    @pytest.mark.asyncio
+    async def test_saves_append_segments_and_compact_in_background(self, temp_dir, embeddings):
+        """Test saves add segments and a background task merges them past the limit."""
+        repository = VectorRepository(temp_dir / "vector_store", max_segments=2)
+        for entity in embeddings:
+            await repository.save(entity)
+        assert len(read_manifest(repository.store_path)["segments"]) == 2
+
+        await repository.save(VectorEmbedding(text="extra", embedding=[0.0, 1.0, 0.0], source="bill:hr-3"))
+        await repository.wait_for_compaction()
+
+        manifest = read_manifest(repository.store_path)
+        assert manifest["segments"] == [] and manifest["count"] == 4
+        results = await repository.search_similar([0.0, 1.0, 0.0], top_k=1)
+        assert results[0][0].source == "bill:hr-3"
+
+    @pytest.mark.asyncio
+    async def test_outside_appends_compact_in_background(self, temp_dir):
+        """Test segments appended by the embedder are merged by the repository's task."""
+        repository = VectorRepository(temp_dir / "vector_store", max_segments=1)
+        for i in range(3):
+            append_to_store(repository.store_path, np.array([[1.0, float(i)]]), [{"source": f"{i}.txt"}], [str(i)])
+        assert len(read_manifest(repository.store_path)["segments"]) == 2
+
+        repository.schedule_compaction()
+        await repository.wait_for_compaction()
+
+        manifest = read_manifest(repository.store_path)
+        assert manifest["segments"] == [] and manifest["count"] == 3
+        assert await repository.exists("2.txt")
+
+    @pytest.mark.asyncio
+    async def test_deletes_are_tombstones_until_compaction(self, temp_dir, embeddings):
+        """Test deletes keep the base and a background compaction drops dead rows."""
+        repository = VectorRepository(temp_dir / "vector_store", max_dead_fraction=0.5)
+        await repository.save_batch(embeddings)
+        base = read_manifest(repository.store_path)["base"]
+
+        assert await repository.delete("bill:hr-1") is True
+        await repository.wait_for_compaction()
+        assert read_manifest(repository.store_path)["base"] == base
+        results = await repository.search_similar([1.0, 0.0, 0.0], top_k=3)
+        assert [e.source for e, _ in results] == ["bill:hr-2", "knowledge:rules"]
+
+        assert await repository.delete("bill:hr-2") is True
+        await repository.wait_for_compaction()
+        manifest = read_manifest(repository.store_path)
+        assert manifest["base"] != base and manifest["count"] == 1
+        assert [e.source for e in await repository.find_all()] == ["knowledge:rules"]
+
+    @pytest.mark.asyncio
+    async def test_delete_by_prefix_does_not_reread_metadata(self, repository, embeddings, monkeypatch):
+        """Test a delete is applied to the current snapshot without parsing the store again."""
+        await repository.save_batch(embeddings)
+        await repository.find_all()
+
+        read = []
+        original_load = json.load
+
+        def recording_load(f, *args, **kwargs):
+            read.append(Path(f.name).name)
+            return original_load(f, *args, **kwargs)
+
+        monkeypatch.setattr(json, "load", recording_load)
+
+        assert await repository.delete_by_source_prefix("bill:") == 2
+        assert "metadata.json" not in read
+        assert [e.source for e in await repository.find_all()] == ["knowledge:rules"]
+
+    @pytest.mark.asyncio
+    async def test_delete_rereads_rows_after_outside_compaction(self, temp_dir, embeddings, monkeypatch):
+        """Test a delete picks its rows again when the store was renumbered under it."""
+        repository = VectorRepository(temp_dir / "vector_store", max_dead_fraction=1.0)
+        await repository.save_batch(embeddings)
+        await repository.delete("bill:hr-1")
+        stale = await repository._snapshot()
+
+        assert compact_store(repository.store_path) is True  # renumbers: hr-2 moves from row 1 to row 0
+        snapshots = [stale]
+        original_snapshot = repository._snapshot
+
+        async def first_stale(blocking=False):
+            return snapshots.pop() if snapshots else await original_snapshot(blocking)
+
+        monkeypatch.setattr(repository, "_snapshot", first_stale)
+
+        assert await repository.delete("knowledge:rules") is True
+        assert [e.source for e in await repository.find_all()] == ["bill:hr-2"]
+
+    @pytest.mark.asyncio
+    async def test_searches_do_not_wait_for_writes(self, repository, embeddings, monkeypatch):
+        """Test concurrent searches complete while a slow save is in progress."""
+        await repository.save_batch(embeddings)
+        release = threading.Event()
+        real_append = vector_module.append_to_store
+
+        def slow_append(*args):
+            release.wait(5)
+            return real_append(*args)
+
+        monkeypatch.setattr(vector_module, "append_to_store", slow_append)
+        save = asyncio.create_task(repository.save(
+            VectorEmbedding(text="new", embedding=[0.0, 1.0, 0.0], source="bill:hr-9")
+        ))
+        await asyncio.sleep(0.05)
+
+        results = await asyncio.wait_for(asyncio.gather(*(
+            repository.search_similar([1.0, 0.0, 0.0], top_k=1) for _ in range(8)
+        )), timeout=2)
+        assert all(r[0][0].source == "bill:hr-1" for r in results)
+        assert not save.done()
+
+        release.set()
+        await save
+        assert (await repository.find_by_id("bill:hr-9")).text == "new"
+
+    @pytest.mark.asyncio
+    async def test_search_empty(self, repository):
+        """Test searching an empty repository."""
+        assert await repository.search_similar([1.0, 0.0, 0.0]) == []
@@ -0,0 +1,231 @@
+"""Tests for the bill search caches."""
+
+import os
+
+import numpy as np
+import pytest
+
+from search_cache import LRUCache, TTLCache, normalize_query
+from vector_store import write_store
+
+
+def test_normalize_query():
+    """Test whitespace and case differences collapse to one key."""
+    assert normalize_query("  What is   HR 12?\n") == normalize_query("what is hr 12?")
+    assert normalize_query("hr 12") != normalize_query("hr 13")
+
+
+class TestLRUCache:
+    """Test cases for LRUCache."""
+
+    def test_get_put_and_counters(self):
+        """Test hits and misses are counted."""
+        cache = LRUCache(maxsize=2)
+
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+
+        assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_zero_size_disables(self):
+        """Test a cache of size 0 stores nothing."""
+        cache = LRUCache(maxsize=0)
+        cache.put("a", 1)
+
+        assert len(cache) == 0
+
+
+class TestTTLCache:
+    """Test cases for TTLCache."""
+
+    def test_entries_expire(self):
+        """Test an entry is a miss once its TTL has passed."""
+        now = [100.0]
+        cache = TTLCache(maxsize=4, ttl_seconds=10, clock=lambda: now[0])
+        cache.put("a", 1)
+
+        now[0] = 109.0
+        assert cache.get("a") == 1
+        now[0] = 110.0
+        assert cache.get("a") is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["expired"], stats["size"]) == (1, 1, 1, 0)
+
+    def test_size_eviction_still_applies(self):
+        """Test the LRU bound holds alongside the TTL."""
+        cache = TTLCache(maxsize=1, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+
+class TestSearchResultCache:
+    """Test the search_bills result cache in geminitools."""
+
+    @pytest.fixture
+    def gt(self, monkeypatch, temp_dir):
+        geminitools = pytest.importorskip("geminitools")
+        store = temp_dir / "store"
+        write_store(store, np.array([[1.0, 0.0]]), [{"source": "a.txt"}], ["a"])
+        monkeypatch.setattr(geminitools, "vector_store_path", str(store))
+        monkeypatch.setattr(geminitools, "_RESULT_CACHE", TTLCache(8, 60))
+        calls = []
+
+        def fake_search(query, top_k, reconstruct, query_embedding=None, filters=None, mode=None):
+            calls.append((query, top_k, reconstruct))
+            return [{"score": 1.0, "metadata": {"source": "a.txt"}, "text": "a"}]
+
+        monkeypatch.setattr(geminitools, "_run_bill_search", fake_search)
+        monkeypatch.setattr(geminitools, "calls", calls, raising=False)
+        return geminitools
+
+    def test_repeated_search_is_cached(self, gt):
+        """Test identical normalized searches run once and return copies."""
+        first = gt.search_bills("Budget Act", 5, False)
+        first[0]["text"] = "mutated by caller"
+        second = gt.search_bills("  budget   act", 5, False)
+
+        assert len(gt.calls) == 1
+        assert second[0]["text"] == "a"
+        assert gt.search_result_cache_stats()["hits"] == 1
+
+    def test_key_includes_top_k_and_reconstruct(self, gt):
+        """Test different top_k or reconstruct flags are separate entries."""
+        gt.search_bills("budget", 5, False)
+        gt.search_bills("budget", 3, False)
+        gt.search_bills("budget", 5, True)
+
+        assert len(gt.calls) == 3
+
+    def test_store_write_invalidates(self, gt, temp_dir):
+        """Test a new store generation makes cached results unreachable."""
+        gt.search_bills("budget", 5, False)
+        write_store(temp_dir / "store", np.array([[0.0, 1.0]]), [{"source": "b.txt"}], ["b"])
+
+        gt.search_bills("budget", 5, False)
+
+        assert len(gt.calls) == 2
+
+    def test_errors_not_cached(self, gt, monkeypatch):
+        """Test error results are recomputed."""
+        monkeypatch.setattr(gt, "_run_bill_search", lambda *a, **k: {"error": "boom"})
+
+        gt.search_bills("budget", 5, False)
+
+        assert len(gt._RESULT_CACHE) == 0
+
+    @pytest.mark.asyncio
+    async def test_async_hit_skips_embedding(self, gt, monkeypatch):
+        """Test a cached async search never embeds the query."""
+        gt.search_bills("budget", 5, False)
+
+        async def fail(query):
+            raise AssertionError("should not embed on a cache hit")
+
+        monkeypatch.setattr(gt, "embed_query_async", fail)
+
+        assert (await gt.search_bills_async("Budget", 5, False))[0]["metadata"]["source"] == "a.txt"
+
+
+class TestQueryEmbeddingCache:
+    """Test the query embedding cache in vector_search."""
+
+    class FakeModel:
+        encodes = 0
+
+        def __init__(self, path):
+            self.path = path
+            self.device = "cpu"
+
+        def encode(self, query, convert_to_numpy=True):
+            type(self).encodes += 1
+            return np.array([len(query), 1.0])
+
+    @pytest.fixture
+    def vs(self, monkeypatch, temp_dir):
+        vector_search = pytest.importorskip("vector_search")
+        for name in ("model_a", "model_b"):
+            (temp_dir / name).mkdir()
+            (temp_dir / name / "config.json").write_text("{}")
+        self.FakeModel.encodes = 0
+        monkeypatch.setattr(vector_search, "SentenceTransformer", self.FakeModel)
+        monkeypatch.setattr(vector_search, "_MODEL", None)
+        monkeypatch.setattr(vector_search, "_MODEL_IDENTITY", None)
+        monkeypatch.setattr(vector_search, "_EMBEDDING_CACHE", LRUCache(8))
+        monkeypatch.setattr(vector_search, "model_path", str(temp_dir / "model_a"))
+        return vector_search
+
+    def test_repeated_query_hits_cache(self, vs):
+        """Test near-identical queries reuse one embedding."""
+        first = vs.embed_query("Budget  Act")
+        second = vs.embed_query("budget act ")
+
+        assert self.FakeModel.encodes == 1
+        assert second is first
+        assert not first.flags.writeable
+        assert vs.embedding_cache_stats()["hits"] == 1
+
+    def test_cache_scoped_to_model_path(self, vs, monkeypatch, temp_dir):
+        """Test switching models does not reuse old embeddings."""
+        vs.embed_query("budget act")
+
+        monkeypatch.setattr(vs, "model_path", str(temp_dir / "model_b"))
+        vs.embed_query("budget act")
+
+        assert self.FakeModel.encodes == 2
+        assert vs._MODEL.path == str(temp_dir / "model_b")
+
+    def test_model_replaced_in_place_reloads(self, vs, temp_dir):
+        """Test rewriting the model files at the same path reloads and re-encodes."""
+        vs.embed_query("budget act")
+        first_model = vs._MODEL
+
+        config = temp_dir / "model_a" / "config.json"
+        stat = config.stat()
+        os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        vs.embed_query("budget act")
+
+        assert vs._MODEL is not first_model
+        assert self.FakeModel.encodes == 2
+
+    def test_other_model_bypasses_cache(self, vs):
+        """Test a caller-supplied model never shares entries with the search model."""
+        vs.embed_query("budget act")
+        other = self.FakeModel("elsewhere")
+
+        vs.embed_query("budget act", other)
+        vs.embed_query("budget act", other)
+
+        assert self.FakeModel.encodes == 3
+        assert len(vs._EMBEDDING_CACHE) == 1
+
+    @pytest.mark.asyncio
+    async def test_async_path_uses_cache(self, vs, monkeypatch):
+        """Test embed_query_async skips the batcher on a hit."""
+        vs.embed_query("senate rules")
+
+        def fail():
+            raise AssertionError("batcher should not be used on a cache hit")
+
+        monkeypatch.setattr(vs, "get_embedding_batcher", fail)
+
+        embedding = await vs.embed_query_async("Senate Rules")
+
+        assert embedding.tolist() == [12.0, 1.0]
@@ -0,0 +1,129 @@
+"""Tests for the source-to-rows secondary index."""
+
+import numpy as np
+
+import source_index
+from source_index import SourceIndex
+from vector_index import VectorIndex
+from vector_store import append_to_store, delete_rows, write_store
+
+
+def _metadata(*sources):
+    return [{"source": source} if source is not None else {} for source in sources]
+
+
+class TestSourceIndex:
+    """Test cases for SourceIndex."""
+
+    def test_exact_lookup(self):
+        """Test rows are grouped per source in ascending order."""
+        index = SourceIndex.build(_metadata("bill:hr-1", "bill:hr-2", "bill:hr-1", None))
+
+        assert index.rows_for("bill:hr-1") == [0, 2]
+        assert index.rows_for("bill:hr-9") == []
+        assert "bill:hr-2" in index and "bill:hr-9" not in index
+        assert len(index) == 4
+
+    def test_prefix_range(self):
+        """Test prefix lookups return exactly the matching sources."""
+        index = SourceIndex.build(_metadata("bill:hr-12", "bill:hr-1", "bill:hr-123", "bill:s-1", "bill:hr-2"))
+
+        assert index.sources_with_prefix("bill:hr-12") == ["bill:hr-12", "bill:hr-123"]
+        assert index.rows_with_prefix("bill:hr-1") == [0, 1, 2]
+        assert index.rows_with_prefix("bill:") == [0, 1, 2, 3, 4]
+        assert index.rows_with_prefix("knowledge:") == []
+
+    def test_extended_leaves_original_untouched(self):
+        """Test extending returns a new index and keeps the old one readable."""
+        original = SourceIndex.build(_metadata("a", "b"))
+
+        extended = original.extended(_metadata("a", "c"), start_row=2)
+
+        assert extended.rows_for("a") == [0, 2]
+        assert extended.sources == ["a", "b", "c"]
+        assert len(extended) == 4
+        assert original.rows_for("a") == [0]
+        assert original.sources == ["a", "b"]
+        assert len(original) == 2
+
+
+    def test_without_removes_rows_and_empty_sources(self):
+        """Test removing rows drops sources left without rows."""
+        metadata = _metadata("a", "b", "a")
+        original = SourceIndex.build(metadata)
+
+        smaller = original.without([1, 2], metadata)
+
+        assert smaller.rows_for("a") == [0]
+        assert "b" not in smaller and smaller.sources == ["a"]
+        assert original.rows_for("a") == [0, 2] and "b" in original
+
+    def test_updates_share_the_base(self, monkeypatch):
+        """Test writes copy only the changed sources and fold them in past the limit."""
+        monkeypatch.setattr(source_index, "_MAX_DELTA", 2)
+        metadata = _metadata("a", "b", "c")
+        original = SourceIndex.build(metadata)
+
+        smaller = original.without([1], metadata)
+        extended = smaller.extended(_metadata("d"), start_row=3)
+
+        assert extended._base is original._base
+        assert extended.sources == ["a", "c", "d"]
+        assert extended.rows_with_prefix("") == [0, 2, 3]
+
+        folded = extended.extended(_metadata("e"), start_row=4)
+
+        assert folded._base is not original._base and not folded._delta
+        assert folded.sources == ["a", "c", "d", "e"]
+        assert folded.rows_for("e") == [4] and "b" not in folded
+        assert original.sources == ["a", "b", "c"]
+
+    def test_build_skips_deleted(self):
+        """Test deleted rows are not indexed."""
+        index = SourceIndex.build(_metadata("a", "b", "a"), deleted=[0])
+
+        assert index.rows_for("a") == [2]
+
+
+class TestVectorIndexSources:
+    """Test VectorIndex keeps its SourceIndex in step with the store."""
+
+    def test_append_extends_and_rewrite_rebuilds(self, temp_dir):
+        """Test appends extend the source index and rewrites rebuild it."""
+        store = temp_dir / "store"
+        write_store(store, np.eye(2), _metadata("a", "b"), ["a", "b"])
+        index = VectorIndex(store)
+        index.load()
+        before = index.sources
+
+        append_to_store(store, np.eye(2), _metadata("c", "a"), ["c", "a"])
+        index.refresh()
+
+        assert index.sources is not before
+        assert index.sources.rows_for("a") == [0, 3]
+        assert before.rows_for("a") == [0]
+
+        write_store(store, np.eye(2), _metadata("z", "y"), ["z", "y"])
+        index.refresh()
+
+        assert index.sources.sources == ["y", "z"]
+        assert index.sources.rows_for("y") == [1]
+
+    def test_deletes_update_sources_and_mask_search(self, temp_dir):
+        """Test tombstoned rows disappear from lookups and every strategy."""
+        store = temp_dir / "store"
+        write_store(store, np.eye(3), _metadata("a", "b", "c"), ["a", "b", "c"])
+        index = VectorIndex(store, quantization="int8")
+        index.load()
+        ann, quantized = index.ann, index.quantized
+
+        delete_rows(store, [1])
+        index.refresh()
+
+        assert index.quantized is quantized and index.ann is ann
+        assert "b" not in index.sources
+        assert len(index) == 2
+        assert index.live_rows().tolist() == [0, 2]
+        for strategy in ("auto", "exact", "binary"):
+            results = index.search([0.0, 1.0, 0.0], k=5, strategy=strategy)
+            assert sorted(r["metadata"]["source"] for r in results) == ["a", "c"]
@@ -0,0 +1,177 @@
+"""Tests for the resident VectorIndex."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from vector_index import VectorIndex
+from vector_store import append_to_store, read_manifest, write_store
+
+
+def _write_store(path, vectors, sources):
+    write_store(
+        path,
+        np.asarray(vectors, dtype=np.float32),
+        [{"source": source, "chunk_index": i} for i, source in enumerate(sources)],
+        [f"text of {source}" for source in sources],
+    )
+
+
+class TestVectorIndex:
+    """Test cases for VectorIndex."""
+
+    @pytest.fixture
+    def store_path(self, temp_dir):
+        path = temp_dir / "vector_store"
+        _write_store(
+            path,
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.7, 0.7, 0.0]],
+            ["a.txt", "b.txt", "c.txt"],
+        )
+        return path
+
+    def test_load(self, store_path):
+        """Test the store is mapped and resident after load."""
+        index = VectorIndex(store_path)
+        index.load()
+
+        assert len(index) == 3
+        assert index.embeddings.dtype == np.float32
+        assert isinstance(index.embeddings, np.memmap)
+        assert index.generation == 1
+
+    def test_search_orders_by_cosine(self, store_path):
+        """Test results come back best first with metadata and text."""
+        index = VectorIndex(store_path)
+        index.load()
+
+        results = index.search([1.0, 0.1, 0.0], k=2)
+
+        assert [r["metadata"]["source"] for r in results] == ["a.txt", "c.txt"]
+        assert results[0]["score"] > results[1]["score"]
+        assert results[0]["score"] == pytest.approx(1.0 / np.sqrt(1.01), rel=1e-5)
+        assert results[0]["text"] == "text of a.txt"
+
+    def test_search_k_larger_than_corpus(self, store_path):
+        """Test k is capped at the corpus size."""
+        index = VectorIndex(store_path)
+        index.load()
+
+        assert len(index.search([0.0, 1.0, 0.0], k=10)) == 3
+
+    def test_missing_store_is_empty(self, temp_dir):
+        """Test a missing store gives an empty index instead of failing."""
+        index = VectorIndex(temp_dir / "missing")
+        index.load()
+
+        assert len(index) == 0
+        assert index.search([1.0, 0.0, 0.0], k=5) == []
+        assert index.refresh() is False
+
+    def test_refresh_only_on_generation_change(self, store_path):
+        """Test refresh is a no-op until the store is rewritten."""
+        index = VectorIndex(store_path)
+        index.load()
+
+        assert index.refresh() is False
+
+        _write_store(store_path, [[0.0, 0.0, 1.0]], ["d.txt"])
+
+        assert index.refresh() is True
+        assert index.generation == 2
+        assert len(index) == 1
+        assert index.search([0.0, 0.0, 1.0], k=1)[0]["metadata"]["source"] == "d.txt"
+
+    def test_snapshot_survives_reload(self, store_path):
+        """Test a held snapshot keeps serving its generation after a reload."""
+        index = VectorIndex(store_path)
+        index.load()
+        snapshot = index.snapshot()
+
+        _write_store(store_path, [[0.0, 0.0, 1.0]], ["d.txt"])
+        index.refresh()
+
+        assert index.snapshot() is not snapshot
+        old = index.search([1.0, 0.0, 0.0], k=1, snapshot=snapshot)
+        assert old[0]["metadata"]["source"] == "a.txt"
+        assert index.search([1.0, 0.0, 0.0], k=1)[0]["metadata"]["source"] == "d.txt"
+        with pytest.raises(AttributeError):
+            snapshot.metadata = []
+
+    def test_non_blocking_refresh_keeps_current_snapshot(self, store_path):
+        """Test readers don't wait for a reload running elsewhere."""
+        index = VectorIndex(store_path)
+        index.load()
+        _write_store(store_path, [[0.0, 0.0, 1.0]], ["d.txt"])
+
+        with index._lock:  # as if another thread were reloading
+            assert index.refresh(blocking=False) is False
+            assert len(index.search([1.0, 0.0, 0.0], k=5)) == 3
+
+        assert index.refresh(blocking=False) is True
+        assert len(index) == 1
+
+    def test_append_refresh_reads_only_new_segment(self, store_path, monkeypatch):
+        """Test a refresh after an append does not parse the base metadata again."""
+        index = VectorIndex(store_path)
+        index.load()
+        base_metadata = store_path / read_manifest(store_path)["base"] / "metadata.json"
+        before = index.snapshot()
+
+        read = []
+        original_load = json.load
+
+        def recording_load(f, *args, **kwargs):
+            read.append(Path(f.name))
+            return original_load(f, *args, **kwargs)
+
+        monkeypatch.setattr(json, "load", recording_load)
+        append_to_store(store_path, np.array([[0.0, 0.0, 1.0]]), [{"source": "d.txt"}], ["text of d.txt"])
+
+        assert index.refresh() is True
+        assert base_metadata not in read
+        assert [p.name for p in read if p.name == "metadata.json"] == ["metadata.json"]
+        assert index.metadata[:3] == before.metadata
+        assert index.texts[3] == "text of d.txt"
+        assert index.search([0.0, 0.0, 1.0], k=1)[0]["metadata"]["source"] == "d.txt"
+        assert len(before.metadata) == 3
+
+
+class TestNeighbourChunks:
+    """Test fetching a bill's neighbouring chunks for reconstruction."""
+
+    @pytest.fixture
+    def vs(self, temp_dir, monkeypatch):
+        vector_search = pytest.importorskip("vector_search")
+        path = temp_dir / "vector_store"
+        rows = [("hr-1.txt", 0), ("hr-2.txt", 0), ("hr-1.txt", 1), ("hr-1.txt", 2), ("hr-1.txt", 3)]
+        write_store(
+            path,
+            np.eye(5, dtype=np.float32),
+            [{"source": source, "chunk_index": i} for source, i in rows],
+            [f"{source}#{i}" for source, i in rows],
+        )
+        index = VectorIndex(path)
+        index.load()
+        monkeypatch.setattr(vector_search, "_INDEX", index)
+        return vector_search, str(path)
+
+    def test_window_around_matches(self, vs):
+        """Test neighbours of the matched chunks come back in document order."""
+        vector_search, path = vs
+
+        chunks = vector_search.fetch_document_chunks("hr-1.txt", [3], window=1, vector_store_path=path)
+
+        assert [c["text"] for c in chunks] == ["hr-1.txt#2", "hr-1.txt#3"]
+        both = vector_search.fetch_document_chunks("hr-1.txt", [3, 0], window=0, vector_store_path=path)
+        assert [c["text"] for c in both] == ["hr-1.txt#0", "hr-1.txt#3"]
+
+    def test_chunk_position_keys(self, vs):
+        """Test both chunk index keys are understood."""
+        vector_search, _ = vs
+
+        assert vector_search.chunk_position({"chunk_index_doc": "4"}) == 4
+        assert vector_search.chunk_position({"chunk_index": 2}) == 2
+        assert vector_search.chunk_position({}) is None
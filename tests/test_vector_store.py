@@ -0,0 +1,330 @@
+"""Tests for the vector store on-disk format."""
+
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from exceptions import VectorStoreError
+from vector_store import (
+    STORE_FORMAT_VERSION,
+    ChunkTexts,
+    SegmentedMatrix,
+    append_to_store,
+    compact_store,
+    compact_store_if_needed,
+    convert_legacy_pickle,
+    delete_rows,
+    ensure_store,
+    normalize_rows,
+    open_store,
+    read_manifest,
+    write_store,
+)
+
+
+@pytest.fixture
+def legacy_pickle(temp_dir):
+    """A legacy list-of-dicts pickle with unnormalized vectors."""
+    path = temp_dir / "vectors.pkl"
+    data = [
+        {"embedding": np.array([3.0, 4.0]), "metadata": {"source": "a.txt"}, "text": "alpha"},
+        {"embedding": np.array([0.0, 2.0]), "metadata": {"source": "b.txt"}, "text": "bêta"},
+    ]
+    with open(path, "wb") as f:
+        pickle.dump(data, f)
+    return path
+
+
+def test_normalize_rows_handles_zero_rows():
+    """Test zero vectors stay zero instead of becoming NaN."""
+    out = normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out[0], [0.6, 0.8], rtol=1e-6)
+    np.testing.assert_array_equal(out[1], [0.0, 0.0])
+
+
+def test_write_and_open_round_trip(temp_dir):
+    """Test a written store opens memory-mapped with the same rows."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.array([[3.0, 4.0], [1.0, 0.0]]), [{"source": "a"}, {"source": "b"}], ["α", "b"])
+
+    store = open_store(store_dir)
+
+    assert isinstance(store.embeddings, np.memmap)
+    np.testing.assert_allclose(store.embeddings[0], [0.6, 0.8], rtol=1e-6)
+    assert store.metadata == [{"source": "a"}, {"source": "b"}]
+    assert store.texts == ["α", "b"]
+    manifest = read_manifest(store_dir)
+    assert manifest["format_version"] == STORE_FORMAT_VERSION
+    assert manifest["normalized"] is True
+    assert (store_dir / manifest["base"] / "embeddings.npy").is_file()
+
+
+def test_rewrite_bumps_generation_and_drops_old_files(temp_dir):
+    """Test each write is a new generation and the old one is cleaned up."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.array([[1.0, 0.0]]), [{"source": "a"}], ["a"])
+    first_base = read_manifest(store_dir)["base"]
+
+    write_store(store_dir, np.array([[0.0, 1.0]]), [{"source": "b"}], ["b"])
+
+    assert read_manifest(store_dir)["generation"] == 2
+    assert not (store_dir / first_base).exists()
+    assert open_store(store_dir).metadata == [{"source": "b"}]
+
+
+def test_open_missing_store_is_empty(temp_dir):
+    """Test opening a directory without a manifest."""
+    store = open_store(temp_dir / "nothing")
+
+    assert len(store) == 0
+    assert store.generation == 0
+
+
+def test_inconsistent_store_raises(temp_dir):
+    """Test a manifest that disagrees with the files is rejected."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.array([[1.0, 0.0]]), [{"source": "a"}], ["a"])
+    manifest = read_manifest(store_dir)
+    manifest["count"] = 5
+    (store_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    with pytest.raises(VectorStoreError):
+        open_store(store_dir)
+
+
+def test_append_creates_and_extends(temp_dir):
+    """Test appending to a missing store creates it, then extends it."""
+    store_dir = temp_dir / "store"
+
+    assert append_to_store(store_dir, np.array([[1.0, 1.0]]), [{"source": "a"}], ["a"]) == 1
+    assert append_to_store(store_dir, np.array([[2.0, 0.0]]), [{"source": "b"}], ["b"]) == 2
+
+    store = open_store(store_dir)
+    assert [m["source"] for m in store.metadata] == ["a", "b"]
+    np.testing.assert_allclose(store.embeddings[1], [1.0, 0.0])
+
+
+def test_append_writes_a_segment_only(temp_dir):
+    """Test an append leaves the base untouched and adds a segment."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.array([[1.0, 0.0], [0.0, 1.0]]), [{"source": "a"}, {"source": "b"}], ["a", "b"])
+    base_mtime = (store_dir / read_manifest(store_dir)["base"] / "embeddings.npy").stat().st_mtime_ns
+
+    append_to_store(store_dir, np.array([[3.0, 4.0]]), [{"source": "c"}], ["c"])
+
+    manifest = read_manifest(store_dir)
+    assert (manifest["count"], manifest["base_count"]) == (3, 2)
+    assert [s["count"] for s in manifest["segments"]] == [1]
+    assert manifest["appended_from"] == {"generation": 1, "count": 2}
+    assert (store_dir / manifest["base"] / "embeddings.npy").stat().st_mtime_ns == base_mtime
+
+    store = open_store(store_dir)
+    assert isinstance(store.embeddings, SegmentedMatrix)
+    assert store.texts == ["a", "b", "c"]
+    np.testing.assert_allclose(store.embeddings @ np.array([0.6, 0.8], dtype=np.float32), [0.6, 0.8, 1.0], rtol=1e-6)
+
+
+def test_segmented_matrix_indexing():
+    """Test rows, slices and row arrays read across part boundaries."""
+    full = np.arange(14, dtype=np.float32).reshape(7, 2)
+    matrix = SegmentedMatrix([full[:3], full[3:4], full[4:]])
+
+    assert len(matrix) == 7 and matrix.shape == (7, 2)
+    np.testing.assert_array_equal(matrix[4], full[4])
+    np.testing.assert_array_equal(matrix[-1], full[-1])
+    np.testing.assert_array_equal(matrix[2:5], full[2:5])
+    np.testing.assert_array_equal(matrix[::3], full[::3])
+    np.testing.assert_array_equal(matrix[np.array([6, 0, 3])], full[[6, 0, 3]])
+    np.testing.assert_array_equal(np.asarray(matrix), full)
+
+
+def test_segments_share_base_quantization(temp_dir):
+    """Test segment int8 codes use the base's scale and offset."""
+    store_dir = temp_dir / "store"
+    rng = np.random.default_rng(0)
+    write_store(store_dir, rng.normal(size=(20, 4)), [{}] * 20, ["x"] * 20)
+    append_to_store(store_dir, rng.normal(size=(5, 4)), [{}] * 5, ["y"] * 5)
+
+    store = open_store(store_dir)
+    base_params = np.load(store.base / "quant_params.npy")
+    np.testing.assert_array_equal(np.load(store.segments[0] / "quant_params.npy"), base_params)
+
+
+def test_compaction_merges_segments(temp_dir):
+    """Test compaction keeps rows and order and removes segment files."""
+    store_dir = temp_dir / "store"
+    for i in range(4):
+        append_to_store(store_dir, np.array([[1.0, float(i)]]), [{"source": str(i)}], [str(i)])
+    before = open_store(store_dir)
+    embeddings_before = np.asarray(before.embeddings)
+
+    assert compact_store(store_dir) is True
+
+    manifest = read_manifest(store_dir)
+    assert manifest["segments"] == [] and manifest["count"] == 4
+    assert manifest["appended_from"] == {"generation": before.generation, "count": 4}
+    assert sorted(p.name for p in store_dir.iterdir() if p.is_dir()) == [manifest["base"]]
+    after = open_store(store_dir)
+    assert after.metadata == before.metadata
+    np.testing.assert_array_equal(np.asarray(after.embeddings), embeddings_before)
+    assert compact_store(store_dir) is False
+
+
+def test_open_reuses_previous_rows(temp_dir):
+    """Test reopening on top of an earlier open keeps its rows and maps new parts."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.eye(2), [{"source": "a"}, {"source": "b"}], ["a", "b"])
+    first = open_store(store_dir)
+
+    append_to_store(store_dir, np.eye(2)[:1], [{"source": "c"}], ["c"])
+    appended = open_store(store_dir, previous=first)
+    assert appended.metadata == [{"source": "a"}, {"source": "b"}, {"source": "c"}]
+    assert appended.metadata[0] is first.metadata[0]
+    assert appended.part_embeddings[0] is first.part_embeddings[0]
+    assert list(appended.texts) == ["a", "b", "c"]
+
+    compact_store(store_dir)
+    compacted = open_store(store_dir, previous=appended)
+    assert compacted.metadata is appended.metadata
+    assert compacted.base != appended.base and compacted.segments == []
+    np.testing.assert_array_equal(np.asarray(compacted.embeddings), np.asarray(appended.embeddings))
+    assert list(compacted.texts) == ["a", "b", "c"]
+
+    write_store(store_dir, np.eye(2)[1:], [{"source": "d"}], ["d"])
+    assert open_store(store_dir, previous=compacted).metadata == [{"source": "d"}]
+
+
+def test_compact_if_needed_threshold(temp_dir):
+    """Test compaction only runs past the segment limit."""
+    store_dir = temp_dir / "store"
+    for i in range(3):
+        append_to_store(store_dir, np.array([[1.0, float(i)]]), [{}], ["t"])
+
+    assert compact_store_if_needed(store_dir, max_segments=2) is False
+    append_to_store(store_dir, np.array([[1.0, 9.0]]), [{}], ["t"])
+    assert compact_store_if_needed(store_dir, max_segments=2) is True
+
+
+def test_texts_are_read_lazily_across_parts(temp_dir):
+    """Test chunk texts decode per row from the mapped blobs of every part."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.eye(2), [{}, {}], ["α", ""])
+    append_to_store(store_dir, np.eye(2)[:1], [{}], ["größe"])
+
+    texts = open_store(store_dir).texts
+
+    assert isinstance(texts, ChunkTexts)
+    assert len(texts) == 3
+    assert (texts[0], texts[1], texts[2], texts[-1]) == ("α", "", "größe", "größe")
+    assert texts[1:] == ["", "größe"]
+    assert list(texts) == ["α", "", "größe"]
+    with pytest.raises(IndexError):
+        texts[3]
+
+
+def test_empty_store_texts(temp_dir):
+    """Test a store without rows maps an empty blob."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.empty((0, 2)), [], [])
+
+    assert len(open_store(store_dir).texts) == 0
+
+
+def test_delete_rows_writes_tombstones_only(temp_dir):
+    """Test deletes keep row ids and leave the base and segments untouched."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.eye(3), [{"source": c} for c in "abc"], list("abc"))
+    append_to_store(store_dir, np.eye(3)[:1], [{"source": "d"}], ["d"])
+    before = read_manifest(store_dir)
+
+    assert delete_rows(store_dir, [3, 1]) == 2
+    assert delete_rows(store_dir, [1]) == 0
+
+    manifest = read_manifest(store_dir)
+    assert (manifest["base"], manifest["segments"]) == (before["base"], before["segments"])
+    assert manifest["appended_from"] == {"generation": before["generation"], "count": 4}
+    store = open_store(store_dir)
+    assert store.deleted.tolist() == [1, 3]
+    assert store.live_count == 2
+    assert store.live_rows().tolist() == [0, 2]
+    assert len([p for p in store_dir.glob("t*.npy")]) == 1
+
+    with pytest.raises(VectorStoreError):
+        delete_rows(store_dir, [4])
+
+
+def test_delete_rows_checks_generation(temp_dir):
+    """Test row ids read from an older generation are refused after a compaction."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.eye(3), [{"source": c} for c in "abc"], list("abc"))
+    generation = read_manifest(store_dir)["generation"]
+    delete_rows(store_dir, [0], expected_generation=generation)
+    stale = read_manifest(store_dir)["generation"]
+    compact_store(store_dir)
+
+    with pytest.raises(VectorStoreError):
+        delete_rows(store_dir, [1], expected_generation=stale)
+
+    assert open_store(store_dir).metadata == [{"source": "b"}, {"source": "c"}]
+    assert open_store(store_dir).deleted.tolist() == []
+
+
+def test_compaction_drops_deleted_rows(temp_dir):
+    """Test compaction removes tombstoned rows and their tombstone file."""
+    store_dir = temp_dir / "store"
+    write_store(store_dir, np.eye(4), [{"source": c} for c in "abcd"], list("abcd"))
+    delete_rows(store_dir, [0])
+
+    assert compact_store_if_needed(store_dir, max_dead_fraction=0.5) is False
+    delete_rows(store_dir, [2, 3])
+    assert compact_store_if_needed(store_dir, max_dead_fraction=0.5) is True
+
+    manifest = read_manifest(store_dir)
+    assert "deleted" not in manifest and "appended_from" not in manifest
+    assert not list(store_dir.glob("t*.npy"))
+    store = open_store(store_dir)
+    assert store.texts == ["b"]
+    np.testing.assert_allclose(store.embeddings[0], [0.0, 1.0, 0.0, 0.0])
+
+
+def test_convert_legacy_pickle(legacy_pickle, temp_dir):
+    """Test the legacy list-of-dicts pickle converts into a normalized store."""
+    store_dir = temp_dir / "store"
+
+    assert convert_legacy_pickle(legacy_pickle, store_dir) == 2
+
+    store = open_store(store_dir)
+    np.testing.assert_allclose(np.linalg.norm(store.embeddings, axis=1), 1.0, rtol=1e-6)
+    assert store.texts == ["alpha", "bêta"]
+    assert store.metadata[1]["source"] == "b.txt"
+
+
+def test_convert_legacy_repository_pickle(temp_dir):
+    """Test the old VectorRepository pickle + .meta.json layout converts."""
+    pickle_path = temp_dir / "repo.pkl"
+    meta_path = temp_dir / "repo.meta.json"
+    with open(pickle_path, "wb") as f:
+        pickle.dump([[1.0, 0.0], [0.0, 3.0]], f)
+    meta_path.write_text(json.dumps([
+        {"text": "one", "source": "bill:hr-1", "metadata": {"k": 1}, "created_at": "2024-01-01T00:00:00"},
+        {"text": "two", "source": "bill:hr-2", "metadata": {}, "created_at": "2024-01-02T00:00:00"},
+    ]))
+
+    assert convert_legacy_pickle(pickle_path, temp_dir / "store", meta_path) == 2
+
+    store = open_store(temp_dir / "store")
+    assert store.texts == ["one", "two"]
+    assert store.metadata[0] == {"source": "bill:hr-1", "created_at": "2024-01-01T00:00:00", "metadata": {"k": 1}}
+
+
+def test_ensure_store_converts_once(legacy_pickle, temp_dir):
+    """Test ensure_store only converts when the store is missing."""
+    store_dir = temp_dir / "store"
+
+    assert ensure_store(store_dir, legacy_pickle) is True
+    assert ensure_store(store_dir, legacy_pickle) is False
+    assert ensure_store(temp_dir / "other", temp_dir / "missing.pkl") is False
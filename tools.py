@@ -6,8 +6,11 @@ replacing the scattered tool definitions.
 """
 
 from pathlib import Path
+from typing import Optional
 from registry import registry
 import geminitools
+from bill_metadata import SearchFilters
+from models import BillType
 from settings import settings, KNOWLEDGE_FILES
 
 
@@ -101,22 +104,67 @@ def call_other_channel_context(channel_to_call: str, number_of_messages_called:
                 "type": "boolean",
                 "description": "whether or not to reconstruct the bills from the chunks returned. Use for discussion about specific bill. If the user is asking about a general topic, set to false with high top_k.",
             },
+            "bill_type": {
+                "type": "string",
+                "enum": [t.value for t in BillType],
+                "description": "optional. only search bills of this type (e.g. 'hres' for House resolutions, 's' for Senate bills).",
+            },
+            "reference_number": {
+                "type": "integer",
+                "description": "optional. only search the bill with this number (combine with bill_type, e.g. hr 123).",
+            },
+            "sponsor": {
+                "type": "string",
+                "description": "optional. only search bills whose sponsor contains this name (case-insensitive).",
+            },
+            "introduced_after": {
+                "type": "string",
+                "description": "optional. only search bills introduced on or after this date, formatted YYYY-MM-DD.",
+            },
+            "introduced_before": {
+                "type": "string",
+                "description": "optional. only search bills introduced on or before this date, formatted YYYY-MM-DD.",
+            },
+            "search_mode": {
+                "type": "string",
+                "enum": ["hybrid", "vector"],
+                "description": "optional. 'vector' (default) ranks by meaning only; 'hybrid' also matches exact words such as act names, section numbers and people's names.",
+            },
         },
         "required": ["query", "top_k", "reconstruct_bills_from_chunks"] 
     }
 )
-def call_bill_search(query: str, top_k: int, reconstruct_bills_from_chunks: bool) -> any:
+async def call_bill_search(query: str, top_k: int, reconstruct_bills_from_chunks: bool,
+                           bill_type: Optional[str] = None, reference_number: Optional[int] = None,
+                           sponsor: Optional[str] = None, introduced_after: Optional[str] = None,
+                           introduced_before: Optional[str] = None,
+                           search_mode: Optional[str] = None) -> any:
     """Call the RAG system for vector search through legislative corpus.
     
+    Runs off the event loop; concurrent calls share batched query embeddings.
+    
     Args:
         query: The search query
         top_k: Number of results to return
         reconstruct_bills_from_chunks: Whether to reconstruct full bills
+        bill_type, reference_number, sponsor, introduced_after, introduced_before:
+            Optional filters applied before ranking
+        search_mode: Optional "hybrid" or "vector" ranking (default from settings)
         
     Returns:
         Search results from the bill corpus
     """
-    return geminitools.search_bills(query, top_k, reconstruct_bills_from_chunks)
+    try:
+        filters = SearchFilters.from_arguments(
+            bill_type=bill_type,
+            sponsor=sponsor,
+            reference_number=reference_number,
+            introduced_after=introduced_after,
+            introduced_before=introduced_before,
+        )
+    except ValueError as e:
+        return {"error": f"Invalid search filter: {e}"}
+    return await geminitools.search_bills_async(query, top_k, reconstruct_bills_from_chunks, filters, search_mode)
 
 
 # Function to create tool functions with client injection for backward compatibility
@@ -144,11 +192,17 @@ def create_tools_with_client(discord_client):
             client=discord_client
         )
 
-    def _tool_call_bill_search(**kw):
-        return call_bill_search(
+    async def _tool_call_bill_search(**kw):
+        return await call_bill_search(
             kw["query"],
             kw["top_k"],
             kw.get("reconstruct_bills_from_chunks"),
+            bill_type=kw.get("bill_type"),
+            reference_number=kw.get("reference_number"),
+            sponsor=kw.get("sponsor"),
+            introduced_after=kw.get("introduced_after"),
+            introduced_before=kw.get("introduced_before"),
+            search_mode=kw.get("search_mode"),
         )
 
     return {
@@ -0,0 +1,514 @@
+"""
+Resident in-memory index over the bill vector store.
+
+The index is loaded once (normally at startup by BotState) and then serves
+every bill search from memory. It watches the store's generation counter and
+only reloads when the store on disk has actually changed.
+
+Once the corpus reaches ``ann_min_rows`` rows, searches go through an IVF
+approximate index (see ivf_index.py) instead of a full scan; smaller corpora
+are always searched exactly. Appends to the store (new segments, see
+vector_store.py) are added to the IVF lists without retraining until the
+corpus has doubled since the last training; the quantized and binary codes
+are likewise extended with just the new rows, and a compaction, which keeps
+row order, reuses all of them.
+
+With ``quantization`` set ("int8" or "float16"), the first pass scores a
+resident quantized copy of the matrix and only a shortlist of
+``rescore_candidates`` rows is rescored against the full-precision,
+memory-mapped float32 rows, so those pages are rarely touched.
+
+Searches pick a strategy (see SEARCH_STRATEGIES): "auto" is the IVF/quantized
+path above, "exact" is a full-precision full scan, and "binary" ranks all rows
+by Hamming distance of packed sign bits and rescores the closest
+``binary_candidates`` at full precision.
+
+hybrid_search also ranks the rows by BM25 over their chunk texts (see
+keyword_index.py; the postings share the embeddings' row ids) and fuses the
+two rankings by reciprocal rank, so exact terms such as act names, section
+numbers and sponsors are found even when the embedding misses them.
+
+Searches can be restricted by bill fields (see bill_metadata.SearchFilters).
+The filter becomes a row mask before top-k selection; when it leaves few
+rows, only those rows are scanned.
+
+Rows tombstoned by delete_rows keep their ids; every strategy masks them out
+(``live``) and the source index drops them, until a compaction removes them
+from the store.
+
+Everything a search reads lives in one immutable IndexSnapshot. A reload
+builds the next snapshot off to the side (reusing unchanged parts) and swaps
+it in with a single assignment, so searches never wait for a reload and
+never see half of one; a search that started on the old snapshot finishes on
+it. Only reloads are serialized. A refresh after an append or a delete
+reopens the store on top of the previous open (see open_store's
+``previous``), so it reads only the new segment or tombstones rather than
+every part's metadata again.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ivf_index import IVFIndex
+from keyword_index import DEFAULT_RRF_K, BM25Index, KeywordPostings, reciprocal_rank_fusion
+from logging_config import logger
+from bill_metadata import MetadataColumns, SearchFilters
+from quantization import BinaryCodes, QuantizedMatrix
+from source_index import SourceIndex
+from vector_store import VectorStoreData, open_store, read_generation
+
+# Below this many rows a full scan is fast enough and always exact
+DEFAULT_ANN_MIN_ROWS = 4096
+
+SEARCH_STRATEGIES = ("auto", "exact", "binary")
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """One generation of the index. Never modified after it is published."""
+    embeddings: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+    texts: Sequence[str] = field(default_factory=list)
+    generation: Optional[int] = None
+    ann: Optional[IVFIndex] = None
+    quantized: Optional[QuantizedMatrix] = None
+    binary: Optional[BinaryCodes] = None
+    sources: SourceIndex = field(default_factory=SourceIndex)
+    columns: MetadataColumns = field(default_factory=MetadataColumns)
+    keywords: BM25Index = field(default_factory=BM25Index)
+    deleted: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    live: Optional[np.ndarray] = None  # row mask, None when nothing is deleted
+
+    def __len__(self) -> int:
+        """Number of live (not deleted) rows."""
+        return len(self.metadata) - len(self.deleted)
+
+    def live_rows(self) -> np.ndarray:
+        """Ids of the live rows, ascending."""
+        if self.live is None:
+            return np.arange(len(self.metadata))
+        return np.flatnonzero(self.live)
+
+
+class VectorIndex:
+    """Long-lived embedding matrix plus parallel metadata and text arrays.
+
+    Rows of ``embeddings`` are L2-normalized (and memory-mapped from the
+    store), so cosine similarity against a unit query is a single
+    matrix-vector product.
+    """
+
+    def __init__(self, store_path: Path, ann_min_rows: int = DEFAULT_ANN_MIN_ROWS,
+                 nprobe: int = 8, nlist: Optional[int] = None,
+                 quantization: Optional[str] = None, rescore_candidates: int = 100,
+                 strategy: str = "auto", binary_candidates: int = 300,
+                 hybrid_candidates: int = 50, rrf_k: int = DEFAULT_RRF_K):
+        """Initialize an empty index for the given vector store.
+
+        Args:
+            store_path: Vector store directory
+            ann_min_rows: Corpus size from which the IVF index is used
+            nprobe: IVF partitions scanned per query (recall/latency knob)
+            nlist: IVF partition count (default: about sqrt(N))
+            quantization: None, "int8" or "float16" first-pass scoring
+            rescore_candidates: Shortlist size rescored at full precision
+            strategy: Default search strategy, one of SEARCH_STRATEGIES
+            binary_candidates: Hamming shortlist size for the "binary" strategy
+            hybrid_candidates: Rows taken from each ranking before fusing them
+            rrf_k: Reciprocal-rank fusion constant (larger flattens the top ranks)
+        """
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"unknown search strategy {strategy!r}, expected one of {SEARCH_STRATEGIES}")
+        self.store_path = Path(store_path)
+        self.ann_min_rows = ann_min_rows
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.quantization = quantization
+        self.rescore_candidates = rescore_candidates
+        self.strategy = strategy
+        self.binary_candidates = binary_candidates
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self._snapshot = IndexSnapshot()
+        self._store: Optional[VectorStoreData] = None  # the open behind the current snapshot
+        self._lock = threading.Lock()  # serializes reloads only
+
+    def __len__(self) -> int:
+        """Number of live (not deleted) rows."""
+        return len(self._snapshot)
+
+    def snapshot(self) -> IndexSnapshot:
+        """The current snapshot; hold on to it for a consistent multi-step read."""
+        return self._snapshot
+
+    # The current snapshot's parts, for callers that only need one of them
+    embeddings = property(lambda self: self._snapshot.embeddings)
+    metadata = property(lambda self: self._snapshot.metadata)
+    texts = property(lambda self: self._snapshot.texts)  # lazy ChunkTexts: decoded per row
+    generation = property(lambda self: self._snapshot.generation)
+    ann = property(lambda self: self._snapshot.ann)
+    quantized = property(lambda self: self._snapshot.quantized)
+    binary = property(lambda self: self._snapshot.binary)
+    sources = property(lambda self: self._snapshot.sources)
+    columns = property(lambda self: self._snapshot.columns)
+    keywords = property(lambda self: self._snapshot.keywords)
+    deleted = property(lambda self: self._snapshot.deleted)
+    live = property(lambda self: self._snapshot.live)
+
+    def live_rows(self) -> np.ndarray:
+        """Ids of the live rows, ascending."""
+        return self._snapshot.live_rows()
+
+    def load(self) -> None:
+        """(Re)load the whole store."""
+        with self._lock:
+            self._load_locked(reuse=False)
+
+    def refresh(self, blocking: bool = True) -> bool:
+        """Reload the store if its generation changed since the last load.
+
+        Args:
+            blocking: If another thread is already reloading, wait for it
+                (True) or return at once and keep serving the current
+                snapshot (False)
+
+        Returns:
+            True if the index was reloaded by this call
+        """
+        if read_generation(self.store_path) == self.generation:
+            return False
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            if read_generation(self.store_path) == self.generation:
+                return False
+            self._load_locked()
+            return True
+        finally:
+            self._lock.release()
+
+    def top_k(self, query_embedding, k: int, nprobe: Optional[int] = None,
+              strategy: Optional[str] = None,
+              snapshot: Optional[IndexSnapshot] = None,
+              filters: Optional[SearchFilters] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids and cosine scores of the k nearest rows, best first.
+
+        Args:
+            query_embedding: Query vector (any array-like of length D)
+            k: Number of rows to return
+            nprobe: Override the IVF partitions scanned for this query
+            strategy: Override the default strategy for this query
+            snapshot: Snapshot to search (default: the current one)
+            filters: Only consider rows matching these bill fields
+
+        Returns:
+            (rows, scores) arrays of equal length, at most k
+        """
+        strategy = strategy or self.strategy
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"unknown search strategy {strategy!r}, expected one of {SEARCH_STRATEGIES}")
+
+        snapshot = snapshot or self._snapshot
+        embeddings, ann, quantized, binary, live = (
+            snapshot.embeddings, snapshot.ann, snapshot.quantized, snapshot.binary, snapshot.live
+        )
+        subset = None
+        if filters is not None and not filters.is_empty():
+            # Filtered rows count as dead for every strategy below
+            live = _eligible(snapshot, filters)
+            subset = np.flatnonzero(live)
+        actual_k = min(k, len(embeddings) if live is None else int(np.count_nonzero(live)))
+        if actual_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        query_norm = np.linalg.norm(query)
+        if query_norm > 0:
+            query = query / query_norm
+
+        if subset is not None and (strategy == "exact" or len(subset) <= max(self.ann_min_rows, self.rescore_candidates)):
+            # A selective filter: scanning just its rows is exact and cheaper than any index
+            return _rank(subset, np.asarray(embeddings[subset]) @ query, actual_k)
+
+        if strategy == "exact":
+            return _rank(np.arange(len(embeddings)), embeddings @ query, actual_k, live)
+
+        if strategy == "binary" and binary is not None:
+            shortlist = binary.candidates(query, max(self.binary_candidates, actual_k), live)
+            return _rank(shortlist, np.asarray(embeddings[shortlist]) @ query, actual_k, live)
+
+        candidates = ann.candidates(query, nprobe or self.nprobe) if ann is not None else None
+        if candidates is not None and live is not None:
+            candidates = candidates[live[candidates]]
+            if subset is not None and len(candidates) < actual_k:
+                candidates = subset  # the probed lists hold too few matching rows
+
+        if quantized is not None:
+            rows = candidates if candidates is not None else np.arange(len(quantized))
+            approx = quantized.scores(query, candidates)
+            shortlist = _rank(rows, approx, max(self.rescore_candidates, actual_k), live)[0]
+            shortlist.sort()  # sequential access into the memory-mapped matrix
+            return _rank(shortlist, np.asarray(embeddings[shortlist]) @ query, actual_k)
+
+        if candidates is not None:
+            return _rank(candidates, np.asarray(embeddings[candidates]) @ query, actual_k)
+        return _rank(np.arange(len(embeddings)), embeddings @ query, actual_k, live)
+
+    def search(self, query_embedding, k: int = 5, nprobe: Optional[int] = None,
+               strategy: Optional[str] = None,
+               snapshot: Optional[IndexSnapshot] = None,
+               filters: Optional[SearchFilters] = None) -> List[Dict[str, Any]]:
+        """Return the top k chunks by cosine similarity.
+
+        Args:
+            query_embedding: Query vector (any array-like of length D)
+            k: Number of results to return
+            nprobe: Override the IVF partitions scanned for this query
+            strategy: Override the default strategy for this query
+            snapshot: Snapshot to search (default: the current one)
+            filters: Only consider rows matching these bill fields
+
+        Returns:
+            List of {'score': float, 'metadata': dict, 'text': str}, best first
+        """
+        snapshot = snapshot or self._snapshot
+        rows, scores = self.top_k(query_embedding, k, nprobe=nprobe, strategy=strategy,
+                                  snapshot=snapshot, filters=filters)
+
+        return [
+            {"score": float(score), "metadata": snapshot.metadata[row], "text": snapshot.texts[row]}
+            for row, score in zip(rows, scores)
+        ]
+
+    def keyword_top_k(self, query: str, k: int, snapshot: Optional[IndexSnapshot] = None,
+                      filters: Optional[SearchFilters] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids and BM25 scores of the k best rows for ``query``'s terms, best first."""
+        snapshot = snapshot or self._snapshot
+        return snapshot.keywords.top_k(query, k, _eligible(snapshot, filters))
+
+    def hybrid_search(self, query: str, query_embedding, k: int = 5,
+                      nprobe: Optional[int] = None, strategy: Optional[str] = None,
+                      snapshot: Optional[IndexSnapshot] = None,
+                      filters: Optional[SearchFilters] = None) -> List[Dict[str, Any]]:
+        """Top k chunks by reciprocal-rank fusion of cosine and BM25 rankings.
+
+        Each ranking contributes its best ``hybrid_candidates`` rows; a row's
+        score is the sum of 1 / (rrf_k + rank) over the rankings it is in.
+
+        Returns:
+            List of {'score': float, 'metadata': dict, 'text': str}, best first,
+            where score is the fused score (not a cosine similarity)
+        """
+        snapshot = snapshot or self._snapshot
+        depth = max(self.hybrid_candidates, k)
+        vector_rows, _ = self.top_k(query_embedding, depth, nprobe=nprobe, strategy=strategy,
+                                    snapshot=snapshot, filters=filters)
+        keyword_rows, _ = self.keyword_top_k(query, depth, snapshot=snapshot, filters=filters)
+        rows, scores = reciprocal_rank_fusion([vector_rows, keyword_rows], k, self.rrf_k)
+
+        return [
+            {"score": float(score), "metadata": snapshot.metadata[row], "text": snapshot.texts[row]}
+            for row, score in zip(rows, scores)
+        ]
+
+    def _load_locked(self, reuse: bool = True) -> None:
+        """Build and publish the next snapshot; caller must hold the lock.
+
+        With ``reuse``, parts and metadata of the previous open are kept when
+        the new generation only extends it.
+        """
+        store = open_store(self.store_path, previous=self._store if reuse else None)
+        if store.generation == 0:
+            logger.warning(f"Vector store not found at {self.store_path}; index is empty")
+
+        ann = self._update_ann(store)
+        quantized = self._load_quantized(store)
+        binary = self._load_binary(store)
+        sources = self._update_sources(store)
+        columns = self._update_columns(store)
+        keywords = self._update_keywords(store)
+        live = None
+        if len(store.deleted):
+            live = np.ones(len(store), dtype=bool)
+            live[store.deleted] = False
+
+        # Publish everything at once so searches never see a mixed state
+        self._snapshot = IndexSnapshot(
+            embeddings=store.embeddings,
+            metadata=store.metadata,
+            texts=store.texts,
+            generation=store.generation or None,
+            ann=ann,
+            quantized=quantized,
+            binary=binary,
+            sources=sources,
+            columns=columns,
+            keywords=keywords,
+            deleted=store.deleted,
+            live=live,
+        )
+        self._store = store
+        logger.info(f"Loaded {len(self.metadata)} vectors from {self.store_path}")
+
+    def _appended_rows(self, store) -> Optional[int]:
+        """Rows this index already holds if ``store`` only appended to them, else None."""
+        appended = store.appended_from
+        if (
+            appended is not None
+            and appended["generation"] == self.generation
+            and appended["count"] == len(self.metadata)
+        ):
+            return appended["count"]
+        return None
+
+    def _load_quantized(self, store) -> Optional[QuantizedMatrix]:
+        """Resident quantized copy of the store's embeddings, if enabled."""
+        if self.quantization is None or len(store) == 0:
+            return None
+        previous = self.quantized
+        kept = self._appended_rows(store)
+        if previous is not None and previous.kind == self.quantization and kept == len(previous):
+            if kept == len(store):
+                return previous
+            return previous.extend(QuantizedMatrix.from_float(
+                store.embeddings[kept:], self.quantization, previous.scale, previous.offset
+            ))
+
+        quantized = None
+        if self.quantization == "int8" and store.base is not None:
+            try:
+                # Segments are quantized with the base's parameters, so codes concatenate
+                for part in store.parts:
+                    codes = QuantizedMatrix.load(part)
+                    if codes is None:
+                        quantized = None
+                        break
+                    quantized = codes if quantized is None else quantized.extend(codes)
+            except FileNotFoundError:
+                quantized = None  # generation replaced under us; quantize the mapped rows instead
+        if quantized is None or len(quantized) != len(store):
+            quantized = QuantizedMatrix.from_float(store.embeddings, self.quantization)
+        return quantized
+
+    def _load_binary(self, store) -> Optional[BinaryCodes]:
+        """Packed sign bits of the store's embeddings (1/32 of float32, always resident)."""
+        if len(store) == 0:
+            return None
+        previous = self.binary
+        kept = self._appended_rows(store)
+        if previous is not None and kept == len(previous):
+            if kept == len(store):
+                return previous
+            return previous.extend(BinaryCodes.from_float(store.embeddings[kept:]))
+
+        binary = None
+        if store.base is not None:
+            try:
+                for part in store.parts:
+                    codes = BinaryCodes.load(part)
+                    if codes is None:
+                        binary = None
+                        break
+                    binary = codes if binary is None else binary.extend(codes)
+            except FileNotFoundError:
+                binary = None  # generation replaced under us; pack the mapped rows instead
+        if binary is None or len(binary) != len(store):
+            binary = BinaryCodes.from_float(store.embeddings)
+        return binary
+
+    def _update_sources(self, store) -> SourceIndex:
+        """Source-to-rows index for ``store``: extended after an append, else rebuilt."""
+        kept = self._appended_rows(store)
+        if kept is None or kept != len(self.sources):
+            return SourceIndex.build(store.metadata, deleted=store.deleted)
+        sources = self.sources
+        if kept < len(store):
+            sources = sources.extended(store.metadata[kept:], start_row=kept, deleted=store.deleted)
+        newly_deleted = np.setdiff1d(store.deleted, self.deleted, assume_unique=True)
+        return sources.without(newly_deleted[newly_deleted < kept], store.metadata)
+
+    def _update_columns(self, store) -> MetadataColumns:
+        """Bill field columns for ``store``: extended after an append, else rebuilt."""
+        columns = self.columns
+        if self._appended_rows(store) == len(columns):
+            return columns if len(columns) == len(store) else columns.extended(store.metadata[len(columns):])
+        return MetadataColumns.build(store.metadata)
+
+    def _update_keywords(self, store) -> BM25Index:
+        """BM25 index for ``store`` from the parts' postings: extended after an append, else rebuilt."""
+        keywords = self.keywords
+        kept = self._appended_rows(store)
+        if kept != len(keywords):
+            keywords, kept = BM25Index(), 0
+        if kept == len(store):
+            return keywords
+
+        try:
+            start = 0
+            for part in store.parts:
+                count = len(np.load(part / "text_offsets.npy", mmap_mode="r")) - 1
+                if start >= kept:
+                    postings = KeywordPostings.load(part)
+                    if postings is None or len(postings) != count:
+                        # Parts written before keyword postings existed
+                        postings = KeywordPostings.from_texts(store.texts[start:start + count])
+                    keywords = keywords.extended(postings, start)
+                elif start + count > kept:
+                    # The new rows start inside a part; index the remainder from its texts
+                    keywords = keywords.extended(KeywordPostings.from_texts(store.texts[kept:start + count]), kept)
+                start += count
+        except FileNotFoundError:
+            # Generation replaced under us; invert the mapped texts instead
+            keywords = self.keywords if kept else BM25Index()
+            keywords = keywords.extended(KeywordPostings.from_texts(store.texts[kept:]), kept)
+        return keywords
+
+    def _update_ann(self, store) -> Optional[IVFIndex]:
+        """IVF index for ``store``: extended in place after an append, else rebuilt."""
+        count = len(store)
+        if count < self.ann_min_rows:
+            return None
+
+        ann = self.ann
+        if (
+            ann is not None
+            and self._appended_rows(store) == len(ann)
+            and count <= 2 * ann.trained_rows
+        ):
+            if count == len(ann):
+                return ann  # compaction: same rows, same order
+            # Extend a copy: searches on the current snapshot may still be reading it
+            ann = ann.copy()
+            ann.add(store.embeddings[len(ann):], start_row=len(ann))
+            return ann
+
+        ann = IVFIndex(nlist=self.nlist, nprobe=self.nprobe)
+        ann.build(store.embeddings)
+        logger.info(f"Built IVF index over {count} vectors ({len(ann.centroids)} lists)")
+        return ann
+
+
+def _eligible(snapshot: IndexSnapshot, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+    """Mask of the live rows matching ``filters``; None when every row qualifies."""
+    if filters is None or filters.is_empty():
+        return snapshot.live
+    mask = filters.mask(snapshot.columns)
+    return mask if snapshot.live is None else mask & snapshot.live
+
+
+def _rank(rows: np.ndarray, scores: np.ndarray, k: int,
+          live: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """The k best (row, score) pairs, best first, skipping rows not in ``live``."""
+    if live is not None:
+        keep = live[rows]
+        rows, scores = rows[keep], scores[keep]
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return rows[top], scores[top]
@@ -1,24 +1,48 @@
-import pickle
-import numpy as np
-from sentence_transformers import SentenceTransformer, util
-import torch
 import traceback
 import os
-from settings import settings, MODEL_PATH, VECTOR_PKL
+from pathlib import Path
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from settings import settings, MODEL_PATH, VECTOR_STORE
+from vector_index import VectorIndex
+from embedding_batcher import EmbeddingBatcher
+from search_cache import LRUCache, normalize_query
 
 model_path = MODEL_PATH
-vector_pkl = VECTOR_PKL
+vector_store_path = VECTOR_STORE
 _MODEL = None
+_MODEL_IDENTITY = None  # (resolved path, file fingerprint) of _MODEL, taken when it was loaded
+_INDEX = None
+_BATCHER = None
+# (model identity, normalized query) -> read-only query embedding
+_EMBEDDING_CACHE = LRUCache(settings.vector_search.embedding_cache_size)
+# Files whose replacement means a different model, even at the same path
+_MODEL_FINGERPRINT_FILES = ("config.json", "modules.json", "model.safetensors", "pytorch_model.bin")
+
+def _model_identity(model_path):
+    """Resolved model directory plus the mtimes/sizes of its config and weights files."""
+    resolved = os.path.realpath(model_path)
+    fingerprint = []
+    for name in _MODEL_FINGERPRINT_FILES:
+        try:
+            stat = os.stat(os.path.join(resolved, name))
+        except OSError:
+            continue
+        fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+    return resolved, tuple(fingerprint)
+
 def load_search_model(model_path):
-    """Loads the SentenceTransformer model (lazily)."""
-    global _MODEL
-    if _MODEL is None:
+    """Loads the SentenceTransformer model (lazily, again if its files changed on disk)."""
+    global _MODEL, _MODEL_IDENTITY
+    identity = _model_identity(model_path)
+    if _MODEL is None or identity != _MODEL_IDENTITY:
         print(f"INFO: Loading search model from {model_path}...")
         if not os.path.isdir(model_path):
             print(f"CRITICAL ERROR: Model directory not found at {model_path}")
             raise FileNotFoundError(f"Model directory not found: {model_path}")
         try:
             _MODEL = SentenceTransformer(model_path)
+            _MODEL_IDENTITY = identity
             # Optional: Move model to GPU if available and desired
             # device = 'cuda' if torch.cuda.is_available() else 'cpu'
             # _MODEL.to(device)
@@ -30,16 +54,88 @@ def load_search_model(model_path):
             raise RuntimeError(f"Failed to load embedding model from {model_path}") from e
     return _MODEL
 
-def search_vectors_simple(query: str, model: SentenceTransformer, vector_pickle_path: str, k: int = 5):
+def set_vector_index(index: VectorIndex) -> None:
+    """Install the resident index used by bill searches (owned by BotState)."""
+    global _INDEX
+    _INDEX = index
+
+def get_vector_index(vector_store_path: str = vector_store_path) -> VectorIndex:
+    """Returns the resident index, loading it on first use if nobody installed one."""
+    global _INDEX
+    if _INDEX is None or _INDEX.store_path != Path(vector_store_path):
+        index = VectorIndex(Path(vector_store_path))
+        index.load()
+        _INDEX = index
+    return _INDEX
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Returns the shared query batcher, creating it on first use."""
+    global _BATCHER
+    if _BATCHER is None:
+        def encode(texts):
+            model = load_search_model(model_path)
+            return model.encode(texts, convert_to_numpy=True, batch_size=len(texts))
+
+        _BATCHER = EmbeddingBatcher(
+            encode,
+            max_batch_size=settings.vector_search.batch_max_size,
+            max_wait_ms=settings.vector_search.batch_max_wait_ms
+        )
+    return _BATCHER
+
+def _remember_embedding(key, embedding):
+    embedding = np.array(embedding, dtype=np.float32)
+    embedding.setflags(write=False)  # shared between callers
+    _EMBEDDING_CACHE.put(key, embedding)
+    return embedding
+
+def embed_query(query: str, model: SentenceTransformer = None):
+    """Embeds a search query, reusing the cached vector for repeated queries.
+
+    Only the shared search model is cached; a different ``model`` passed in
+    by the caller always encodes.
+    """
+    if model is not None and model is not _MODEL:
+        return model.encode(query, convert_to_numpy=True)
+    model = load_search_model(model_path)
+    key = (_MODEL_IDENTITY, normalize_query(query))
+    cached = _EMBEDDING_CACHE.get(key)
+    if cached is not None:
+        return cached
+    return _remember_embedding(key, model.encode(query, convert_to_numpy=True))
+
+async def embed_query_async(query: str):
+    """Embeds a search query, batched with any other queries in flight (cached like embed_query).
+
+    The key is the identity of the model files on disk, which the batcher's
+    encode reloads to if they changed; a race with a reload can only file a
+    vector under a key that is already stale.
+    """
+    key = (_model_identity(model_path), normalize_query(query))
+    cached = _EMBEDDING_CACHE.get(key)
+    if cached is not None:
+        return cached
+    return _remember_embedding(key, await get_embedding_batcher().embed(query))
+
+def embedding_cache_stats():
+    """Hit/miss counters of the query embedding cache."""
+    return _EMBEDDING_CACHE.stats()
+
+def search_vectors_simple(query: str, model: SentenceTransformer, vector_store_path: str, k: int = 5,
+                          strategy: str = None, query_embedding=None, filters=None, mode: str = "vector"):
     """
-    Searches vectors loaded from a pickle file using cosine similarity.
+    Searches the resident vector index using cosine similarity (optionally fused with BM25).
 
     Args:
         query: The search query string.
         model: The loaded SentenceTransformer model instance.
-        vector_pickle_path: Path to the .pkl file created previously.
-                               (expects a list of dicts with 'embedding', 'metadata', 'text')
+        vector_store_path: Path to the vector store directory backing the index.
         k: Number of top results to return.
+        strategy: Search strategy ("auto", "exact" or "binary"); None uses the index default.
+        query_embedding: Precomputed query vector (e.g. from embed_query_async); skips encoding.
+        filters: Optional bill_metadata.SearchFilters applied before top-k selection.
+        mode: "vector" ranks by cosine similarity; "hybrid" fuses that ranking with a
+              BM25 keyword ranking (reciprocal rank), and 'score' is the fused score.
 
     Returns:
         A list of top k results, each a dict: {'score': float, 'metadata': dict, 'text': str}
@@ -48,74 +144,75 @@ def search_vectors_simple(query: str, model: SentenceTransformer, vector_pickle_
     """
     print(f"searching for: '{query}' (top {k})")
 
-    # 1. Load data
+    # 1. Get the resident index, reloading only if the store changed on disk
+    #    (unless another search is already reloading it; then use the current snapshot)
     try:
-        with open(vector_pickle_path, 'rb') as f:
-            all_data = pickle.load(f)
-        if not all_data:
-            print("bruh the pickle file is empty")
-            return []
-        # Separate embeddings and the rest for easier handling
-        corpus_embeddings = np.array([item['embedding'] for item in all_data]).astype(np.float32) # Ensure float32
-        corpus_metadata = [item['metadata'] for item in all_data]
-        corpus_texts = [item['text'] for item in all_data]
-        print(f"loaded {len(corpus_embeddings)} vectors from {vector_pickle_path}")
-    except FileNotFoundError:
-        print(f"be real, vector file not found: {vector_pickle_path}")
-        return []
+        index = get_vector_index(vector_store_path)
+        if index.refresh(blocking=index.generation is None):
+            print(f"vector store changed, reloaded {len(index)} vectors from {vector_store_path}")
+        snapshot = index.snapshot()
     except Exception as e:
-        print(f"oof, failed to load or parse pickle file {vector_pickle_path}: {e}")
+        print(f"oof, failed to load or parse vector store {vector_store_path}: {e}")
         return []
 
-    # Adjust k if smaller than corpus size
-    actual_k = min(k, len(corpus_embeddings))
-    if actual_k == 0:
-         print("no embeddings loaded to search lmao")
-         return []
-    if actual_k < k:
-         print(f"requested {k} results but only {actual_k} vectors exist.")
-
-
-    # 2. Embed query
-    print("embedding query...")
-    query_embedding = model.encode(query, convert_to_tensor=True)
-    corpus_embeddings = torch.tensor(corpus_embeddings, dtype=torch.float32)  # convert to tensor
+    if len(snapshot) == 0:
+        print("no embeddings loaded to search lmao")
+        return []
+    if len(snapshot) < k:
+        print(f"requested {k} results but only {len(snapshot)} vectors exist.")
 
-    # Move to same device as query_embedding
-    device = query_embedding.device
-    corpus_embeddings = corpus_embeddings.to(device)
+    # 2. Embed query (unless the caller already batched it)
+    if query_embedding is None:
+        print("embedding query...")
+        query_embedding = embed_query(query, model)
 
-    # 3. Compute Cosine Similarity
-    # util.cos_sim returns a tensor of shape [num_queries, num_corpus_vectors]
-    # We have 1 query, so shape is [1, N]
+    # 3. Cosine similarity (+ BM25 in hybrid mode) + top k, all in memory
     print("calculating similarities...")
-    cos_scores = util.cos_sim(query_embedding, corpus_embeddings)[0] # Get the scores for the first query
-
-    # 4. Get top k results
-    # Use torch.topk to get indices and scores of the highest similarities
-    top_results = np.argpartition(-cos_scores.cpu().numpy(), range(actual_k))[0:actual_k] # Faster than full sort for top k indices
-    # Need to sort the top_k indices by score
-    top_indices_unsorted = top_results
-    top_scores_unsorted = cos_scores[top_indices_unsorted]
-    # Sort these top k results by score
-    sorted_indices_in_top_k = np.argsort(-top_scores_unsorted.cpu().numpy())
-    top_indices = top_indices_unsorted[sorted_indices_in_top_k]
+    if mode == "hybrid":
+        results = index.hybrid_search(query, query_embedding, k, strategy=strategy, snapshot=snapshot, filters=filters)
+    elif mode == "vector":
+        results = index.search(query_embedding, k, strategy=strategy, snapshot=snapshot, filters=filters)
+    else:
+        raise ValueError(f"unknown search mode {mode!r}, expected 'vector' or 'hybrid'")
 
-
-    # 5. Format results
-    results = []
     print("top results:")
-    for idx in top_indices:
-        score = cos_scores[idx].item() # .item() converts tensor scalar to python float
-        metadata = corpus_metadata[idx]
-        text = corpus_texts[idx]
-        results.append({
-            "score": score,
-            "metadata": metadata,
-            "text": text
-        })
-        print(f"  Score: {score:.4f} | Source: {metadata.get('source', 'N/A')} | Page: {metadata.get('page_label', 'N/A')} | Chunk: {metadata.get('chunk_index_doc', 'N/A')}")
+    for result in results:
+        metadata, text = result["metadata"], result["text"]
+        print(f"  Score: {result['score']:.4f} | Source: {metadata.get('source', 'N/A')} | Page: {metadata.get('page_label', 'N/A')} | Chunk: {metadata.get('chunk_index_doc', 'N/A')}")
         print(f"    Text: {text[:150]}...") # Print snippet
 
     return results
 
+
+def chunk_position(metadata: dict):
+    """Position of a chunk within its document, or None if the row doesn't record one.
+
+    Older stores use 'chunk_index_doc'; embed_txt_file writes 'chunk_index'.
+    """
+    position = metadata.get("chunk_index_doc", metadata.get("chunk_index"))
+    try:
+        return int(position)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_document_chunks(source: str, positions, window: int = 1,
+                          vector_store_path: str = vector_store_path) -> list:
+    """Chunks of ``source`` within ``window`` positions of any of ``positions``.
+
+    Rows are found through the index's source lookup and only the selected
+    chunks' texts are read from the store.
+
+    Returns:
+        List of {'metadata': dict, 'text': str} in document order
+    """
+    snapshot = get_vector_index(vector_store_path).snapshot()
+    wanted = {p + offset for p in positions for offset in range(-window, window + 1)}
+
+    chunks = []
+    for row in snapshot.sources.rows_for(source):
+        position = chunk_position(snapshot.metadata[row])
+        if position in wanted:
+            chunks.append((position, row))
+    chunks.sort()
+    return [{"metadata": snapshot.metadata[row], "text": snapshot.texts[row]} for _, row in chunks]
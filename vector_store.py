@@ -0,0 +1,766 @@
+"""
+On-disk format for the bill vector store.
+
+Format version 3 is a directory. A small ``manifest.json`` names the current
+generation: a base directory plus zero or more append-only segments, each
+holding the same set of files for its own rows:
+
+    vector_store/
+        manifest.json            {"format_version": 3, "generation": G,
+                                  "normalized": true, "dim": D, "count": N,
+                                  "base": "v00000B", "base_count": NB,
+                                  "segments": [{"name": "s00000S", "count": NS}, ...],
+                                  "quantized": "int8",
+                                  "deleted": {"file": "t00000T.npy", "count": ND},
+                                  "appended_from": {"generation": G-1,
+                                                    "count": M}}
+        t00000T.npy              int64[ND] sorted ids of deleted rows (tombstones)
+        v00000B/  s00000S/ ...
+            embeddings.npy       float32[n, D], L2-normalized rows
+            metadata.json        compact JSON list, one dict per row
+            texts.bin            UTF-8 chunk texts, concatenated
+            text_offsets.npy     int64[n + 1] byte offsets into texts.bin
+            embeddings.u8.npy    uint8[n, D] int8-quantized rows (see quantization)
+            quant_params.npy     float32[2, D] per-dimension scale and offset
+            embeddings.bits.npy  uint8[n, ceil(D / 8)] packed sign bits
+            bm25.npz             inverted index of the texts (see keyword_index)
+
+Row ids run through the base and then the segments in manifest order.
+``embeddings.npy`` is opened with ``np.load(mmap_mode='r')`` so cold start is
+near-instant and several processes share the pages through the OS page
+cache; with segments present, readers see a SegmentedMatrix over the mapped
+parts rather than a copy. Chunk texts are never decoded up front either:
+``texts.bin`` and its offsets are mapped too, and ChunkTexts decodes a row
+only when it is asked for (typically just the top-k results).
+
+Writers never modify files in place. append_to_store writes one small
+segment (O(new rows) I/O, LSM style) and write_store writes a fresh base;
+either way the manifest is replaced atomically last, so readers never see a
+half-written store. compact_store folds the segments back into a new base
+with the same row order. delete_rows only records tombstones, leaving row
+ids unchanged; readers mask the deleted rows out, and compact_store drops them
+for good once they pass ``max_dead_fraction`` of the store. Writers in one
+process are serialized by a per-store lock. ``appended_from`` is only present
+when the generation keeps the previous one's row ids (new rows at the end,
+new tombstones, or a segment-only compaction); in-memory indexes use it to
+index just the new rows.
+
+The legacy pickles (format 1: a list of {'embedding', 'metadata', 'text'}
+dicts; format 2: the headered, normalized dict) are still readable and can be
+converted once with ``python vector_store.py convert vectors.pkl vector_store``.
+"""
+
+import json
+import mmap
+import os
+import pickle
+import shutil
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from exceptions import VectorStoreError
+from keyword_index import KeywordPostings
+from quantization import INT8_PARAMS_FILE, BinaryCodes, QuantizedMatrix
+
+STORE_FORMAT_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+
+# How many times a reader retries when a writer swaps generations under it
+_OPEN_RETRIES = 3
+
+# Segments allowed to pile up before compact_store_if_needed folds them into the base
+DEFAULT_MAX_SEGMENTS = 8
+
+# Fraction of deleted rows at which compact_store_if_needed drops them
+DEFAULT_MAX_DEAD_FRACTION = 0.2
+
+_WRITER_LOCKS: Dict[Path, threading.RLock] = {}
+_WRITER_LOCKS_GUARD = threading.Lock()
+
+
+def _writer_lock(store_dir: Path) -> threading.RLock:
+    """Per-store lock serializing writers within this process."""
+    key = Path(store_dir).resolve()
+    with _WRITER_LOCKS_GUARD:
+        return _WRITER_LOCKS.setdefault(key, threading.RLock())
+
+
+class SegmentedMatrix:
+    """Read-only row-wise concatenation of matrices, without copying them.
+
+    Supports what the search code needs from an ndarray: ``len``, ``shape``,
+    ``matrix @ vector``, integer/slice/row-array indexing and ``np.asarray``.
+    """
+
+    ndim = 2
+
+    def __init__(self, parts: Sequence[np.ndarray]):
+        self.parts = [part for part in parts if len(part)] or list(parts[:1])
+        self.offsets = np.cumsum([0] + [len(part) for part in self.parts])
+        self.dtype = self.parts[0].dtype
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self):
+        return (len(self), self.parts[0].shape[1])
+
+    def __matmul__(self, vector: np.ndarray) -> np.ndarray:
+        return np.concatenate([part @ vector for part in self.parts])
+
+    def __array__(self, dtype=None, copy=None):
+        matrix = np.concatenate([np.asarray(part) for part in self.parts])
+        return matrix if dtype is None else matrix.astype(dtype, copy=False)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            row = int(key) + len(self) if key < 0 else int(key)
+            part = int(np.searchsorted(self.offsets, row, side="right")) - 1
+            return self.parts[part][row - self.offsets[part]]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                pieces = [
+                    part[max(start - lo, 0):max(stop - lo, 0)]
+                    for part, lo in zip(self.parts, self.offsets[:-1])
+                    if lo < stop and lo + len(part) > start
+                ]
+                if not pieces:
+                    return np.empty((0, self.shape[1]), dtype=self.dtype)
+                return np.concatenate([np.asarray(piece) for piece in pieces])
+            key = np.arange(start, stop, step)
+
+        rows = np.asarray(key, dtype=np.int64)
+        out = np.empty((len(rows), self.shape[1]), dtype=self.dtype)
+        owners = np.searchsorted(self.offsets, rows, side="right") - 1
+        for part in np.unique(owners):
+            mask = owners == part
+            out[mask] = self.parts[part][rows[mask] - self.offsets[part]]
+        return out
+
+
+class ChunkTexts(Sequence):
+    """Read-only sequence of chunk texts decoded on access from mapped blobs.
+
+    Each part contributes a ``texts.bin`` blob and its ``text_offsets.npy``;
+    ``texts[i]`` slices row i's bytes out of the right blob, so only the rows
+    actually read are ever decoded or paged in. Parts that ``reuse`` already
+    mapped are shared with it instead of being opened again.
+    """
+
+    def __init__(self, parts: Sequence[Path] = (), reuse: Optional["ChunkTexts"] = None):
+        self._paths: List[Path] = list(parts)
+        self._blobs: List[Union[mmap.mmap, bytes]] = []
+        self._offsets: List[np.ndarray] = []
+        mapped = dict(zip(reuse._paths, zip(reuse._offsets, reuse._blobs))) if reuse is not None else {}
+        for part in self._paths:
+            if part in mapped:
+                offsets, blob = mapped[part]
+                self._offsets.append(offsets)
+                self._blobs.append(blob)
+                continue
+            self._offsets.append(np.load(part / "text_offsets.npy", mmap_mode="r"))
+            with open(part / "texts.bin", "rb") as f:
+                # mmap refuses empty files; an empty part has nothing to map anyway
+                size = os.fstat(f.fileno()).st_size
+                self._blobs.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b"")
+        self._starts = np.cumsum([0] + [len(offsets) - 1 for offsets in self._offsets])
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        row = int(key)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"chunk text row {key} out of range")
+        part = int(np.searchsorted(self._starts, row, side="right")) - 1
+        offsets = self._offsets[part]
+        local = row - int(self._starts[part])
+        return self._blobs[part][int(offsets[local]):int(offsets[local + 1])].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ChunkTexts, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ChunkTexts({len(self)} rows)"
+
+
+@dataclass
+class VectorStoreData:
+    """Contents of a vector store."""
+    embeddings: np.ndarray
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+    texts: Sequence[str] = field(default_factory=list)  # ChunkTexts when opened from disk
+    normalized: bool = False
+    format_version: int = STORE_FORMAT_VERSION
+    generation: int = 0
+    appended_from: Optional[Dict[str, int]] = None
+    base: Optional[Path] = None  # base directory the files came from
+    segments: List[Path] = field(default_factory=list)  # segment directories, in row order
+    deleted: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))  # sorted tombstoned rows
+    part_embeddings: List[np.ndarray] = field(default_factory=list)  # one matrix per part, in row order
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    @property
+    def live_count(self) -> int:
+        """Rows not deleted."""
+        return len(self.metadata) - len(self.deleted)
+
+    def live_rows(self) -> np.ndarray:
+        """Ids of the rows not deleted, ascending."""
+        keep = np.ones(len(self.metadata), dtype=bool)
+        keep[self.deleted] = False
+        return np.flatnonzero(keep)
+
+    @property
+    def parts(self) -> List[Path]:
+        """Base followed by segment directories, in row order."""
+        return ([self.base] if self.base is not None else []) + list(self.segments)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a contiguous float32 copy of ``matrix`` with unit-length rows.
+
+    Zero rows are left as zeros rather than turned into NaNs.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.size == 0:
+        return np.ascontiguousarray(matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def read_manifest(store_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Read the store manifest, or None if the store does not exist yet."""
+    try:
+        with open(Path(store_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def read_generation(store_dir: Union[str, Path]) -> Optional[int]:
+    """Current generation of the store, or None if it does not exist."""
+    manifest = read_manifest(store_dir)
+    return manifest["generation"] if manifest else None
+
+
+def open_store(store_dir: Union[str, Path], mmap: bool = True,
+               previous: Optional[VectorStoreData] = None) -> VectorStoreData:
+    """Open the current generation of a store.
+
+    Args:
+        store_dir: Store directory
+        mmap: Memory-map ``embeddings.npy`` instead of reading it into RAM
+        previous: An earlier open of the same store. If the current generation
+            keeps its rows (``appended_from``), their metadata and the parts
+            it already mapped are reused, so only new segments are read
+
+    Returns:
+        VectorStoreData; an empty store if the directory has no manifest
+
+    Raises:
+        VectorStoreError: If the files disagree with the manifest
+    """
+    store_dir = Path(store_dir)
+    for attempt in range(_OPEN_RETRIES):
+        manifest = read_manifest(store_dir)
+        if manifest is None:
+            return VectorStoreData(embeddings=np.empty((0, 0), dtype=np.float32), normalized=True)
+        try:
+            return _open_generation(store_dir, manifest, mmap, previous)
+        except FileNotFoundError:
+            # A writer replaced the generation between reading the manifest
+            # and opening its files; read the new manifest and try again
+            if attempt == _OPEN_RETRIES - 1:
+                raise
+    raise VectorStoreError(f"could not open vector store {store_dir}")
+
+
+def _open_generation(store_dir: Path, manifest: Dict[str, Any], mmap: bool,
+                     previous: Optional[VectorStoreData] = None) -> VectorStoreData:
+    """Open the base and segments named by ``manifest``, reusing what ``previous`` holds."""
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        raise VectorStoreError(
+            f"unsupported vector store format {manifest.get('format_version')} in {store_dir}"
+        )
+    segments = manifest.get("segments", [])
+    part_specs = [(manifest["base"], manifest.get("base_count", manifest["count"]))]
+    part_specs += [(segment["name"], segment["count"]) for segment in segments]
+
+    kept = _kept_rows(manifest, previous)
+    mapped = dict(zip(previous.parts, previous.part_embeddings)) if kept else {}
+    # Unchanged rows share the previous metadata list; it is only copied if rows are added
+    metadata = previous.metadata if kept else []
+    if kept and kept < manifest["count"]:
+        metadata = list(metadata)
+
+    matrices, start = [], 0
+    for name, count in part_specs:
+        part = store_dir / name
+        if start + count <= kept:
+            # Rows already known: only map the part, and only if it is new (compaction)
+            part_embeddings = mapped.get(part)
+            if part_embeddings is None:
+                part_embeddings = _open_part_embeddings(store_dir, part, count, mmap)
+        else:
+            part_embeddings, part_metadata = _open_part(store_dir, part, count, mmap)
+            metadata.extend(part_metadata[max(kept - start, 0):])
+        matrices.append(part_embeddings)
+        start += count
+    texts = ChunkTexts([store_dir / name for name, _ in part_specs], reuse=previous.texts if kept else None)
+
+    if len(metadata) != manifest["count"]:
+        raise VectorStoreError(
+            f"vector store {store_dir} is inconsistent: manifest says {manifest['count']} rows, "
+            f"found {len(metadata)} across base and segments"
+        )
+    deleted = _read_tombstones(store_dir, manifest)
+    return VectorStoreData(
+        embeddings=matrices[0] if len(matrices) == 1 else SegmentedMatrix(matrices),
+        metadata=metadata,
+        texts=texts,
+        normalized=bool(manifest.get("normalized", False)),
+        format_version=manifest["format_version"],
+        generation=manifest["generation"],
+        appended_from=manifest.get("appended_from"),
+        base=store_dir / manifest["base"],
+        segments=[store_dir / segment["name"] for segment in segments],
+        deleted=deleted,
+        part_embeddings=matrices,
+    )
+
+
+def _kept_rows(manifest: Dict[str, Any], previous: Optional[VectorStoreData]) -> int:
+    """Rows of ``previous`` the manifest's generation keeps unchanged (0 if none can be reused)."""
+    appended = manifest.get("appended_from")
+    if (
+        previous is None
+        or appended is None
+        or not isinstance(previous.texts, ChunkTexts)
+        or len(previous.part_embeddings) != len(previous.parts)
+        or appended["generation"] != previous.generation
+        or appended["count"] != len(previous)
+    ):
+        return 0
+    return appended["count"]
+
+
+def _read_tombstones(store_dir: Path, manifest: Dict[str, Any]) -> np.ndarray:
+    """Deleted row ids named by the manifest (empty if none)."""
+    tombstones = manifest.get("deleted")
+    if not tombstones:
+        return np.empty(0, dtype=np.int64)
+    deleted = np.load(store_dir / tombstones["file"])
+    if len(deleted) != tombstones["count"] or (len(deleted) and deleted[-1] >= manifest["count"]):
+        raise VectorStoreError(f"vector store {store_dir} has tombstones that do not match its rows")
+    return deleted
+
+
+def _open_part_embeddings(store_dir: Path, part: Path, count: int, mmap: bool) -> np.ndarray:
+    """Open one part's embeddings (without its metadata) and check it holds ``count`` rows."""
+    embeddings = np.load(part / "embeddings.npy", mmap_mode="r" if mmap else None)
+    text_count = len(np.load(part / "text_offsets.npy", mmap_mode="r")) - 1
+    if not (len(embeddings) == text_count == count):
+        raise VectorStoreError(
+            f"vector store {store_dir} is inconsistent: manifest says {count} rows in {part.name}, "
+            f"found {len(embeddings)} vectors, {text_count} texts"
+        )
+    return embeddings
+
+
+def _open_part(store_dir: Path, part: Path, count: int, mmap: bool):
+    """Open one base or segment directory and check it holds ``count`` rows."""
+    embeddings = np.load(part / "embeddings.npy", mmap_mode="r" if mmap else None)
+    with open(part / "metadata.json", "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    text_count = len(np.load(part / "text_offsets.npy", mmap_mode="r")) - 1
+
+    if not (len(embeddings) == len(metadata) == text_count == count):
+        raise VectorStoreError(
+            f"vector store {store_dir} is inconsistent: manifest says {count} rows in {part.name}, "
+            f"found {len(embeddings)} vectors, {len(metadata)} metadata rows, {text_count} texts"
+        )
+    return embeddings, metadata
+
+
+def _write_part(part: Path, embeddings: np.ndarray, metadata: List[Dict[str, Any]],
+                texts: List[str], quant_params: Optional[np.ndarray] = None) -> None:
+    """Write one base or segment directory from already-normalized rows.
+
+    Segments quantize with the base's ``quant_params`` so their int8 codes
+    can be concatenated with the base's.
+    """
+    if part.exists():
+        shutil.rmtree(part)
+    part.mkdir()
+
+    np.save(part / "embeddings.npy", embeddings)
+    if quant_params is None:
+        quantized = QuantizedMatrix.from_float(embeddings, "int8")
+    else:
+        quantized = QuantizedMatrix.from_float(embeddings, "int8", scale=quant_params[0], offset=quant_params[1])
+    quantized.save(part)
+    BinaryCodes.from_float(embeddings).save(part)
+    with open(part / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump(list(metadata), f, separators=(",", ":"))
+    _write_texts(part, texts)
+    KeywordPostings.from_texts(texts).save(part)
+
+
+def write_store(store_dir: Union[str, Path], embeddings: np.ndarray,
+                metadata: List[Dict[str, Any]], texts: List[str],
+                appended_from: Optional[Dict[str, int]] = None) -> int:
+    """Write a complete new generation (a base, no segments) and make it current.
+
+    Embeddings are normalized on the way out. Previous generation directories
+    are removed after the swap; on POSIX, readers that still have them mapped
+    keep working until they reopen.
+
+    Args:
+        appended_from: {'generation', 'count'} of the generation this one
+            extends, when its first ``count`` rows are unchanged
+
+    Returns:
+        The new generation number
+    """
+    if not (len(embeddings) == len(metadata) == len(texts)):
+        raise ValueError(
+            f"store columns disagree: {len(embeddings)} vectors, "
+            f"{len(metadata)} metadata rows, {len(texts)} texts"
+        )
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    embeddings = normalize_rows(embeddings)
+    if embeddings.ndim != 2:
+        embeddings = embeddings.reshape(len(metadata), -1)
+    return _write_base(store_dir, embeddings, metadata, texts, appended_from)
+
+
+def _write_base(store_dir: Path, embeddings: np.ndarray, metadata: List[Dict[str, Any]],
+                texts: List[str], appended_from: Optional[Dict[str, int]]) -> int:
+    """Write already-normalized rows as a new base and make it current."""
+    with _writer_lock(store_dir):
+        previous = read_manifest(store_dir)
+        generation = (previous["generation"] if previous else 0) + 1
+        base_name = f"v{generation:06d}"
+        _write_part(store_dir / base_name, embeddings, metadata, texts)
+
+        manifest = {
+            "format_version": STORE_FORMAT_VERSION,
+            "generation": generation,
+            "normalized": True,
+            "dim": int(embeddings.shape[1]),
+            "count": len(metadata),
+            "base": base_name,
+            "base_count": len(metadata),
+            "segments": [],
+            "quantized": "int8",
+        }
+        if appended_from is not None:
+            manifest["appended_from"] = appended_from
+        _write_manifest(store_dir, manifest)
+        _remove_stale_generations(store_dir, keep={base_name})
+    return generation
+
+
+def _write_texts(base: Path, texts: List[str]) -> None:
+    """Write chunk texts as one blob plus an offsets array."""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    with open(base / "texts.bin", "wb") as f:
+        for chunk in encoded:
+            f.write(chunk)
+    np.save(base / "text_offsets.npy", offsets)
+
+
+def _write_manifest(store_dir: Path, manifest: Dict[str, Any]) -> None:
+    """Atomically replace the manifest."""
+    tmp_path = store_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, store_dir / MANIFEST_NAME)
+
+
+def _remove_stale_generations(store_dir: Path, keep: set) -> None:
+    """Delete base/segment directories and tombstone files not named in ``keep``."""
+    for entry in store_dir.iterdir():
+        if entry.name in keep:
+            continue
+        if entry.is_dir() and entry.name[:1] in ("v", "s"):
+            shutil.rmtree(entry, ignore_errors=True)
+        elif entry.is_file() and entry.name[:1] == "t" and entry.suffix == ".npy":
+            entry.unlink(missing_ok=True)
+
+
+def append_to_store(store_dir: Union[str, Path], embeddings: np.ndarray,
+                    metadata: List[Dict[str, Any]], texts: List[str]) -> int:
+    """Append rows as a new segment, creating the store if needed.
+
+    Only the new rows are written; existing files are untouched.
+
+    Returns:
+        The new total row count
+    """
+    if not (len(embeddings) == len(metadata) == len(texts)):
+        raise ValueError(
+            f"store columns disagree: {len(embeddings)} vectors, "
+            f"{len(metadata)} metadata rows, {len(texts)} texts"
+        )
+    store_dir = Path(store_dir)
+    new_embeddings = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(metadata), -1))
+
+    with _writer_lock(store_dir):
+        manifest = read_manifest(store_dir)
+        if manifest is None or manifest["count"] == 0:
+            write_store(store_dir, new_embeddings, metadata, texts)
+            return len(metadata)
+        if len(metadata) == 0:
+            return manifest["count"]
+        if new_embeddings.shape[1] != manifest["dim"]:
+            raise VectorStoreError(
+                f"cannot append {new_embeddings.shape[1]}-d vectors to {manifest['dim']}-d store {store_dir}"
+            )
+
+        generation = manifest["generation"] + 1
+        segment_name = f"s{generation:06d}"
+        params_path = store_dir / manifest["base"] / INT8_PARAMS_FILE
+        quant_params = np.load(params_path) if params_path.is_file() else None
+        _write_part(store_dir / segment_name, new_embeddings, metadata, texts, quant_params)
+
+        segments = manifest.get("segments", []) + [{"name": segment_name, "count": len(metadata)}]
+        _write_manifest(store_dir, {
+            **manifest,
+            "generation": generation,
+            "count": manifest["count"] + len(metadata),
+            "base_count": manifest.get("base_count", manifest["count"]),
+            "segments": segments,
+            "appended_from": {"generation": manifest["generation"], "count": manifest["count"]},
+        })
+        return manifest["count"] + len(metadata)
+
+
+def delete_rows(store_dir: Union[str, Path], rows: Sequence[int],
+                expected_generation: Optional[int] = None) -> int:
+    """Tombstone ``rows``; their data stays on disk until the next compaction.
+
+    Only the tombstone list is written, so the cost is independent of the
+    store size, and row ids do not change.
+
+    Args:
+        store_dir: Store directory
+        rows: Row ids to delete
+        expected_generation: Generation the row ids were read from; the ids
+            only hold while no compaction has renumbered the rows since
+
+    Returns:
+        How many of ``rows`` were not already deleted
+
+    Raises:
+        VectorStoreError: If ``expected_generation`` is given and is not the
+            current generation, or a row is out of range
+    """
+    store_dir = Path(store_dir)
+    with _writer_lock(store_dir):
+        manifest = read_manifest(store_dir)
+        current = manifest["generation"] if manifest else None
+        if expected_generation is not None and current != expected_generation:
+            raise VectorStoreError(
+                f"cannot delete rows of generation {expected_generation} from {store_dir}: "
+                f"the store is at generation {current}"
+            )
+        if manifest is None:
+            return 0
+        previous = _read_tombstones(store_dir, manifest)
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if len(rows) and (rows[0] < 0 or rows[-1] >= manifest["count"]):
+            raise VectorStoreError(f"cannot delete rows outside 0..{manifest['count'] - 1} in {store_dir}")
+        deleted = np.union1d(previous, rows).astype(np.int64)
+        added = len(deleted) - len(previous)
+        if added == 0:
+            return 0
+
+        generation = manifest["generation"] + 1
+        tombstone_name = f"t{generation:06d}.npy"
+        np.save(store_dir / tombstone_name, deleted)
+        _write_manifest(store_dir, {
+            **manifest,
+            "generation": generation,
+            "deleted": {"file": tombstone_name, "count": len(deleted)},
+            "appended_from": {"generation": manifest["generation"], "count": manifest["count"]},
+        })
+        keep = {manifest["base"], tombstone_name} | {segment["name"] for segment in manifest.get("segments", [])}
+        _remove_stale_generations(store_dir, keep=keep)
+        return added
+
+
+def compact_store(store_dir: Union[str, Path]) -> bool:
+    """Merge the segments into a new base and drop deleted rows.
+
+    Without deleted rows the row order and ids are unchanged.
+
+    Returns:
+        True if there was anything to merge or drop
+    """
+    store_dir = Path(store_dir)
+    with _writer_lock(store_dir):
+        store = open_store(store_dir)
+        if len(store.deleted):
+            live = store.live_rows()
+            _write_base(
+                store_dir, np.ascontiguousarray(store.embeddings[live], dtype=np.float32),
+                [store.metadata[i] for i in live], [store.texts[i] for i in live],
+                appended_from=None,  # row ids change
+            )
+            return True
+        if not store.segments:
+            return False
+        # Rows are copied verbatim; renormalizing would perturb them by an ulp
+        _write_base(
+            store_dir, np.ascontiguousarray(store.embeddings, dtype=np.float32), store.metadata, store.texts,
+            # Same rows in the same order: indexes over the old generation stay valid
+            appended_from={"generation": store.generation, "count": len(store)},
+        )
+        return True
+
+
+def compact_store_if_needed(store_dir: Union[str, Path], max_segments: int = DEFAULT_MAX_SEGMENTS,
+                            max_dead_fraction: float = DEFAULT_MAX_DEAD_FRACTION) -> bool:
+    """Compact once more than ``max_segments`` segments have accumulated or
+    more than ``max_dead_fraction`` of the rows are deleted."""
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        return False
+    dead = manifest.get("deleted", {}).get("count", 0)
+    too_many_segments = len(manifest.get("segments", [])) > max_segments
+    too_many_dead = dead > 0 and dead > max_dead_fraction * manifest["count"]
+    if not (too_many_segments or too_many_dead):
+        return False
+    return compact_store(store_dir)
+
+
+def load_vector_pickle(path: Union[str, Path]) -> VectorStoreData:
+    """Load a legacy (format 1 or 2) vector pickle.
+
+    The returned embeddings are always normalized.
+    """
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+
+    if isinstance(data, dict) and "format_version" in data:
+        embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+        normalized = bool(data.get("normalized", False))
+        return VectorStoreData(
+            embeddings=embeddings if normalized else normalize_rows(embeddings),
+            metadata=list(data.get("metadata", [])),
+            texts=list(data.get("texts", [])),
+            normalized=normalized,
+            format_version=data["format_version"],
+        )
+
+    # Legacy list of {'embedding', 'metadata', 'text'} dicts
+    data = data or []
+    if data:
+        embeddings = normalize_rows(
+            np.stack([np.asarray(item["embedding"], dtype=np.float32) for item in data])
+        )
+    else:
+        embeddings = np.empty((0, 0), dtype=np.float32)
+    return VectorStoreData(
+        embeddings=embeddings,
+        metadata=[item["metadata"] for item in data],
+        texts=[item["text"] for item in data],
+        normalized=False,
+        format_version=1,
+    )
+
+
+def _load_repository_pickle(pickle_path: Path, metadata_path: Path) -> VectorStoreData:
+    """Load the old VectorRepository layout: bare vectors plus a .meta.json."""
+    with open(pickle_path, "rb") as f:
+        data = pickle.load(f)
+    if isinstance(data, dict):
+        vectors = data.get("embeddings", [])
+    else:
+        vectors = data or []
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+
+    rows = rows[:len(vectors)]
+    return VectorStoreData(
+        embeddings=normalize_rows(np.asarray(vectors[:len(rows)], dtype=np.float32)),
+        metadata=[
+            {"source": row["source"], "created_at": row.get("created_at"), "metadata": row.get("metadata", {})}
+            for row in rows
+        ],
+        texts=[row.get("text", "") for row in rows],
+        format_version=1,
+    )
+
+
+def convert_legacy_pickle(pickle_path: Union[str, Path], store_dir: Union[str, Path],
+                          metadata_path: Optional[Union[str, Path]] = None) -> int:
+    """Convert a legacy pickle into a format-3 store directory.
+
+    Args:
+        pickle_path: Legacy vectors pickle
+        store_dir: Destination store directory (replaced if it exists)
+        metadata_path: The ``.meta.json`` for pickles written by the old
+            VectorRepository, which kept only bare vectors in the pickle
+
+    Returns:
+        Number of rows converted
+    """
+    if metadata_path is not None:
+        legacy = _load_repository_pickle(Path(pickle_path), Path(metadata_path))
+    else:
+        legacy = load_vector_pickle(pickle_path)
+    write_store(store_dir, legacy.embeddings, legacy.metadata, legacy.texts)
+    return len(legacy)
+
+
+def ensure_store(store_dir: Union[str, Path], legacy_pickle: Optional[Union[str, Path]] = None) -> bool:
+    """Convert ``legacy_pickle`` into ``store_dir`` if the store does not exist yet.
+
+    Returns:
+        True if a conversion happened
+    """
+    if read_manifest(store_dir) is not None:
+        return False
+    if legacy_pickle is None or not Path(legacy_pickle).is_file():
+        return False
+    convert_legacy_pickle(legacy_pickle, store_dir)
+    return True
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) not in (3, 4) or args[0] != "convert":
+        print("usage: python vector_store.py convert <vectors.pkl> <store_dir> [<vectors.meta.json>]")
+        sys.exit(2)
+    rows = convert_legacy_pickle(args[1], args[2], args[3] if len(args) == 4 else None)
+    print(f"converted {rows} vectors from {args[1]} into {args[2]}")